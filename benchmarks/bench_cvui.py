@@ -0,0 +1,67 @@
+# coding: utf-8
+"""Per-frame cost of drawing the ``cvui`` widgets, with and without the render cache.
+
+The GUI column of ``cv-pencil-sketch`` (17 widgets) is drawn on a monitor which
+is cleared every frame, as ``cv2Project.wrap`` does. ``idle`` keeps every widget
+unchanged, and ``drag`` changes a trackbar value every frame.
+
+    $ python benchmarks/bench_cvui.py --frames 500
+"""
+import argparse
+import time
+
+import numpy as np
+
+from pycharmers.opencv import cvui
+
+
+def pencil_sketch_gui(monitor, gui_x, values):
+    cvui.text(where=monitor, x=gui_x + 20, y=10, text="[Pencil Sketch]")
+    cvui.radiobox(where=monitor, x=gui_x, y=30, labels=values["labels"], states=values["states"])
+    for i, (name, value, vmax) in enumerate(values["trackbars"]):
+        y = 170 + 80 * i
+        cvui.text(where=monitor, x=gui_x, y=y, text=name)
+        cvui.trackbar(where=monitor, x=gui_x, y=y + 20, width=140, value=value, min=1, max=vmax, labelfmt="%.1Lf", options=cvui.TRACKBAR_DISCRETE, discreteStep=1)
+    cvui.button(where=monitor, x=gui_x, y=monitor.shape[0] - 95, width=70, height=30, label="&Save", color=(137, 225, 241))
+    cvui.button(where=monitor, x=gui_x + 80, y=monitor.shape[0] - 95, width=80, height=30, label="&Capture", color=(177, 163, 121))
+    cvui.checkbox(where=monitor, x=gui_x, y=monitor.shape[0] - 130, label="Profile", state=values["profile"])
+
+
+def measure(num_frames, drag, enabled):
+    cvui.cache(enabled=enabled)
+    monitor = np.zeros(shape=(960, 1440, 3), dtype=np.uint8)
+    values = {
+        "labels": ["Original", "Gray", "Blur", "Laplacian", "Binarization", "Morphological"],
+        "states": [True] + [False] * 5,
+        "trackbars": [("Median Blur ksize", [5], 15), ("Laplacian ksize", [7], 15), ("Binarization threshold", [127], 255), ("Binarization block size", [11], 25), ("Binarization constant value.", [2], 15)],
+        "profile": [False],
+    }
+    elapsed = 0.0
+    for i in range(num_frames):
+        monitor[:] = (49, 52, 49)
+        if drag:
+            values["trackbars"][2][1][0] = i % 255
+        start = time.perf_counter()
+        pencil_sketch_gui(monitor, gui_x=1250, values=values)
+        elapsed += time.perf_counter() - start
+    return 1e3 * elapsed / num_frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cvui render cache.")
+    parser.add_argument("--frames", type=int, default=300, help="The number of frames.")
+    args = parser.parse_args()
+
+    # Mouse interactions need a context, but no window is required to draw widgets.
+    internal = getattr(cvui, "__internal")
+    internal.contexts["bench"] = cvui.Context()
+    internal.init("bench", -1)
+    print(f"{'scenario':<8} {'no cache':>12} {'cache':>12} {'speedup':>8}")
+    for scenario in ["idle", "drag"]:
+        without = measure(args.frames, drag=scenario == "drag", enabled=False)
+        with_ = measure(args.frames, drag=scenario == "drag", enabled=True)
+        print(f"{scenario:<8} {without:>9.3f} ms {with_:>9.3f} ms {without / with_:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# coding: utf-8
+"""Throughput of decoding an image directory with ``ImageDirFrameSource`` .
+
+Measures frames per second while iterating over a directory for several
+``num_workers`` and ``reduce`` settings. If ``--dir`` is not given, sample
+PNG frames are written to a temporary directory first.
+
+    $ python benchmarks/bench_image_dir_decode.py --num-frames 200 --size 1920 1080
+    $ python benchmarks/bench_image_dir_decode.py --dir path/to/frames --workers 0 2 4 8
+"""
+import argparse
+import tempfile
+import time
+
+from pycharmers.opencv import ImageDirFrameSource
+from synthetic import write_sample_frames
+
+
+def measure(dirname, num_workers, reduce, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        source = ImageDirFrameSource(dirname, num_workers=num_workers, reduce=reduce)
+        start = time.perf_counter()
+        n = sum(1 for _ in source)
+        best = min(best, time.perf_counter() - start)
+    return n, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel image-directory decoding.")
+    parser.add_argument("--dir", type=str, default=None, help="Directory of frames. (Sample frames are created if omitted.)")
+    parser.add_argument("--num-frames", type=int, default=100, help="The number of sample frames.")
+    parser.add_argument("--size", type=int, nargs=2, default=(1920, 1080), help="Size of sample frames. (width height)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4, 8], help="Values of num_workers.")
+    parser.add_argument("--reduce", type=int, nargs="+", default=[1, 2], help="Values of reduce.")
+    parser.add_argument("--repeat", type=int, default=3, help="The best of REPEAT runs is reported.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirname = args.dir
+        if dirname is None:
+            dirname = tmpdir
+            write_sample_frames(dirname, size=args.size, num_frames=args.num_frames)
+        print(f"{'reduce':>6} {'workers':>7} {'frames':>7} {'sec':>8} {'fps':>8} {'speedup':>7}")
+        for reduce in args.reduce:
+            baseline = None
+            for num_workers in args.workers:
+                n, sec = measure(dirname, num_workers, reduce, args.repeat)
+                baseline = baseline or sec
+                print(f"{reduce:>6} {num_workers:>7} {n:>7} {sec:>8.3f} {n/sec:>8.1f} {baseline/sec:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
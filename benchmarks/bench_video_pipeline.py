@@ -0,0 +1,231 @@
+# coding: utf-8
+"""Benchmarks of the video hot paths on synthetic clips.
+
+Synthetic videos and image directories are generated at several resolutions
+and lengths. Each case is then run in a fresh process, so that its peak RSS
+is not polluted by the previous ones. Results (frames/sec and peak RSS) are
+written as JSON to compare between releases.
+
+    $ python benchmarks/bench_video_pipeline.py --out bench.json
+    $ python benchmarks/bench_video_pipeline.py --sizes 640x360 1920x1080 --lengths 300 --cases mono concat
+"""
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+import pycharmers
+from pycharmers.opencv import (
+    VideoWriterCreate,
+    count_frame_num,
+    get_frame_metadata,
+    hconcat_resize_min,
+    mono_frame_generator,
+    multi_frame_generator_concat,
+    resize_aspect,
+    vconcat_resize_min,
+)
+from synthetic import synthetic_frames, write_sample_frames, write_sample_video
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process. [MB]"""
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # NOTE: ``ru_maxrss`` is in bytes on macOS, and in kilobytes on Linux.
+    return maxrss / 1024 ** 2 if sys.platform == "darwin" else maxrss / 1024
+
+
+# ============ #
+#  Each case   #
+# ============ #
+# A case receives a clip, and returns the number of processed frames.
+
+
+def case_mono_video(clip):
+    return sum(1 for _ in mono_frame_generator(clip["video"]))
+
+
+def case_mono_video_step10(clip):
+    return sum(1 for _ in mono_frame_generator(clip["video"], step=10))
+
+
+def case_mono_dir(clip):
+    return sum(1 for _ in mono_frame_generator(clip["image_dir"]))
+
+
+def case_mono_dir_workers4(clip):
+    return sum(1 for _ in mono_frame_generator(clip["image_dir"], num_workers=4))
+
+
+def case_concat(clip):
+    gen = multi_frame_generator_concat(clip["video"], clip["image_dir"], clip["video"], grid=(2, 2))
+    return sum(1 for _ in gen)
+
+
+def case_count_frame_num_cold(clip):
+    n = 0
+    for _ in range(5):
+        n += get_frame_metadata(clip["video"], cache=False)["num_frames"]
+    return n
+
+
+def case_count_frame_num(clip):
+    count_frame_num(clip["video"])  # Warm the cache.
+    n = 0
+    for _ in range(100):
+        n += count_frame_num(clip["video"])
+    return n
+
+
+def _write(clip, **kwargs):
+    out_path = os.path.join(clip["workdir"], f"out_{os.getpid()}.mp4")
+    is_ok, writer, out_path = VideoWriterCreate(
+        out_path=out_path, codec="mp4v", fps=30.0, size=clip["size"], **kwargs
+    )
+    if not is_ok:
+        return 0
+    n = 0
+    for frame in synthetic_frames(clip["size"], clip["num_frames"]):
+        writer.write(frame)
+        n += 1
+    writer.release()
+    os.remove(out_path)
+    return n
+
+
+def case_writer_cv2(clip):
+    return _write(clip)
+
+
+def case_writer_async(clip):
+    return _write(clip, async_=True)
+
+
+def case_writer_ffmpeg(clip):
+    if shutil.which("ffmpeg") is None:
+        return None
+    return _write(clip, backend="ffmpeg", ffmpeg_kwargs={"preset": "veryfast"})
+
+
+def _pairs(clip, num=100):
+    w, h = clip["size"]
+    frame = next(synthetic_frames((w, h), 1))
+    other = cv2.resize(frame, dsize=(w // 2, h // 3))
+    return [(frame, other)] * num
+
+
+def case_hconcat_resize_min(clip):
+    pairs = _pairs(clip)
+    for a, b in pairs:
+        hconcat_resize_min(a, b)
+    return len(pairs)
+
+
+def case_vconcat_resize_min(clip):
+    pairs = _pairs(clip)
+    for a, b in pairs:
+        vconcat_resize_min(a, b)
+    return len(pairs)
+
+
+def case_resize_aspect(clip):
+    pairs = _pairs(clip)
+    for a, _ in pairs:
+        resize_aspect(a, dsize=(300, 300))
+    return len(pairs)
+
+
+CASES = {
+    name[len("case_"):]: func for name, func in globals().items() if name.startswith("case_") and callable(func)
+}
+
+
+def _run_case(name, clip, queue):
+    start = time.perf_counter()
+    frames = CASES[name](clip)
+    sec = time.perf_counter() - start
+    queue.put({"frames": frames, "sec": sec, "peak_rss_mb": peak_rss_mb()})
+
+
+def run_case(name, clip, repeat=1):
+    """Run the case ``repeat`` times in fresh processes, and return the best."""
+    ctx = multiprocessing.get_context("spawn")
+    best = None
+    for _ in range(repeat):
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_run_case, args=(name, clip, queue))
+        proc.start()
+        result = queue.get()
+        proc.join()
+        if (best is None) or (result["sec"] < best["sec"]):
+            best = result
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the video pipeline on synthetic clips.")
+    parser.add_argument("--sizes", type=str, nargs="+", default=["320x240", "1280x720"], help="Resolutions. (WIDTHxHEIGHT)")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[90], help="The number of frames of the clips.")
+    parser.add_argument("--cases", type=str, nargs="+", default=None, help=f"Cases to run. (Prefix match, from {list(CASES)})")
+    parser.add_argument("--repeat", type=int, default=1, help="The best of REPEAT runs is reported.")
+    parser.add_argument("--out", type=str, default=None, help="Where to write the JSON. (stdout if omitted)")
+    args = parser.parse_args()
+
+    cases = [name for name in CASES if (args.cases is None) or any(name.startswith(c) for c in args.cases)]
+    report = {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "pycharmers": pycharmers.__version__,
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+        },
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for size_str in args.sizes:
+            size = tuple(int(e) for e in size_str.lower().split("x"))
+            for num_frames in args.lengths:
+                name = f"{size[0]}x{size[1]}_{num_frames}"
+                clip = {
+                    "size": size,
+                    "num_frames": num_frames,
+                    "workdir": workdir,
+                    "video": write_sample_video(os.path.join(workdir, name + ".mp4"), size, num_frames),
+                    "image_dir": write_sample_frames(os.path.join(workdir, name), size, num_frames),
+                }
+                for case in cases:
+                    result = run_case(case, clip, repeat=args.repeat)
+                    if result["frames"] is None:
+                        print(f"skip {case} ({name})", file=sys.stderr)
+                        continue
+                    result.update(
+                        case=case,
+                        resolution=list(size),
+                        num_frames=num_frames,
+                        fps=result["frames"] / result["sec"] if result["sec"] > 0 else None,
+                    )
+                    report["results"].append(result)
+                    print(f"{case:<24} {name:<16} {result['fps']:>10.1f} frames/s {result['peak_rss_mb']:>8.1f} MB", file=sys.stderr)
+    text = json.dumps(report, indent=2)
+    if args.out is None:
+        print(text)
+    else:
+        with open(args.out, mode="w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# coding: utf-8
+"""Synthetic clips for the benchmarks.
+
+Frames are a shifting noise pattern, so that codecs can not compress them
+into nothing and decoding costs are close to real footage.
+"""
+import os
+
+import cv2
+import numpy as np
+
+
+def synthetic_frames(size, num_frames, seed=0):
+    """Yield ``num_frames`` BGR frames of ``size`` ( ``width`` , ``height`` )."""
+    w, h = size
+    rnd = np.random.RandomState(seed)
+    noise = rnd.randint(0, 256, size=(h, w, 3), dtype=np.uint8)
+    noise = cv2.GaussianBlur(noise, ksize=(5, 5), sigmaX=0)
+    for i in range(num_frames):
+        yield np.roll(noise, shift=(i * 3, i * 7), axis=(0, 1))
+
+
+def write_sample_video(path, size, num_frames, fps=30.0, codec="mp4v"):
+    """Write a synthetic video, and return its ``path`` ."""
+    video = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*codec), fps, tuple(size))
+    for frame in synthetic_frames(size, num_frames):
+        video.write(frame)
+    video.release()
+    return path
+
+
+def write_sample_frames(dirname, size, num_frames, ext=".png"):
+    """Write synthetic frames into ``dirname`` , and return it."""
+    os.makedirs(dirname, exist_ok=True)
+    for i, frame in enumerate(synthetic_frames(size, num_frames)):
+        cv2.imwrite(os.path.join(dirname, f"{i:>06}{ext}"), frame)
+    return dirname
@@ -5,45 +5,56 @@ import cv2
 import numpy as np
 from ..utils import cv2ArgumentParser
 from ..opencv import cvui, cv2Project
-from ..opencv import cascade_creator, draw_bboxes_xywh, cv2GREEN
-from ..opencv.cascade import OPENCV_CASCADES
+from ..opencv import CascadeDetector, OPENCV_CASCADES, draw_bboxes_xywh, cv2GREEN
 
 def cvCascades(argv=sys.argv[1:]):
     """Control the OpenCV cascade Examples.
 
     Please see :meth:`cv2ArgumentParser <pycharmers.utils.argparse_utils.cv2ArgumentParser>` for arguments.
 
+    Args:
+        --scale (float)    : The scale of the frame where the objects are searched for. (Defaults to ``1.0`` , the full resolution.)
+        --interval (int)   : Run detection every ``interval`` frames.
+        --tracking (str)   : How to predict the bounding boxes between detections. ( ``"linear"`` or ``"hold"`` )
+
     Note:
         When you run from the command line, execute as follows::
 
-        $ cv-cascades --cam 0 --radio-width 200    
+        $ cv-cascades --cam 0 --radio-width 200 --scale 0.5 --interval 3
     """
     parser = cv2ArgumentParser(prog="cv-cascades", description="OpenCV cascade examples", add_help=True)
+    parser.add_argument("--scale",    type=float, default=1.0, help="The scale of the frame where the objects are searched for. (Smaller is faster, but misses small objects.)")
+    parser.add_argument("--interval", type=int,   default=1,   help="Run detection every INTERVAL frames.")
+    parser.add_argument("--tracking", type=str,   default="linear", choices=CascadeDetector.SUPPORTED_TRACKINGS, help="How to predict the bounding boxes between detections.")
     args = parser.parse_args(argv)
 
-    # Collect All cascades.
+    # Collect All cascades. (They are loaded when they are selected for the first time.)
     cascade_names, cascades, states = [],[],[]
-    for name,value in OPENCV_CASCADES.items():
+    for name in OPENCV_CASCADES.keys():
         m = re.match(pattern=r"^haarcascades:haarcascade_(.+)$", string=name)
         if m is not None:
-            try:
-                cascade = cascade_creator(cascade=name)
-                cascades.append(cascade)
-                states.append(len(states)==0)
-                cascade_names.append(m.group(1))
-            except Exception as e:
-                print(name, e)
+            cascades.append(name)
+            states.append([len(states)==0])
+            cascade_names.append(m.group(1))
 
     project = cv2Project(args=args, cascade_names=cascade_names)
+    # Selected cascades -> CascadeDetector
+    detectors = {}
 
     def func(frame, monitor, gui_x, frame_height, cascade_names, **kwargs):
-        cvui.text(where=monitor,           x=gui_x+20, y=5,  text="[Cascade List]")
-        idx = cvui.radiobox(where=monitor, x=gui_x,    y=25, labels=cascade_names, states=states)
-        cascade = cascades[idx]
-        name = cascade_names[idx]
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        for bbox in cascade.detectMultiScale(gray):
-            draw_bboxes_xywh(frame=frame, bboxes=bbox, infos=[{"color":cv2GREEN, "text": name}])
+        cvui.text(where=monitor, x=gui_x+20, y=5, text="[Cascade List]")
+        selected = tuple(i for i,(name,state) in enumerate(zip(cascade_names, states)) if cvui.checkbox(where=monitor, x=gui_x, y=25+20*i, label=name, state=state))
+        if len(selected)==0:
+            return frame
+        if selected not in detectors:
+            for detector in detectors.values():
+                detector.close()
+            detectors.clear()
+            detectors[selected] = CascadeDetector(
+                cascades=[cascades[i] for i in selected], scale=args.scale, interval=args.interval, tracking=args.tracking
+            )
+        for *bbox, i in detectors[selected](frame):
+            draw_bboxes_xywh(frame=frame, bboxes=bbox, infos=[{"color":cv2GREEN, "text": cascade_names[selected[i]]}])
         return frame
         
     project.wrap(func=func)
\ No newline at end of file
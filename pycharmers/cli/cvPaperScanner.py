@@ -3,7 +3,7 @@ import sys
 import cv2
 import numpy as np
 from ..utils import cv2ArgumentParser
-from ..opencv import cvui, cv2Project
+from ..opencv import cvui, cv2Project, StageCache
 from ..opencv import draw_text_with_bg, findBiggestContour, reorder_contour, draw_bboxes_xywh
 
 def cvPaperScanner(argv=sys.argv[1:]):
@@ -31,6 +31,38 @@ def cvPaperScanner(argv=sys.argv[1:]):
     threshold1  = [100]
     threshold2  = [200]
     eta_counter = [0.1]
+    cache       = StageCache()
+
+    def canny_edge(src, threshold1, threshold2):
+        # Add Gaussian Blur.
+        img_blur = cv2.GaussianBlur(src=src, ksize=(5, 5), sigmaX=1)
+        # APPLY Canny Blur.
+        img_th = cv2.Canny(image=img_blur, threshold1=threshold1, threshold2=threshold2)
+        # Apply Dilation & Erosion.
+        kernel = np.ones(shape=(5, 5), dtype=np.uint8)
+        return cv2.erode(src=cv2.dilate(src=img_th, kernel=kernel, iterations=2), kernel=kernel, iterations=1)
+
+    def find_contours(img_binary):
+        # Find All Contours.
+        contours, hierarchy = cv2.findContours(image=img_binary, mode=cv2.RETR_EXTERNAL, method=cv2.CHAIN_APPROX_SIMPLE)
+        return (contours, cv2.drawContours(image=img_binary.copy(), contours=contours, contourIdx=-1, color=(0, 255, 0), thickness=10))
+
+    def find_biggest_contour(contours, img_binary, eta):
+        biggest_contour, max_area = findBiggestContour(contours=contours, eta=eta)
+        if max_area == 0:
+            return (biggest_contour, max_area, None)
+        # Draw the biggest contour
+        biggest_contour = reorder_contour(biggest_contour)
+        return (biggest_contour, max_area, cv2.drawContours(image=img_binary.copy(), contours=biggest_contour, contourIdx=-1, color=(0, 255, 0), thickness=20))
+
+    def warp_perspective(src, biggest_contour, dsize):
+        width, height = dsize
+        matrix = cv2.getPerspectiveTransform(src=np.float32(biggest_contour), dst=np.float32([[0, 0],[width, 0], [0, height],[width, height]]))
+        return cv2.warpPerspective(src=src, M=matrix, dsize=dsize)
+
+    def adaptive_threshold(src):
+        img_th = cv2.adaptiveThreshold(src=src, maxValue=255, adaptiveMethod=1, thresholdType=1, blockSize=7, C=2)
+        return cv2.medianBlur(src=cv2.bitwise_not(src=img_th), ksize=3)
 
     def func(frame, monitor, frame_width, frame_height, gui_x, **kwargs):
         cvui.text(where=monitor, x=gui_x+20,           y=30,  text="[Document Scanner]")
@@ -43,50 +75,38 @@ def cvPaperScanner(argv=sys.argv[1:]):
         th1 = cvui.trackbar(where=monitor, x=gui_x,    y=290, width=150, value=threshold1, min=0., max=255.)
         th2 = cvui.trackbar(where=monitor, x=gui_x,    y=380, width=150, value=threshold2, min=0., max=255.)
         eta = cvui.counter(where=monitor,  x=gui_x+30, y=500, value=eta_counter, step=0.01, fmt="%.2f")
-        img_bgr = frame.copy()
+        # Only the stages downstream of the changed parameter are recomputed for still images.
+        img_bgr = frame = cache.source(frame)
         # Gray
         if idx>=1:
             # Convert image to Gray scale.
-            frame = cv2.cvtColor(src=frame, code=cv2.COLOR_BGR2GRAY)
+            frame = cache("gray", cv2.cvtColor, frame, code=cv2.COLOR_BGR2GRAY)
         # Canny Edge
         if idx>=2:
-            # Add Gaussian Blur.
-            img_blur = cv2.GaussianBlur(src=frame, ksize=(5, 5), sigmaX=1)
-            # APPLY Canny Blur.
-            img_th = cv2.Canny(image=img_blur, threshold1=th1, threshold2=th2)
-            # Apply Dilation & Erosion.
-            kernel = np.ones(shape=(5, 5), dtype=np.uint8)
-            frame = cv2.erode(src=cv2.dilate(src=img_th, kernel=kernel, iterations=2), kernel=kernel, iterations=1) 
+            frame = cache("canny", canny_edge, frame, threshold1=th1, threshold2=th2)
         # Contours"
         if idx>=3:
-            # Find All Contours.
-            contours, hierarchy = cv2.findContours(image=frame, mode=cv2.RETR_EXTERNAL, method=cv2.CHAIN_APPROX_SIMPLE)
-            img_binary = frame.copy()
-            frame = cv2.drawContours(image=frame, contours=contours, contourIdx=-1, color=(0, 255, 0), thickness=10)
+            img_binary = frame
+            contours, frame = cache("contours", find_contours, frame)
         # Biggest Contour
         if idx>=4:
             # Find the biggest Contour
-            biggest_contour, max_area = findBiggestContour(contours=contours, eta=eta)
+            biggest_contour, max_area, img_biggest = cache("biggest", find_biggest_contour, contours, img_binary, eta=eta)
             if max_area == 0:
+                frame = frame.copy()
                 draw_text_with_bg(img=frame, text="Could not find the closed contours.", org=(10,50))
                 idx = 4
             else:
-                # Draw the biggest contour
-                frame = img_binary
-                biggest_contour = reorder_contour(biggest_contour)
-                frame = cv2.drawContours(image=frame, contours=biggest_contour, contourIdx=-1, color=(0, 255, 0), thickness=20)
+                frame = img_biggest
         # Warp Prespective
         if idx>=5:
-            matrix = cv2.getPerspectiveTransform(src=np.float32(biggest_contour), dst=np.float32([[0, 0],[frame_width, 0], [0, frame_height],[frame_width, frame_height]]))
-            frame = cv2.warpPerspective(src=img_bgr, M=matrix, dsize=(frame_width, frame_height))
+            frame = cache("warp", warp_perspective, img_bgr, biggest_contour, dsize=(frame_width, frame_height))
         # Warp Gray
         if idx>=6:
-            frame = cv2.cvtColor(src=frame, code=cv2.COLOR_BGR2GRAY)
+            frame = cache("warp_gray", cv2.cvtColor, frame, code=cv2.COLOR_BGR2GRAY)
         # Adaptive Threshold
         if idx>=7:
-            frame = cv2.adaptiveThreshold(src=frame, maxValue=255, adaptiveMethod=1, thresholdType=1, blockSize=7, C=2)
-            frame = cv2.bitwise_not(src=frame)
-            frame = cv2.medianBlur(src=frame, ksize=3)
+            frame = cache("threshold", adaptive_threshold, frame)
         return frame
         
     project.wrap(func=func)
\ No newline at end of file
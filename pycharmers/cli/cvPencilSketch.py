@@ -4,7 +4,7 @@ import sys
 import argparse
 import numpy as np
 from ..utils import cv2ArgumentParser
-from ..opencv import cvui, cv2Project
+from ..opencv import cvui, cv2Project, StageCache
 from ..opencv.binary import binarizer_creator, OPENCV_BINARYZATIONS
 
 def cvPencilSketch(argv=sys.argv[1:]):
@@ -45,6 +45,14 @@ def cvPencilSketch(argv=sys.argv[1:]):
     median_ksizes = [5]
     morph_ksizes_x = [2]
     morph_ksizes_y = [2]
+    cache = StageCache()
+
+    def binarize(src, method, thresh, blockSize, const):
+        return binarizer_creator(method=method, thresh=thresh, blockSize=blockSize, const=const)(src=src)
+
+    def morphology(src, ksize):
+        kernel = np.ones(shape=ksize, dtype=np.uint8)
+        return cv2.erode(src=cv2.dilate(src=src, kernel=kernel, iterations=1), kernel=kernel, iterations=1)
 
     def func(frame, monitor, gui_x, **kwargs):
         cvui.text(where=monitor, x=gui_x+20, y=10,  text="[Pencil Sketch]")
@@ -67,23 +75,23 @@ def cvPencilSketch(argv=sys.argv[1:]):
         cvui.text(where=monitor, x=gui_x+80, y=690,  text="y")
         morph_ksize_y = cvui.trackbar(where=monitor, x=gui_x+85, y=680, width=70, value=morph_ksizes_y,  min=1, max=10,  labelfmt="%.1Lf", options=cvui.TRACKBAR_DISCRETE, discreteStep=1)        
 
+        # Only the stages downstream of the changed parameter are recomputed for still images.
+        frame = cache.source(frame)
         if idx>=1:
             # 1. Convert to Gray Scale.
-            frame = cv2.cvtColor(src=frame, code=cv2.COLOR_BGR2GRAY)
+            frame = cache("gray", cv2.cvtColor, frame, code=cv2.COLOR_BGR2GRAY)
         if idx>=2:
             # 2. Blur
-            frame = cv2.medianBlur(src=frame, ksize=median_ksize)
+            frame = cache("blur", cv2.medianBlur, frame, ksize=median_ksize)
         if idx>=3:
             # 3. Laplacian
-            frame = cv2.Laplacian(src=frame, ddepth=cv2.CV_8U, ksize=lap_ksize)
+            frame = cache("laplacian", cv2.Laplacian, frame, ddepth=cv2.CV_8U, ksize=lap_ksize)
         if idx>=4:
             # 4. Binarization.
-            frame = binarizer_creator(method=bi_labels[bi_idx], thresh=bi_thresh, blockSize=bi_blockSize, const=bi_const)(src=frame)
+            frame = cache("binarization", binarize, frame, method=bi_labels[bi_idx], thresh=bi_thresh, blockSize=bi_blockSize, const=bi_const)
         if idx>=5:
             # 5. Morphological Transformations.
-            kernel = np.ones(shape=(morph_ksize_y, morph_ksize_x), dtype=np.uint8)
-            frame = cv2.dilate(src=frame, kernel=kernel, iterations=1)
-            frame = cv2.erode(src=frame, kernel=kernel, iterations=1)
+            frame = cache("morphology", morphology, frame, ksize=(morph_ksize_y, morph_ksize_x))
         return frame
 
     project.wrap(func=func)
\ No newline at end of file
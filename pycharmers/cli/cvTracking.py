@@ -0,0 +1,63 @@
+#coding: utf-8
+import os
+import sys
+import json
+import argparse
+from ..opencv import basenaming, track_videos
+from ..opencv.drawing import SUPPORTED_COORD_TYPES
+from ..opencv.tracking import OPENCV_TRACKER_CREATORS
+from ..utils.json_utils import save_json
+from ..utils.print_utils import Table
+
+def cvTracking(argv=sys.argv[1:]):
+    """Track objects in many videos without any window.
+
+    Args:
+        json (str)          : Path to the json file which describes initial bounding boxes. (see Note)
+        --tracker (str)     : The name of tracker.
+        --coord-type (str)  : Coordinate types of bounding boxes.
+        --num-workers (int) : The number of processes.
+        --out-dir (str)     : Where to save the tracking logs. (default= ``~/.pycharmers/opencv/json`` )
+        --report (str)      : Where to save the report (fps and failure frames of each video.)
+        --stream (bool)     : Whether to stream the logs into the columnar records instead of json.
+
+    Note:
+        The json file is a mapping from the path to the initial bounding boxes, or a list of
+        :func:`track_video <pycharmers.opencv.tracking.track_video>` keyword arguments::
+
+            {"path/to/video1.mp4": [[120,120,40,40]], "path/to/video2.mp4": [[10,10,40,40], [60,60,40,40]]}
+            [{"path": "path/to/video1.mp4", "bboxes": [[120,120,40,40]], "frame_no": 30}]
+
+        When you run from the command line, execute as follows::
+
+        $ cv-tracking bboxes.json --tracker mil --num-workers 4 --out-dir results --report report.json
+    """
+    parser = argparse.ArgumentParser(prog="cv-tracking", description="Track objects in many videos without any window.", add_help=True)
+    parser.add_argument("json",          type=str, help="Path to the json file which describes initial bounding boxes.")
+    parser.add_argument("--tracker",     type=str, default="mil", choices=list(OPENCV_TRACKER_CREATORS.keys()), help="The name of tracker.")
+    parser.add_argument("--coord-type",  type=str, default="xywh", choices=SUPPORTED_COORD_TYPES, help="Coordinate types of bounding boxes.")
+    parser.add_argument("--num-workers", type=int, default=None, help="The number of processes.")
+    parser.add_argument("--out-dir",     type=str, default=None, help="Where to save the tracking logs.")
+    parser.add_argument("--report",      type=str, default=None, help="Where to save the report.")
+    parser.add_argument("--stream",      action="store_true", help="Whether to stream the logs into the columnar records instead of json.")
+    args = parser.parse_args(argv)
+
+    with open(args.json, mode="r") as f:
+        jobs = json.load(f)
+    if isinstance(jobs, dict):
+        jobs = [{"path": path, "bboxes": bboxes} for path,bboxes in jobs.items()]
+    if args.out_dir is not None:
+        os.makedirs(args.out_dir, exist_ok=True)
+        for job in jobs:
+            job.setdefault("out_path", os.path.join(args.out_dir, basenaming(job["path"]) + ".json"))
+
+    summaries = track_videos(jobs=jobs, num_workers=args.num_workers, tracker=args.tracker, coord_type=args.coord_type, stream=args.stream, verbose=False)
+
+    table = Table()
+    table.set_cols([basenaming(e["path"]) for e in summaries], colname="video")
+    table.set_cols([e.get("num_frames", "-") for e in summaries], colname="frames")
+    table.set_cols([f"{e['fps']:.1f}" if "fps" in e else "-" for e in summaries], colname="fps")
+    table.set_cols([sum(len(f) for f in e["failures"]) if "failures" in e else e["error"] for e in summaries], colname="failures")
+    table.show()
+    if args.report is not None:
+        save_json(obj=summaries, file=args.report)
@@ -8,7 +8,8 @@ def cvWindow(argv=sys.argv[1:]):
     """Use :meth:`cvWindow <pycharmers.opencv.windows.cvWindow>` to control frames.
 
     Args:
-        --path (str) : Path to images directory or video file.
+        --path (str)   : Path to images directory or video file.
+        --cache (bool) : Whether to decode the video only once into the on-disk cache.
 
     Note:
         When you run from the command line, execute as follows::
@@ -19,13 +20,14 @@ def cvWindow(argv=sys.argv[1:]):
     """
     parser = argparse.ArgumentParser(prog="render-template", description="Use cvWindow to control frame.", add_help=True)
     parser.add_argument("--path",  type=str, help="Path to image directory or video file.")
+    parser.add_argument("--cache", action="store_true", help="Whether to decode the video only once into the on-disk cache.")
     args = parser.parse_args(argv)
 
     path = args.path
     if path is None:
         window = RealTimeWindow()
     else:
-        window = FrameWindow(path)
+        window = FrameWindow(path, cache=args.cache)
     window.describe()
     while True:
         key = cv2.waitKey(1)
@@ -10,6 +10,7 @@ from PIL import Image
 from typing import Any,Tuple
 from nptyping import NDArray
 
+from ..opencv.video_image_handler import get_frame_metadata, mono_frame_generator
 from ..utils._colorings import toBLUE,toGREEN
 from ..utils.generic_utils import filenaming
 from ..utils.monitor_utils import ProgressMonitor
@@ -18,9 +19,10 @@ def tweetile(argv=sys.argv[1:]):
     """Divide one image into three so that you can tweet beautifully.
 
     Args:
-        path (str)      : Path to the input image.
-        --quality (int) : The image quality, on a scale from ``1`` (worst) to ``95`` (best). Defaults to ``95``.
-        --loop (int)    : How many times gif image loops. Defaults to ``0``. (infinite loop.)
+        path (str)       : Path to the input image.
+        --quality (int)  : The image quality, on a scale from ``1`` (worst) to ``95`` (best). Defaults to ``95``.
+        --loop (int)     : How many times gif image loops. Defaults to ``0``. (infinite loop.)
+        --prefetch (int) : If specified (``>0``), decode frames of gif on a background thread. (The number of buffered frames.)
 
     Note:
         When you run from the command line, execute as follows::
@@ -44,23 +46,22 @@ def tweetile(argv=sys.argv[1:]):
     parser.add_argument("path",      type=str, help="Path to the input image.")
     parser.add_argument("--quality", type=int, default=95, help="The image quality, on a scale from 1 (worst) to 95 (best). Defaults to 95.")
     parser.add_argument("--loop",    type=int, default=0, help="How many times gif image loops. Defaults to 0. (infinite loop.)")
+    parser.add_argument("--prefetch", type=int, default=0, help="If specified (>0), decode frames of gif on a background thread. (The number of buffered frames.)")
     args = parser.parse_args(argv)
     
     path = args.path
     quality = args.quality
     loop = args.loop
+    prefetch = args.prefetch
     root,ext = os.path.splitext(path)
     paths = [filenaming(f"{root}_{i}{ext}") for i in range(1,4)]
 
     if ext == ".gif":
         images_list = [[],[],[]]
-        cap = cv2.VideoCapture(path)
-        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        frame_count = get_frame_metadata(path, exact=False)["num_frames"]
         monitor = ProgressMonitor(max_iter=frame_count, barname="tweetile")
-        for i in range(1,frame_count+1):
-            is_ok,img_bgr = cap.read()
-            if (not is_ok) or (img_bgr is None):
-                break
+        frames = mono_frame_generator(path, prefetch=prefetch)
+        for i,img_bgr in enumerate(frames, start=1):
             img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
             images = divideInto3forTweet(img_rgb)
             for j in range(len(images_list)):
@@ -68,6 +69,8 @@ def tweetile(argv=sys.argv[1:]):
                 images[j].save(f"{j}/{i:>03}.png")
             monitor.report(i)
         monitor.remove()
+        if prefetch>0:
+            frames.describe()
         for images,path in zip(images_list, paths):
             images[0].save(
                 fp=path,
@@ -5,6 +5,7 @@ import cv2
 import argparse
 from PIL import Image
 
+from ..opencv.video_image_handler import get_frame_metadata, mono_frame_generator
 from ..utils._colorings import toBLUE, toGREEN
 from ..utils.argparse_utils import ListParamProcessorCreate
 from ..utils.generic_utils import filenaming
@@ -21,6 +22,7 @@ def video2gif(argv=sys.argv[1:]):
         --loop (int)     : How many times gif image loops.
         --speed (int)    : How many images will pass to get one. (The higher the number, the faster the speed).
         --twitter (bool) : Whether you want to run for tweet. ( ``resize`` will be ( ``1300`` , ``730`` ) )
+        --prefetch (int) : If specified (``>0``), decode frames on a background thread. (The number of buffered frames.)
 
     Note:
         When you run from the command line, execute as follows::
@@ -34,6 +36,7 @@ def video2gif(argv=sys.argv[1:]):
     parser.add_argument("--loop",     type=int, default=0, help="How many times gif image loops.")
     parser.add_argument("--speed",    type=int, default=5, help="How many images will pass to get one. (The higher the number, the faster the speed).")
     parser.add_argument("--twitter",  action="store_true", help="Whether you want to run for tweet. ( ``resize`` will be ( ``1300`` , ``730`` ) ).")
+    parser.add_argument("--prefetch", type=int, default=0, help="If specified (>0), decode frames on a background thread. (The number of buffered frames.)")
     args = parser.parse_args()
 
     video_path = args.video
@@ -41,13 +44,14 @@ def video2gif(argv=sys.argv[1:]):
     resize = args.resize
     loop = args.loop
     speed = args.speed
+    prefetch = args.prefetch
     
     # === Load video & Get Video Information ===
-    video   = cv2.VideoCapture(video_path)
-    width   = video.get(cv2.CAP_PROP_FRAME_WIDTH)
-    height  = video.get(cv2.CAP_PROP_FRAME_HEIGHT)
-    fps     = video.get(cv2.CAP_PROP_FPS)
-    count   = video.get(cv2.CAP_PROP_FRAME_COUNT)
+    meta    = get_frame_metadata(video_path, exact=False)
+    width   = meta["width"]
+    height  = meta["height"]
+    fps     = meta["fps"]
+    count   = meta["num_frames"]
     num_gif = int(1+(count-1)//speed)
 
     if gif_path is None:
@@ -64,27 +68,25 @@ def video2gif(argv=sys.argv[1:]):
     * Gif   Path   : {toBLUE(gif_path)}
     * Frame Width  : {toGREEN(width )} -> {toBLUE(resize[0])} [px]
     * Frame Height : {toGREEN(height)} -> {toBLUE(resize[1])} [px]
-    * Video Length : {toGREEN(f"{count/fps:.2f}")} [s]
+    * Video Length : {toGREEN(f"{meta['duration']:.2f}")} [s]
     * FPS          : {toGREEN(f"{fps:.2f}")} [n/s]
     * Frame Count  : {toGREEN(count )} [n]
     * Speed        : {toGREEN(speed)} [n/include]
     → {toGREEN(num_gif)} frames will be included in GIF.
     """))
 
-    i = 0
     images = []
-    monitor = ProgressMonitor(max_iter=count, barname="video2gif")
-    while True:
-        ret, img_bgr = video.read()
-        if img_bgr is None: 
-            break
-        elif i%speed==0:        
-            img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
-            img_pillow = Image.fromarray(img_rgb).resize(size=resize, resample=Image.LANCZOS).quantize(method=0)
-            images.append(img_pillow)
-        i+=1
-        monitor.report(i, frame_No=i)
+    monitor = ProgressMonitor(max_iter=num_gif, barname="video2gif")
+    # NOTE: Frames which are not included in GIF are skipped by seeking to the next keyframe if it is closer, and grabbed (without the color conversion) otherwise.
+    frames = mono_frame_generator(video_path, prefetch=prefetch, step=speed)
+    for i,img_bgr in enumerate(frames, start=1):
+        img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
+        img_pillow = Image.fromarray(img_rgb).resize(size=resize, resample=Image.LANCZOS).quantize(method=0)
+        images.append(img_pillow)
+        monitor.report(i, frame_No=1+(i-1)*speed)
     monitor.remove()
+    if prefetch>0:
+        frames.describe()
     images[0].save(
         fp=gif_path, 
         format="gif", 
@@ -1,6 +1,5 @@
 #coding: utf-8
 import os
-import cv2
 import sys
 import json
 import argparse
@@ -8,6 +7,7 @@ import subprocess
 import numpy as np
 from PIL import Image
 
+from ..opencv.video_image_handler import VideoWriterCreate
 from ..utils._colorings import toBLUE, toGREEN, toACCENT
 from ..utils.argparse_utils import ListParamProcessorCreate
 from ..utils.audio_utils import synthesize_audio
@@ -170,8 +170,12 @@ def video_of_lyric(argv=sys.argv[1:]):
 
     root, ext = os.path.splitext(json_path)
     video_path = f"{root}_{now_str()}.mp4"
-    fourcc = cv2.VideoWriter_fourcc('m','p','4','v')
-    out_video = cv2.VideoWriter(video_path, fourcc, fps, img_size)
+    # NOTE: If ffmpeg is available, the audio is muxed while encoding. (Otherwise, synthesized afterwards.)
+    _, out_video, video_path = VideoWriterCreate(
+        out_path=video_path, codec="mp4v", fps=fps, size=img_size, async_=True,
+        backend="ffmpeg", audio_path=audio_path,
+    )
+    is_muxed = getattr(out_video, "audio_path", None) is not None
     monitor = ProgressMonitor(max_iter=num_frames, barname="Editing")
     it = sec = 0
     while True:
@@ -198,7 +202,9 @@ def video_of_lyric(argv=sys.argv[1:]):
             break
     out_video.release()
     monitor.remove()
-    print(f"{toBLUE(video_path)} (No Sound) is created.")
-
-    if audio_path is not None:
-        synthesize_audio(video_path=video_path, audio_path=audio_path)
\ No newline at end of file
+    if is_muxed:
+        print(f"{toBLUE(video_path)} (with Sound) is created.")
+    else:
+        print(f"{toBLUE(video_path)} (No Sound) is created.")
+        if audio_path is not None:
+            synthesize_audio(video_path=video_path, audio_path=audio_path)
\ No newline at end of file
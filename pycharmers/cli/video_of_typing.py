@@ -12,7 +12,8 @@ import numpy as np
 from PIL import Image, ImageFont
 from tqdm import tqdm
 
-from ..opencv.video_image_handler import VideoWriterCreate, videocodec2ext
+from ..opencv.editing import SpriteCompositor
+from ..opencv.video_image_handler import VideoWriterCreate, get_frame_metadata, videocodec2ext
 from ..utils._colorings import toACCENT, toBLUE, toGREEN, toRED
 from ..utils.argparse_utils import ListParamProcessorCreate
 from ..utils.color_utils import hex2rgb
@@ -185,10 +186,11 @@ def video_of_typing(argv=sys.argv[1:]):
 
     if video_path is not None:
         cap = cv2.VideoCapture(video_path)
-        fps = fps or cap.get(cv2.CAP_PROP_FPS)
-        h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        n = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        meta = get_frame_metadata(video_path)
+        fps = fps or meta["fps"]
+        h = meta["height"]
+        w = meta["width"]
+        n = meta["num_frames"]
     else:
         cap = _VideoCaptureMimic(image_path)
         h, w, _ = cap.frame.shape
@@ -207,7 +209,7 @@ def video_of_typing(argv=sys.argv[1:]):
         )
         H = h
     is_ok, out_video, out_path = VideoWriterCreate(
-        out_path=out_path, codec=codec, fps=fps, size=(W, H), verbose=True
+        out_path=out_path, codec=codec, fps=fps, size=(W, H), verbose=True, async_=True
     )
     if is_ok:
         mt, ml, _, _ = assign_trbl(data=args_kwargs, name="margin")
@@ -245,12 +247,13 @@ def video_of_typing(argv=sys.argv[1:]):
             total_frame_count=n, typing_json_paths=args.typing, verbose=verbose
         )
         monitor = ProgressMonitor(max_iter=n, barname="Video of Typing")
+        # The background is filled only once, and each frame is pasted into it.
+        compositor = SpriteCompositor(size=(W, H), bg=bgBGR)
         for i in range(1, n + 1):
-            bg = np.full(shape=(H, W, 3), fill_value=bgBGR, dtype=np.uint8)
             is_ok, frame = cap.read()
             if (not is_ok) or (frame is None):
                 break
-            bg[mt : mt + h, ml : ml + w, :] = frame
+            bg = compositor.compose([(frame, (ml, mt))])
             bg_img = Image.fromarray(bg)
             bg_img = type_writer.draw_typing_texts(img=bg_img, curt_frame_count=i)
             bg_img = np.asarray(bg_img.convert("RGB"), dtype=np.uint8)
@@ -260,6 +263,7 @@ def video_of_typing(argv=sys.argv[1:]):
         cap.release()
         out_video.release()
         if verbose:
+            out_video.describe()
             print(f"Typing Video is saved at {toBLUE(out_path)}")
 
 
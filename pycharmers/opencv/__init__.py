@@ -36,7 +36,19 @@ from ._cvpath import *
 from ._cvpath import save_dir_create
 from .backsub import background_subtractor_create
 from .binary import binarizer_creator, findBiggestContour, reorder_contour
-from .cascade import cascade_creator, cascade_detection_create
+from .cascade import (
+    OPENCV_CASCADES,
+    CascadeDetector,
+    CascadeRegistry,
+    cascade_creator,
+    cascade_detect_multi_scale,
+    cascade_detection_create,
+    detect_batch,
+    expand_bboxes,
+    load_detections,
+    preload_cascades,
+    save_detections,
+)
 from .drawing import (
     convert_coords,
     cv2BLACK,
@@ -49,6 +61,7 @@ from .drawing import (
     cv2RED,
     cv2WHITE,
     cv2YELLOW,
+    draw_bboxes_array,
     draw_bboxes_create,
     draw_bboxes_ltrb,
     draw_bboxes_xywh,
@@ -56,6 +69,10 @@ from .drawing import (
     plot_cv2fontFaces,
 )
 from .editing import (
+    GridCompositor,
+    Sprite,
+    SpriteCompositor,
+    ViewportRenderer,
     cv2paste,
     hconcat_resize_min,
     pil2cv,
@@ -64,13 +81,27 @@ from .editing import (
     vconcat_resize_min,
 )
 from .morphology import morph_kernel_creator, morph_transformer_creator
-from .project import cv2Project
-from .tracking import BBoxLogger, tracker_create
+from .project import StageCache, StageProfiler, cv2Project
+from .tracking import BBoxLogger, BBoxStreamReader, track_video, track_videos, tracker_create
 from .video_image_handler import (
+    AsyncVideoWriter,
+    FFmpegVideoWriter,
+    FramePrefetcher,
+    FrameSource,
+    FrameSourceCreate,
+    FrameSourceView,
+    ImageDirFrameSource,
+    MemmapFrameSource,
+    StridedVideoCapture,
+    ThreadedVideoCapture,
     VideoCaptureCreate,
+    VideoFrameSource,
     VideoWriterCreate,
     basenaming,
     count_frame_num,
+    evict_frame_cache,
+    get_frame_metadata,
+    image_file_pattern,
     mono_frame_generator,
     multi_frame_generator_concat,
     multi_frame_generator_sepa,
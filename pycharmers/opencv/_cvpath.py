@@ -9,8 +9,8 @@ from ..sdk.github import wgit
 __all__ = [
     "PYCHARMERS_OPENCV_DIR", "PYCHARMERS_OPENCV_DATA_DIR",
     "PYCHARMERS_OPENCV_IMAGE_DIR", "SAMPLE_LENA_IMG",
-    "PYCHARMERS_OPENCV_VIDEO_DIR", "SAMPLE_VTEST_VIDEO",
-    "PYCHARMERS_OPENCV_JSON_DIR",
+    "PYCHARMERS_OPENCV_VIDEO_DIR", "SAMPLE_VTEST_VIDEO", "PYCHARMERS_OPENCV_FRAME_CACHE_DIR",
+    "PYCHARMERS_OPENCV_JSON_DIR", "PYCHARMERS_OPENCV_META_DIR",
 ]
 
 PYCHARMERS_OPENCV_DIR = os.path.join(PYCHARMERS_DIR, "opencv") # /Users/<username>/.pycharmers/opencv
@@ -36,9 +36,15 @@ _download_sample_data(
     url="https://raw.githubusercontent.com/opencv/opencv/master/samples/data/vtest.avi", 
     path=SAMPLE_VTEST_VIDEO 
 )
+# Create Decoded Frame Cache Directory.
+PYCHARMERS_OPENCV_FRAME_CACHE_DIR = os.path.join(PYCHARMERS_OPENCV_VIDEO_DIR, "cache") # /Users/<username>/.pycharmers/opencv/video/cache
+_makedirs(name=PYCHARMERS_OPENCV_FRAME_CACHE_DIR)
 # Create Image Directory.
 PYCHARMERS_OPENCV_JSON_DIR = os.path.join(PYCHARMERS_OPENCV_DIR, "json") # /Users/<username>/.pycharmers/opencv/json
 _makedirs(name=PYCHARMERS_OPENCV_JSON_DIR)
+# Create Metadata (cache) Directory.
+PYCHARMERS_OPENCV_META_DIR = os.path.join(PYCHARMERS_OPENCV_DIR, "meta") # /Users/<username>/.pycharmers/opencv/meta
+_makedirs(name=PYCHARMERS_OPENCV_META_DIR)
 
 # ===================================================== #
 #  Create a directory to save data (image, video, json) #
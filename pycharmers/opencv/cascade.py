@@ -2,19 +2,123 @@
 import os
 import cv2
 import glob
+import json
+import itertools
+import functools
+import threading
+import collections
+import collections.abc
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 from ..utils.generic_utils import handleKeyError, handleTypeError
+from ..utils._colorings import toBLUE
 from ._cvpath import PYCHARMERS_OPENCV_DATA_DIR
+from .video_image_handler import FrameSourceCreate
 
-OPENCV_CASCADES = {
-    os.path.splitext(":".join(path.split("/")[-2:]))[0] : path
-    for path in glob.glob(f"{PYCHARMERS_OPENCV_DATA_DIR}/**/*cascade*.xml")
-}
+class CascadeRegistry(collections.abc.Mapping):
+    """Identifiers of Cascades ( ``"{dirname}:{filename}"`` ) -> Paths to their XML files.
 
-def cascade_creator(cascade):
+    The directory is scanned only on first use, and loaded ``cv2.CascadeClassifier`` are kept in the per-thread cache,
+    so importing :mod:`pycharmers.opencv` costs nothing, and repeated detection setups are free.
+
+    Args:
+        root (str) : The directory where the XML files are.
+
+    Note:
+        ``detectMultiScale`` of the same instance must not be called from several threads at once, so each thread loads
+        its own classifiers. Don't pass a cached classifier to another thread. ( :func:`cascade_creator <pycharmers.opencv.cascade.cascade_creator>`
+        and :class:`CascadeDetector <pycharmers.opencv.cascade.CascadeDetector>` create new instances.)
+
+    Examples:
+        >>> from pycharmers.opencv import OPENCV_CASCADES
+        >>> "haarcascades:haarcascade_eye" in OPENCV_CASCADES
+        True
+        >>> OPENCV_CASCADES.load("haarcascades:haarcascade_eye") is OPENCV_CASCADES.load("haarcascades:haarcascade_eye")
+        True
+    """
+    def __init__(self, root):
+        self.root = root
+        self._paths = None
+        self.generation = 0
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    @property
+    def paths(self):
+        if self._paths is None:
+            with self.lock:
+                if self._paths is None:
+                    self._paths = {
+                        os.path.splitext(":".join(path.split("/")[-2:]))[0] : path
+                        for path in glob.glob(f"{self.root}/**/*cascade*.xml")
+                    }
+        return self._paths
+
+    def __getitem__(self, key):
+        return self.paths[key]
+
+    def __iter__(self):
+        return iter(self.paths)
+
+    def __len__(self):
+        return len(self.paths)
+
+    @property
+    def classifiers(self):
+        """The classifiers loaded by the current thread."""
+        if getattr(self.local, "generation", None) != self.generation:
+            self.local.classifiers = {}
+            self.local.generation = self.generation
+        return self.local.classifiers
+
+    def load(self, cascade):
+        """Load the ``cv2.CascadeClassifier`` (from the cache of the current thread.)
+
+        Args:
+            cascade (str) : The identifier of Cascades.
+
+        Returns:
+            ``cv2.CascadeClassifier``
+        """
+        classifiers = self.classifiers
+        classifier = classifiers.get(cascade)
+        if classifier is None:
+            handleKeyError(lst=list(self.keys()), cascade=cascade)
+            classifier = classifiers[cascade] = cv2.CascadeClassifier(self.paths[cascade])
+        return classifier
+
+    def preload(self, cascades=None):
+        """Load classifiers into the cache of the current thread in advance.
+
+        Args:
+            cascades (list) : The identifiers of Cascades. (Defaults to all of them.)
+
+        Returns:
+            cascades (list) : The loaded identifiers.
+        """
+        cascades = list(self.keys()) if cascades is None else list(cascades)
+        for cascade in cascades:
+            self.load(cascade)
+        return cascades
+
+    def refresh(self):
+        """Forget the scanned files and the classifiers loaded by all threads."""
+        with self.lock:
+            self._paths = None
+            self.generation += 1
+
+OPENCV_CASCADES = CascadeRegistry(root=PYCHARMERS_OPENCV_DATA_DIR)
+
+def preload_cascades(cascades=None):
+    """Load ``cv2.CascadeClassifier`` into the cache of the current thread in advance. See :meth:`CascadeRegistry.preload <pycharmers.opencv.cascade.CascadeRegistry.preload>`"""
+    return OPENCV_CASCADES.preload(cascades=cascades)
+
+def cascade_creator(cascade, cached=False):
     """Create a ``cv2.CascadeClassifier`` instance.
     Args:
         cascade (str, cv2.CascadeClassifier) : The identifier of Cascades.
+        cached (bool)                        : Whether to share the instance loaded by the current thread. (See :class:`CascadeRegistry <pycharmers.opencv.cascade.CascadeRegistry>` )
 
     Returns:
         ``cv2.CascadeClassifier``
@@ -31,15 +135,191 @@ def cascade_creator(cascade):
     """
     handleTypeError(types=[cv2.CascadeClassifier, str], cascade=cascade)
     if isinstance(cascade, str):
+        if cached:
+            return OPENCV_CASCADES.load(cascade)
         handleKeyError(lst=list(OPENCV_CASCADES.keys()), cascade=cascade)
-        cascade = cv2.CascadeClassifier(OPENCV_CASCADES.get(cascade))
+        cascade = cv2.CascadeClassifier(OPENCV_CASCADES[cascade])
     return cascade
 
-def cascade_detection_create(cascade):
+def cascade_detect_multi_scale(cascade, gray, scale=1., **kwargs):
+    """Run ``cascade.detectMultiScale`` on the downscaled ``gray`` , and map the bounding boxes back to its resolution.
+
+    Args:
+        cascade (cv2.CascadeClassifier) : A cascade classifier.
+        gray (np.ndarray)               : Gray image.
+        scale (float)                   : The scale of the image where the objects are searched for. ( ``0<scale<=1`` )
+        kwargs                          : Keyword arguments for ``detectMultiScale`` . ``minSize`` and ``maxSize`` are in the resolution of ``gray`` .
+
+    Returns:
+        bboxes (np.ndarray) : Bounding boxes ( ``x`` , ``y`` , ``w`` , ``h`` ) in the resolution of ``gray`` . shape=(N,4), dtype=int32
+    """
+    if scale != 1:
+        gray = cv2.resize(src=gray, dsize=None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        for key in ["minSize", "maxSize"]:
+            if kwargs.get(key) is not None:
+                kwargs[key] = tuple(max(1, int(round(e*scale))) for e in kwargs[key])
+    bboxes = np.asarray(cascade.detectMultiScale(gray, **kwargs), dtype=np.float64).reshape(-1, 4)
+    return np.round(bboxes/scale).astype(np.int32)
+
+class CascadeDetector():
+    """Detect objects with several ``cv2.CascadeClassifier`` at once.
+
+    The objects are searched for in the downscaled gray frame (in parallel on a thread pool when there are several cascades,
+    as ``detectMultiScale`` releases the GIL), and the bounding boxes are mapped back to the full resolution. Detection can
+    be run every ``interval`` frames only, and the bounding boxes of the frames in between are predicted from the last detections.
+
+    Args:
+        cascades (list)    : Identifiers of Cascades. (str or ``cv2.CascadeClassifier`` )
+        scale (float/list) : The scale of the frame where the objects are searched for. ( ``0<scale<=1`` , or a list of them for each cascade.)
+        parents (dict)     : Cascades which are searched for only inside the bounding boxes of another cascade. (e.g. ``{"eye": "face"}`` , by names or indexes.)
+        interval (int)     : Run detection every ``interval`` frames.
+        tracking (str)     : How to predict the bounding boxes between detections. Please choose from ``["linear", "hold"]`` .
+        num_workers (int)  : The number of threads. (Defaults to the number of cascades.)
+        code (int)         : The color conversion code to the gray frame.
+        detect_kwargs      : Keyword arguments for ``detectMultiScale`` . ``minSize`` and ``maxSize`` are in the full resolution.
+
+    Attributes:
+        names (list) : The names of cascades. The last column of the bounding boxes is the index of them.
+
+    Note:
+        ``"linear"`` matches the bounding boxes of the last two detections (by IoU) and moves them at a constant velocity.
+        ``"hold"`` keeps the last detections.
+
+    Examples:
+        >>> import cv2
+        >>> from pycharmers.opencv import CascadeDetector, SAMPLE_LENA_IMG, draw_bboxes_xywh
+        >>> face, eye = "haarcascades:haarcascade_frontalface_alt2", "haarcascades:haarcascade_eye"
+        >>> detector = CascadeDetector(cascades=[face, eye], scale=[0.25, 1.], parents={eye: face}, interval=3)
+        >>> img = cv2.imread(SAMPLE_LENA_IMG)
+        >>> for *bbox, idx in detector(img):
+        ...     draw_bboxes_xywh(frame=img, bboxes=bbox, infos=[{"text": detector.names[idx]}])
+        >>> detector.close()
+    """
+    SUPPORTED_TRACKINGS = ["linear", "hold"]
+    def __init__(self, cascades, scale=1., parents=None, interval=1, tracking="linear", num_workers=None, code=cv2.COLOR_BGR2GRAY, **detect_kwargs):
+        handleKeyError(lst=CascadeDetector.SUPPORTED_TRACKINGS, tracking=tracking)
+        if not isinstance(cascades, (list, tuple)):
+            cascades = [cascades]
+        self.names = [cascade if isinstance(cascade, str) else f"cascade{i}" for i,cascade in enumerate(cascades)]
+        # Cascades given by their names get their own instances, as they are run on the thread pool.
+        self.cascades = [cascade_creator(cascade) for cascade in cascades]
+        # The same instances given by the caller share the lock.
+        locks = {}
+        self.locks = [locks.setdefault(id(cascade), threading.Lock()) for cascade in self.cascades]
+        self.scales = list(scale) if isinstance(scale, (list, tuple)) else [scale]*len(self.cascades)
+        index = lambda key: key if isinstance(key, int) else self.names.index(key)
+        self.parents = {index(child): index(parent) for child,parent in (parents or {}).items()}
+        for child in self.parents:
+            if self.parents.get(self.parents[child]) is not None:
+                raise ValueError(f"Parents can't be nested, but the parent of '{self.names[child]}' also has the parent.")
+        self.interval = max(1, int(interval))
+        self.tracking = tracking
+        self.code = code
+        self.detect_kwargs = detect_kwargs
+        self.executor = ThreadPoolExecutor(max_workers=num_workers or len(self.cascades)) if len(self.cascades)>1 else None
+        self.reset()
+
+    def reset(self):
+        """Forget the past detections."""
+        self.frame_no = -1
+        self.history = collections.deque(maxlen=2) # (frame_no, bboxes)
+        self.velocities = np.zeros(shape=(0, 4), dtype=np.float64)
+
+    def _map(self, func, jobs):
+        if self.executor is None or len(jobs)<=1:
+            return [func(*job) for job in jobs]
+        return list(self.executor.map(lambda job: func(*job), jobs))
+
+    def _detect(self, gray):
+        # Each job runs one cascade, so that the same classifier is never used by two threads at once.
+        def detect(i, rois):
+            with self.locks[i]:
+                return np.concatenate([np.zeros(shape=(0, 4), dtype=np.int32)] + [
+                    cascade_detect_multi_scale(self.cascades[i], roi, scale=self.scales[i], **self.detect_kwargs) + np.int32([x, y, 0, 0]) for x,y,roi in rois
+                ], axis=0)
+        # 1. Cascades without parents are searched for in the whole frame.
+        roots = [i for i in range(len(self.cascades)) if i not in self.parents]
+        results = dict(zip(roots, self._map(detect, [(i, [(0, 0, gray)]) for i in roots])))
+        # 2. The others are searched for inside the bounding boxes of their parents.
+        children = list(self.parents)
+        results.update(zip(children, self._map(detect, [
+            (i, [(x, y, gray[y:y+h, x:x+w]) for x,y,w,h in results[self.parents[i]]]) for i in children
+        ])))
+        return np.concatenate([
+            np.column_stack([results[i], np.full(shape=len(results[i]), fill_value=i, dtype=np.int32)]) for i in range(len(self.cascades))
+        ], axis=0)
+
+    def _update_velocities(self):
+        (prev_no, prev), (no, curr) = self.history
+        self.velocities = np.zeros(shape=(len(curr), 4), dtype=np.float64)
+        if len(prev)==0 or len(curr)==0:
+            return
+        # IoU of all pairs. shape=(len(curr), len(prev))
+        a = curr[:, None, :4].astype(np.float64)
+        b = prev[None, :, :4].astype(np.float64)
+        iw = np.clip(np.minimum(a[...,0]+a[...,2], b[...,0]+b[...,2]) - np.maximum(a[...,0], b[...,0]), 0, None)
+        ih = np.clip(np.minimum(a[...,1]+a[...,3], b[...,1]+b[...,3]) - np.maximum(a[...,1], b[...,1]), 0, None)
+        inter = iw*ih
+        iou = inter/(a[...,2]*a[...,3] + b[...,2]*b[...,3] - inter + 1e-9)
+        iou[curr[:, None, 4] != prev[None, :, 4]] = 0
+        best = iou.argmax(axis=1)
+        matched = iou[np.arange(len(curr)), best] > 0.3
+        self.velocities[matched] = (curr[matched, :4] - prev[best[matched], :4])/(no-prev_no)
+
+    def detect(self, frame):
+        """Detect (or predict) the bounding boxes of the next frame.
+
+        Args:
+            frame (np.ndarray) : The frame. (Color frames are converted with ``code`` .)
+
+        Returns:
+            bboxes (np.ndarray) : Bounding boxes ( ``x`` , ``y`` , ``w`` , ``h`` , ``index of cascade`` ) in the full resolution. shape=(N,5), dtype=int32
+        """
+        self.frame_no += 1
+        if self.frame_no % self.interval == 0:
+            gray = frame if frame.ndim==2 else cv2.cvtColor(src=frame, code=self.code)
+            self.history.append((self.frame_no, self._detect(gray)))
+            if self.tracking == "linear" and len(self.history)==2:
+                self._update_velocities()
+            return self.history[-1][1]
+        no, bboxes = self.history[-1]
+        if self.tracking == "hold" or len(self.history)<2:
+            return bboxes
+        predicted = bboxes.copy()
+        predicted[:, :4] = np.round(bboxes[:, :4] + self.velocities*(self.frame_no-no))
+        return predicted
+
+    __call__ = detect
+
+    def close(self):
+        """Shut down the thread pool."""
+        if self.executor is not None:
+            self.executor.shutdown()
+
+def expand_bboxes(bboxes, shape, expand_ratio=0.0):
+    """Expand the bounding boxes, and convert them to ``(left, top, right, bottom)`` inside the image.
+
+    Args:
+        bboxes (np.ndarray)  : Bounding boxes ( ``x`` , ``y`` , ``w`` , ``h`` ). shape=(N,4)
+        shape (tuple)        : The shape of the image. ( ``H`` , ``W`` , ... )
+        expand_ratio (float) : Edges will be expaned to ``( (1+2*expand_ratio)*w, (1+2*expand_ratio)*h )``
+
+    Returns:
+        locations (np.ndarray) : ``(left, top, right, bottom)`` . shape=(N,4), dtype=int32
+    """
+    H,W = shape[:2]
+    x,y,w,h = np.asarray(bboxes, dtype=np.int32).reshape(-1, 4).T
+    edge_w,edge_h = (w*expand_ratio).astype(np.int32),(h*expand_ratio).astype(np.int32)
+    return np.column_stack([
+        np.maximum(x-edge_w, 0), np.maximum(y-edge_h, 0), np.minimum(x+w+edge_w, W), np.minimum(y+h+edge_h, H)
+    ]).astype(np.int32)
+
+def cascade_detection_create(cascade, scale=1.):
     """Create a ``cascade_detection`` function.
 
     Args:
         cascade (str, cv2.CascadeClassifier) : Identifier for ``cv2.CascadeClassifier``
+        scale (float)                        : The scale of the image where the objects are searched for. ( ``0<scale<=1`` )
 
     Returns:
         ``cascade_detection``
@@ -55,22 +335,154 @@ def cascade_detection_create(cascade):
     """
     cascade = cascade_creator(cascade)
     def cascade_detection(rgb, *args, expand_ratio=0.0):
-        H,W,_ = rgb.shape
-        locations = []
         gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
-        results = cascade.detectMultiScale(gray, *args)
-        for x,y,w,h in results:
-            edge_w,edge_h = int(w*expand_ratio),int(h*expand_ratio)
-            top    = max(y-edge_h,   0)
-            bottom = min(y+h+edge_h, H)
-            left   = max(x-edge_w,   0)
-            right  = min(x+w+edge_w, W)
-            locations.append((left,top,right,bottom))
-        return locations
+        results = cascade_detect_multi_scale(cascade, gray, scale, **dict(zip(["scaleFactor", "minNeighbors", "flags", "minSize", "maxSize"], args)))
+        return [tuple(location) for location in expand_bboxes(results, shape=gray.shape, expand_ratio=expand_ratio).tolist()]
     cascade_detection.__doc__ = """Detect using the specified ``cv2.CascadeClassifier``.
 
     Args:
         rgb (np.ndarray)     : RGB Image. (= ``cv2read_mp()`` )
         expand_ratio (float) : Edges will be expaned to ``( (1+2*expand_ratio)*w, (1+2*expand_ratio)*h )``
     """
-    return cascade_detection
\ No newline at end of file
+    return cascade_detection
+
+# ================= #
+#  Batch detection  #
+# ================= #
+
+_DETECT_BATCH_WORKER = {}
+
+def _init_detect_batch_worker(**kwargs):
+    # Each process runs one chunk at a time, so OpenCV's own threads only compete with the other processes.
+    cv2.setNumThreads(1)
+    _DETECT_BATCH_WORKER.update(_detect_batch_worker_create(**kwargs))
+
+def _detect_batch_worker_create(cascade, scale, expand_ratio, code, detect_kwargs):
+    return {"cascade": cascade_creator(cascade), "scale": scale, "expand_ratio": expand_ratio, "code": code, "detect_kwargs": detect_kwargs, "sources": {}}
+
+def _detect_batch_chunk(job, worker=None):
+    """Detect objects in a chunk. ``job`` is ``(path, start, end)`` of a video/directory, or a list of ``(index, frame or path)`` ."""
+    worker = worker or _DETECT_BATCH_WORKER
+    if isinstance(job, tuple):
+        path, start, end = job
+        if path not in worker["sources"]:
+            worker["sources"][path] = FrameSourceCreate(path)
+        items = zip(range(start, end), worker["sources"][path].iter_frames(range(start, end)))
+    else:
+        items = ((index, cv2.imread(str(e)) if isinstance(e, (str, os.PathLike)) else e) for index,e in job)
+    results = []
+    for index,frame in items:
+        if frame is None:
+            results.append((index, None))
+            continue
+        gray = frame if frame.ndim==2 else cv2.cvtColor(src=frame, code=worker["code"])
+        bboxes = cascade_detect_multi_scale(worker["cascade"], gray, scale=worker["scale"], **worker["detect_kwargs"])
+        results.append((index, expand_bboxes(bboxes, shape=gray.shape, expand_ratio=worker["expand_ratio"])))
+    return results
+
+def detect_batch(frames_or_paths, cascade, workers=None, chunk=32, scale=1., expand_ratio=0.0, code=cv2.COLOR_BGR2GRAY, **detect_kwargs):
+    """Detect objects in many images or long videos offline, in parallel processes.
+
+    Each process loads the classifier once, and the results are streamed back in order.
+    When ``frames_or_paths`` is a path to a video (or an image directory), each process decodes its own range of frames,
+    so only the results are sent back.
+
+    Args:
+        frames_or_paths (str/iterable) : A path to a video (or an image directory), or an iterable of frames ( ``np.ndarray`` ) or paths to images.
+        cascade (str)                  : The identifier of Cascades.
+        workers (int)                  : The number of processes. (Defaults to ``os.cpu_count()`` ) If ``workers<=1`` , frames are processed in this process.
+        chunk (int)                    : The number of frames processed in one task.
+        scale (float)                  : The scale of the frames where the objects are searched for. ( ``0<scale<=1`` )
+        expand_ratio (float)           : Edges will be expaned to ``( (1+2*expand_ratio)*w, (1+2*expand_ratio)*h )``
+        code (int)                     : The color conversion code to the gray frame.
+        detect_kwargs                  : Keyword arguments for ``detectMultiScale`` .
+
+    Yields:
+        tuple : ( ``index`` , ``locations`` ) where ``locations`` is ``(left, top, right, bottom)`` ( ``np.ndarray`` , shape=(N,4)), or ``None`` if the frame could not be read.
+
+    Examples:
+        >>> from pycharmers.opencv import detect_batch, save_detections
+        >>> results = detect_batch("path/to/video.mp4", cascade="haarcascades:haarcascade_frontalface_alt2", workers=4, scale=0.5)
+        >>> save_detections(results, out_path="faces.npz")
+    """
+    handleTypeError(types=[str], cascade=cascade)
+    worker_kwargs = dict(cascade=cascade, scale=scale, expand_ratio=expand_ratio, code=code, detect_kwargs=detect_kwargs)
+    chunk = max(1, int(chunk))
+    if isinstance(frames_or_paths, (str, os.PathLike)):
+        path = str(frames_or_paths)
+        with FrameSourceCreate(path) as source:
+            num_frames = len(source)
+        jobs = ((path, start, min(start+chunk, num_frames)) for start in range(0, num_frames, chunk))
+    else:
+        items = enumerate(frames_or_paths)
+        jobs = iter(lambda: list(itertools.islice(items, chunk)), [])
+    workers = workers or os.cpu_count() or 1
+    if workers<=1:
+        worker = _detect_batch_worker_create(**worker_kwargs)
+        try:
+            for job in jobs:
+                yield from _detect_batch_chunk(job, worker=worker)
+        finally:
+            for source in worker["sources"].values():
+                source.release()
+        return
+    # Keep a few chunks per process in flight, so that the frames are not all loaded at once.
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=functools.partial(_init_detect_batch_worker, **worker_kwargs))
+    pending = collections.deque()
+    try:
+        for job in jobs:
+            pending.append(executor.submit(_detect_batch_chunk, job))
+            if len(pending) >= 2*workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+def save_detections(results, out_path):
+    """Save the results of :func:`detect_batch` .
+
+    Args:
+        results (iterable) : ( ``index`` , ``locations`` ) pairs.
+        out_path (str)     : ``*.jsonl`` (one line per frame, written while streaming), or ``*.npz`` ( ``index`` , ``counts`` (``-1`` if the frame could not be read), and all ``locations`` concatenated.)
+
+    Returns:
+        out_path (str) : The path to the saved file.
+    """
+    ext = os.path.splitext(out_path)[-1].lower()
+    handleKeyError(lst=[".jsonl", ".npz"], ext=ext)
+    if ext == ".jsonl":
+        with open(out_path, mode="w") as f:
+            for index,locations in results:
+                f.write(json.dumps({"index": int(index), "locations": None if locations is None else locations.tolist()}) + "\n")
+    else:
+        indexes, counts, all_locations = [],[],[np.zeros(shape=(0, 4), dtype=np.int32)]
+        for index,locations in results:
+            indexes.append(index)
+            counts.append(-1 if locations is None else len(locations))
+            if locations is not None:
+                all_locations.append(locations)
+        np.savez_compressed(out_path, index=np.asarray(indexes, dtype=np.int64), counts=np.asarray(counts, dtype=np.int32), locations=np.concatenate(all_locations, axis=0))
+    print(f"Detections were saved at {toBLUE(out_path)}")
+    return out_path
+
+def load_detections(path):
+    """Load the results saved by :func:`save_detections` .
+
+    Args:
+        path (str) : ``*.jsonl`` or ``*.npz``
+
+    Returns:
+        results (list) : ( ``index`` , ``locations`` ) pairs.
+    """
+    ext = os.path.splitext(path)[-1].lower()
+    handleKeyError(lst=[".jsonl", ".npz"], ext=ext)
+    if ext == ".jsonl":
+        with open(path) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        return [(record["index"], None if record["locations"] is None else np.asarray(record["locations"], dtype=np.int32).reshape(-1, 4)) for record in records]
+    with np.load(path) as data:
+        offsets = np.concatenate([[0], np.cumsum(np.maximum(data["counts"], 0))])
+        return [(int(index), None if count<0 else data["locations"][start:start+count]) for index,count,start in zip(data["index"], data["counts"], offsets)]
@@ -12,6 +12,7 @@ Licensed under the `MIT license <https://github.com/Dovyski/cvui/blob/master/LIC
 import sys
 import cv2
 import numpy as np
+from collections import OrderedDict
 
 from ..utils.generic_utils import now_str, handleTypeError, NoneType
 from ..utils.color_utils import generateLightDarks, choose_text_color
@@ -304,6 +305,52 @@ def iarea(x, y, width, height):
 	"""
 	return __internal.iarea(x, y, width, height)
 
+def cache(enabled=None, maxsize=None):
+	"""Configure the cache of rendered widgets, and get its statistics.
+
+	``text``, ``button``, ``checkbox``, ``radiobox`` and ``trackbar`` keep their rendered pixels keyed by
+	(widget type, geometry, label, state, value). When the key and the pixels under the widget are the same as
+	the cached ones, the cached pixels are copied instead of drawing again. Mouse interactions are handled as before.
+
+	The cache is disabled by default. Each cached call copies and compares the pixels under the widget, so it only pays off
+	when the background is redrawn identically every frame (ex. a static GUI panel.) Widgets drawn over a live video never hit,
+	and are just slower with the cache.
+
+	Args:
+		enabled (bool) : Whether to use the cache. (If ``None``, keep the current setting.) Defaults to ``False`` .
+		maxsize (int)  : The maximum number of cached widgets. (If ``None``, keep the current setting.)
+
+	Returns:
+		dict : ``enabled``, ``maxsize``, ``size``, ``hits`` and ``misses``.
+
+	Examples:
+		>>> import numpy as np
+		>>> from pycharmers.opencv import cvui
+		>>> frame = np.zeros(shape=(100, 200, 3), dtype=np.uint8)
+		>>> _ = cvui.cache(enabled=True)
+		>>> for _ in range(3):
+		...     frame[:] = 49
+		...     cvui.text(frame, 10, 10, "Hello")
+		>>> cvui.cache()
+		{'enabled': True, 'maxsize': 256, 'size': 1, 'hits': 2, 'misses': 1}
+		>>> cvui.cache(enabled=False)
+		{'enabled': False, 'maxsize': 256, 'size': 0, 'hits': 2, 'misses': 1}
+	"""
+	if enabled is not None:
+		__internal.renderCacheEnabled = enabled
+		if not enabled:
+			__internal.renderCache.clear()
+	if maxsize is not None:
+		__internal.renderCacheMaxsize = maxsize
+		while len(__internal.renderCache) > maxsize:
+			__internal.renderCache.popitem(last=False)
+	return {
+		"enabled" : __internal.renderCacheEnabled,
+		"maxsize" : __internal.renderCacheMaxsize,
+		"size"    : len(__internal.renderCache),
+		**__internal.renderCacheStats,
+	}
+
 def space(value=5):
 	"""
 	Add an arbitrary amount of space between components within a ``begin*()`` and ``end*()`` block.
@@ -996,7 +1043,7 @@ def rect(where=None, x=0, y=0, width=160, height=120, borderColor=0xff0000, fill
 		width (int)         : Width of the rectangle.
 		height (int)        : Height of the rectangle.
 		borderColor (uint)  : Color of rectangle's border in the format ``0xRRGGBB``, e.g. ``0xff0000`` for red.
-		fillingColor (uint) : Color of rectangle's filling in the format `0xAARRGGBB`, e.g. `0x00ff0000` for red, `0xff000000` for transparent filling.
+		fillingColor (uint) : Color of rectangle's filling in the format `0xAARRGGBB`, e.g. `0x00ff0000` for red, `0x80ff0000` for translucent red, `0xff000000` for transparent filling.
 	
 	Examples:
 		>>> import cv2
@@ -1096,7 +1143,7 @@ def sparkline(where=None, x=0, y=0, values=[], width=160, height=120, color=0x00
 		where (np.ndarray) : image/frame where the component should be rendered.
 		x (int)            : Position X where the component should be placed.
 		y (int)            : Position Y where the component should be placed.
-		values ([number])  : Array or List containing the numeric values to be used in the sparkline.
+		values ([number])  : Array or List containing the numeric values to be used in the sparkline. ( :class:`SparklineSeries <pycharmers.opencv.cvui.SparklineSeries>` for streaming values.)
 		width (int)        : Width of the rectangle.
 		height (int)       : Height of the rectangle.
 		color (uint)       : Color of sparkline in the format ``0xRRGGBB``, e.g. ``0xff0000`` for red.
@@ -1495,6 +1542,67 @@ class Size(Rect):
 		self.width = width
 		self.height = height
 
+class SparklineSeries:
+	"""Ring buffer of the latest ``maxlen`` values for :meth:`sparkline <pycharmers.opencv.cvui.sparkline>` .
+
+	Each value is written twice ( ``i`` and ``i+maxlen`` ) in a ``2*maxlen`` array, so that the latest values are always
+	a contiguous view ( :attr:`values` ) without copying or reordering.
+
+	Args:
+		maxlen (int) : The maximum number of values.
+		dtype (type) : Data type of values.
+
+	Examples:
+		>>> import time
+		>>> from pycharmers.opencv import cvui
+		>>> fps = cvui.SparklineSeries(maxlen=5000)
+		>>> start = time.perf_counter()
+		>>> while (True):
+		... 	frame[:] = (49, 52, 49)
+		... 	now = time.perf_counter()
+		... 	fps.append(1/(now-start)); start = now
+		... 	cvui.sparkline(frame, 0, 0, fps, 800, 100)
+	"""
+	def __init__(self, maxlen=1000, dtype=np.float64):
+		self.maxlen = maxlen
+		self.buffer = np.zeros(shape=2*maxlen, dtype=dtype)
+		self.head = 0
+		self.size = 0
+
+	def __len__(self):
+		return self.size
+
+	def __iter__(self):
+		return iter(self.values)
+
+	def __array__(self, dtype=None):
+		return self.values if dtype is None else self.values.astype(dtype)
+
+	@property
+	def values(self):
+		"""The latest values (oldest first.) This is a read-only view of the buffer."""
+		start = self.head - self.size
+		view = self.buffer[self.maxlen+start:self.maxlen+self.head] if start<0 else self.buffer[start:self.head]
+		view.flags.writeable = False
+		return view
+
+	def append(self, value):
+		"""Append a value (and drop the oldest one if full.)"""
+		self.buffer[self.head] = self.buffer[self.head+self.maxlen] = value
+		self.head = (self.head+1) % self.maxlen
+		self.size = min(self.size+1, self.maxlen)
+
+	def extend(self, values):
+		"""Append values."""
+		values = np.asarray(values).ravel()[-self.maxlen:]
+		indices = (self.head + np.arange(len(values))) % self.maxlen
+		self.buffer[indices] = self.buffer[indices+self.maxlen] = values
+		self.head = (self.head+len(values)) % self.maxlen
+		self.size = min(self.size+len(values), self.maxlen)
+
+	def clear(self):
+		self.head = self.size = 0
+
 class Block:
 	"""Describe a block structure used by cvui to handle ``begin*()`` and ``end*()`` calls.
 	
@@ -1625,6 +1733,7 @@ class Internal:
 		screen (Block)            : Block structure.
 		stack (list)              : Block stack.
 		trackbarMarginX (int)     : X-axis Margin of trackbar.
+		renderCache (OrderedDict) : Rendered widgets. (see :meth:`cachedRender <pycharmers.opencv.cvui.Internal.cachedRender>` )
 		_render (Render)          : contains all rendering methods. ( ``_render._internal = self`` )
 	"""
 	def __init__(self):
@@ -1638,6 +1747,10 @@ class Internal:
 		self.screen = Block()
 		self.stack = []
 		self.trackbarMarginX = 14
+		self.renderCache = OrderedDict()
+		self.renderCacheEnabled = False
+		self.renderCacheMaxsize = 256
+		self.renderCacheStats = {"hits": 0, "misses": 0}
 
 		self._render = Render()
 		self._render._internal = self
@@ -1844,6 +1957,50 @@ class Internal:
 			self.error(1, 'Mismatch in the number of begin*()/end*() calls. You are calling one more than the other.')
 		return self.stack.pop()
 
+	def cachedRender(self, block, key, rect, render, pad=8):
+		"""Render a widget, or copy its pixels from the cache.
+
+		The pixels in ``rect`` (+ ``pad``) before and after ``render()`` are cached with ``key``. The next time,
+		if the key is the same and the pixels in ``rect`` are the same as the ones before rendering, the pixels
+		after rendering are copied instead of calling ``render()`` .
+
+		Args:
+			block (Block)       : A block structure.
+			key (tuple)         : Everything that the rendered pixels depend on (except for the pixels under the widget.)
+			rect (Rect)         : The area where the widget is rendered.
+			render (function)   : Render the widget to ``block.where`` .
+			pad (int)           : Margin for the pixels rendered outside ``rect`` (ex. anti-aliasing)
+		"""
+		where = block.where
+		if not self.renderCacheEnabled or where is None:
+			render()
+			return
+		height, width = where.shape[:2]
+		x0 = max(int(rect.x)-pad, 0); x1 = min(int(rect.x+rect.width)+pad+1, width)
+		y0 = max(int(rect.y)-pad, 0); y1 = min(int(rect.y+rect.height)+pad+1, height)
+		if x0>=x1 or y0>=y1:
+			render()
+			return
+		roi = where[y0:y1, x0:x1]
+		key = key + (rect.x, rect.y, rect.width, rect.height, x0, y0, x1, y1, where.shape[2:], where.dtype.str)
+		try:
+			cached = self.renderCache.get(key)
+		except TypeError:
+			# Unhashable arguments. (ex. ``color`` is a list.)
+			render()
+			return
+		if cached is not None and np.array_equal(cached[0], roi):
+			roi[:] = cached[1]
+			self.renderCache.move_to_end(key)
+			self.renderCacheStats["hits"] += 1
+			return
+		before = roi.copy()
+		render()
+		self.renderCache[key] = (before, roi.copy())
+		self.renderCacheStats["misses"] += 1
+		while len(self.renderCache) > self.renderCacheMaxsize:
+			self.renderCache.popitem(last=False)
+
 	def createLabel(self, label):
 		"""Create a Label object.
 
@@ -1882,12 +2039,17 @@ class Internal:
 			lineType (int)      : Line type. (default= ``cv2.LINE_8`` )
 			updateLayout (bool) : Whether updates layot or not.
 		"""
-		(text_width,text_height), _ = cv2.getTextSize(text=text, fontFace=fontFace, fontScale=fontScale, thickness=thickness)
+		(text_width,text_height), baseline = cv2.getTextSize(text=text, fontFace=fontFace, fontScale=fontScale, thickness=thickness)
 
 		text_size = Size(text_width, text_height)
 		aPos = Point(x, y + text_size.height)
 
-		self._render.text(block, text, aPos, fontFace=fontFace, fontScale=fontScale, color=color, thickness=thickness, lineType=lineType)
+		self.cachedRender(
+			block=block,
+			key=("text", text, fontFace, fontScale, color, thickness, lineType),
+			rect=Rect(x, y, text_width, text_height+baseline),
+			render=lambda: self._render.text(block, text, aPos, fontFace=fontFace, fontScale=fontScale, color=color, thickness=thickness, lineType=lineType),
+		)
 
 		if updateLayout:
 			# Add an extra pixel to the height to overcome OpenCV font size problems.
@@ -1933,17 +2095,16 @@ class Internal:
 		aHitArea = Rect(x, y, aRect.width+text_size.width+6, aRect.height)
 		mouseIsOver = aHitArea.contains(mouse.position)
 
-		if mouseIsOver:
-			self._render.checkbox(block=block, state=OVER, shape=aRect)
-			if mouse.anyButton.justReleased:
-				state[0] = not state[0]
-		else:
-			self._render.checkbox(block=block, state=OUT, shape=aRect)
+		if mouseIsOver and mouse.anyButton.justReleased:
+			state[0] = not state[0]
 
-		self._render.checkboxLabel(block, aRect, label, text_size, color)
+		def render():
+			self._render.checkbox(block=block, state=OVER if mouseIsOver else OUT, shape=aRect)
+			self._render.checkboxLabel(block, aRect, label, text_size, color)
+			if state[0]:
+				self._render.checkboxCheck(block=block, shape=aRect)
 
-		if state[0]:
-			self._render.checkboxCheck(block=block, shape=aRect)
+		self.cachedRender(block=block, key=("checkbox", label, color, mouseIsOver, bool(state[0])), rect=aHitArea, render=render)
 
 		# Update the layout flow
 		size = Size(aHitArea.width, aHitArea.height)
@@ -1960,22 +2121,20 @@ class Internal:
 		mouse = self.getContext().mouse
 		
 		crt_state = -1
+		over = -1
 		width = 0
+		text_sizes = []
 		for i,label in enumerate(labels):        
-			aRect = Rect(x, y+i*20, 15, 15)
 			(text_width,text_height), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.4, 1)
 			text_size = Rect(0, 0, text_width, text_height)
-			aHitArea = Rect(x, y+i*20, aRect.width+text_size.width+6, aRect.height)
-			if crt_state==-1 and aHitArea.contains(mouse.position):
-				self._render.checkbox(block, OVER, aRect)
+			aHitArea = Rect(x, y+i*20, 15+text_size.width+6, 15)
+			if over==-1 and aHitArea.contains(mouse.position):
+				over = i
 				if mouse.anyButton.justReleased:
 				# if mouse.anyButton.pressed:
 					crt_state = i
 					states[crt_state] = True
-			else:
-				self._render.checkbox(block, OUT, aRect)
-
-			self._render.checkboxLabel(block, aRect, label, text_size, color)
+			text_sizes.append(text_size)
 			width = max(aHitArea.width, width)
 		height = (aHitArea.y - y) + aHitArea.height
 			
@@ -1984,11 +2143,18 @@ class Internal:
 			for i in range(len(states)):
 				if i!=crt_state:
 					states[i] = False
-					
-		for i,state in enumerate(states):
-			if state:
+
+		def render():
+			for i,(label,text_size) in enumerate(zip(labels, text_sizes)):
 				aRect = Rect(x, y+i*20, 15, 15)
-				self._render.checkboxCheck(block, aRect)
+				self._render.checkbox(block, OVER if i==over else OUT, aRect)
+				self._render.checkboxLabel(block, aRect, label, text_size, color)
+			for i,state in enumerate(states):
+				if state:
+					aRect = Rect(x, y+i*20, 15, 15)
+					self._render.checkboxCheck(block, aRect)
+
+		self.cachedRender(block=block, key=("radiobox", tuple(labels), color, over, tuple(states)), rect=Rect(x, y, width, height), render=render)
 
 		# Update the layout flow
 		self.updateLayoutFlow(block, Size(width, height))
@@ -2028,7 +2194,15 @@ class Internal:
 		aValue = value[0]
 
 		state = OVER if mouseIsOver else OUT, aContentArea
-		self._render.trackbar(block=block, state=state, shape=aContentArea, value=value[0], params=params)
+		# Labels are centered at the edges of the working area, so they can stick out of the content area.
+		aLabelWidth = max([cv2.getTextSize(params.labelfmt % v, cv2.FONT_HERSHEY_SIMPLEX, 0.3, 1)[0][0] for v in (params.min, params.max, aValue)])
+		self.cachedRender(
+			block=block,
+			key=("trackbar", width, aValue, params.min, params.max, params.step, params.segments, params.labelfmt, params.options, mouseIsOver),
+			rect=aContentArea,
+			render=lambda: self._render.trackbar(block=block, state=state, shape=aContentArea, value=aValue, params=params),
+			pad=max(8, aLabelWidth//2 - self.trackbarMarginX + 8),
+		)
 
 		if mouse.anyButton.pressed and mouseIsOver:
 			value[0] = self.trackbarXPixelToValue(params=params, bounding=aContentArea, pixelX=mouse.position.x)
@@ -2170,8 +2344,13 @@ class Internal:
 		# Render the button according to mouse interaction, e.g. OVER, DOWN, OUT.
 		aStatus = self.iarea(x, y, aRect.width, aRect.height)
 		button_bgr = self.hex2bgr(color)
-		self._render.button(block, aStatus, aRect, label, color=button_bgr)
-		self._render.buttonLabel(block, aStatus, aRect, label, text_size, color=choose_text_color(color=button_bgr, max_val=255, is_bgr=True))
+
+		def render():
+			# NOTE: ``self._render.button`` shrinks ``aRect`` , and the label is centered in the shrinked one.
+			self._render.button(block, aStatus, aRect, label, color=button_bgr)
+			self._render.buttonLabel(block, aStatus, aRect, label, text_size, color=choose_text_color(color=button_bgr, max_val=255, is_bgr=True))
+
+		self.cachedRender(block=block, key=("button", width, height, label, button_bgr, aStatus), rect=Rect(x, y, width, height), render=render)
 
 		# Update the layout flow according to button size
 		# if we were told to update.
@@ -2286,7 +2465,7 @@ class Internal:
 			width (int)         : Width of the rectangle.
 			height (int)        : Height of the rectangle.
 			borderColor (uint)  : Color of rectangle's border in the format ``0xRRGGBB``, e.g. ``0xff0000`` for red.
-			fillingColor (uint) : Color of rectangle's filling in the format `0xAARRGGBB`, e.g. `0x00ff0000` for red, `0xff000000` for transparent filling.
+			fillingColor (uint) : Color of rectangle's filling in the format `0xAARRGGBB`, e.g. `0x00ff0000` for red, `0x80ff0000` for translucent red, `0xff000000` for transparent filling.
 		"""
 		aAnchor = Point(x, y);
 		aRect = Rect(x, y, width, height);
@@ -2432,22 +2611,13 @@ class Internal:
 		"""Find the min and max values of a vector.
 
 		Args:
-			values (list) : Array shaped vectors.
+			values (list) : Array shaped vectors. (``list`` , ``np.ndarray`` , or ``SparklineSeries`` )
 
 		Returns:
 			tuple : the min and max values of a vector
 		"""
-		aMin = values[0]
-		aMax = values[0]
-
-		for aValue in values:
-			if aValue < aMin:
-				aMin = aValue
-
-			if aValue > aMax:
-				aMax = aValue
-
-		return (aMin, aMax)
+		values = np.asarray(values)
+		return (values.min(), values.max())
 
 class Render:
 	"""Class that contains all rendering methods."""
@@ -2459,6 +2629,25 @@ class Render:
 
 		cv2.rectangle(where, aStartPoint, aEndPoint, color, thickness, LineType)
 
+	def blend(self, where, shape, color, alpha):
+		"""Fill the ``shape`` with ``color`` translucently. Only the pixels in ``shape`` are blended (in place.)
+
+		Args:
+			where (np.ndarray) : Image.
+			shape (Rect)       : The area to be filled. (Same as ``self.rectangle(..., thickness=CVUI_FILLED)`` )
+			color (tuple)      : BGR color.
+			alpha (float)      : Opacity of ``color`` .
+		"""
+		height, width = where.shape[:2]
+		x0 = max(int(shape.x), 0); x1 = min(int(shape.x + shape.width) + 1, width)
+		y0 = max(int(shape.y), 0); y1 = min(int(shape.y + shape.height) + 1, height)
+		if x0>=x1 or y0>=y1:
+			return
+		roi = where[y0:y1, x0:x1]
+		fill = np.empty_like(roi)
+		fill[:] = color[:roi.shape[2]] if roi.ndim==3 else color[0]
+		cv2.addWeighted(src1=fill, alpha=alpha, src2=roi, beta=1.0 - alpha, gamma=0.0, dst=roi)
+
 	def text(self, block, text, position, fontFace=cv2.FONT_HERSHEY_SIMPLEX, fontScale=0.4, color=0xCECECE, thickness=1, lineType=cv2.LINE_8):
 		aPosition = (int(position.x), int(position.y))
 		cv2.putText(img=block.where, text=text, org=aPosition, fontFace=fontFace, fontScale=fontScale, color=self._internal.hex2bgr(color), thickness=thickness, lineType=lineType)
@@ -2674,7 +2863,6 @@ class Render:
 	def window(self, block, titleBar, content, title):
 		aTransparecy = False
 		aAlpha = 0.3
-		aOverlay = block.where.copy()
 
 		# Render borders in the title bar
 		self.rectangle(block.where, titleBar, (0x4A, 0x4A, 0x4A));
@@ -2695,12 +2883,10 @@ class Render:
 		content.y += 1
 		content.width -= 2
 		content.height -= 2
-		self.rectangle(aOverlay, content, (0x31, 0x31, 0x31), CVUI_FILLED)
 
 		if aTransparecy:
-			np.copyto(aOverlay, block.where) # block.where.copyTo(aOverlay);
-			self.rectangle(aOverlay, content, (0x31, 0x31, 0x31), CVUI_FILLED)
-			cv2.addWeighted(aOverlay, aAlpha, block.where, 1.0 - aAlpha, 0.0, block.where)
+			# Blend only the body, instead of the whole canvas.
+			self.blend(block.where, content, (0x31, 0x31, 0x31), aAlpha)
 		else:
 			self.rectangle(block.where, content, (0x31, 0x31, 0x31), CVUI_FILLED)
 
@@ -2711,31 +2897,29 @@ class Render:
 		aHasFilling = aFillingColor[3] != 0xff
 
 		if aHasFilling:
-			self.rectangle(block.where, position, aFillingColor, CVUI_FILLED, CVUI_ANTIALISED)
+			if aFillingColor[3] == 0:
+				self.rectangle(block.where, position, aFillingColor, CVUI_FILLED, CVUI_ANTIALISED)
+			else:
+				# 0xAA of 0xAARRGGBB is the transparency.
+				self.blend(block.where, position, aFillingColor, 1.0 - aFillingColor[3]/0xff)
 
 		# Render the border
 		self.rectangle(block.where, position, aBorderColor)
 
 	def sparkline(self, block, values, rect, min, max, color):
+		values = np.asarray(values, dtype=np.float64)
 		size = len(values)
-		i = 0
-		aScale = max - min
+		# A flat series is drawn at the bottom.
+		aScale = (max - min) or 1.
 		aGap = float(rect.width) / size
-		aPosX = rect.x
-
-		while i <= size - 2:
-			x = aPosX;
-			y = (values[i] - min) / aScale * -(rect.height - 5) + rect.y + rect.height - 5
-			aPoint1 = Point(x, y)
-
-			x = aPosX + aGap
-			y = (values[i + 1] - min) / aScale * -(rect.height - 5) + rect.y + rect.height - 5
-			aPoint2 = Point(x, y)
-
-			cv2.line(block.where, (int(aPoint1.x), int(aPoint1.y)), (int(aPoint2.x), int(aPoint2.y)), self._internal.hex2bgr(color))
-			aPosX += aGap
 
-			i += 1
+		aPoints = np.empty(shape=(size, 2), dtype=np.float64)
+		# NOTE: Accumulate the gaps (instead of ``aGap*i`` ) to put the vertices at the same pixels as ``cv2.line`` for each segment did.
+		aPoints[0,0] = rect.x
+		aPoints[1:,0] = aGap
+		np.cumsum(aPoints[:,0], out=aPoints[:,0])
+		aPoints[:,1] = (values - min) / aScale * -(rect.height - 5) + rect.y + rect.height - 5
+		cv2.polylines(block.where, [aPoints.astype(np.int32)], isClosed=False, color=self._internal.hex2bgr(color))
 
 # Access points to internal global namespaces.
 __internal = Internal()
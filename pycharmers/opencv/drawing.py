@@ -30,17 +30,28 @@ def convert_coords(bbox, to_type, from_type=""):
                 [xywh]                   [ltrb]
 
     Args:
-        bbox (tuple)  : Bounding Box coordinates.
-        to_type (str) : coordinate type.
+        bbox (tuple/np.ndarray) : Bounding Box coordinates. ``np.ndarray`` with shape=(N,4) are converted at once.
+        to_type (str)           : coordinate type.
 
     Examples:
+        >>> import numpy as np
         >>> from pycharmers.opencv import convert_coords
         >>> xywh = (120,250,60,80)
         >>> ltrb = convert_coords(bbox=xywh, to_type="ltrb")
         >>> xywh = convert_coords(bbox=ltrb, to_type="xywh")
+        >>> convert_coords(bbox=np.array([[120,250,60,80], [10,20,30,40]]), to_type="ltrb", from_type="xywh")
+        array([[120, 250, 180, 330],
+               [ 10,  20,  40,  60]])
     """
     handleKeyError(lst=SUPPORTED_COORD_TYPES, to_type=to_type)
     if from_type!=to_type:
+        if isinstance(bbox, np.ndarray):
+            bbox = bbox.copy()
+            if to_type == "xywh":
+                bbox[..., 2:4] -= bbox[..., 0:2]
+            elif to_type == "ltrb":
+                bbox[..., 2:4] += bbox[..., 0:2]
+            return bbox
         a,b,c,d = bbox
         if to_type == "xywh":
             a,b,c,d = (a,b,c-a,d-b)
@@ -49,29 +60,94 @@ def convert_coords(bbox, to_type, from_type=""):
         bbox = (a,b,c,d)
     return bbox
 
+TEXT_SIZE_CACHE = {}
+
+def cached_text_size(text, fontFace, fontScale, thickness):
+    """``cv2.getTextSize`` whose results are cached. (Labels of bounding boxes are drawn every frame.)
+
+    Returns:
+        tuple : ( ``(width, height)`` , ``baseline`` )
+    """
+    key = (text, fontFace, fontScale, thickness)
+    size = TEXT_SIZE_CACHE.get(key)
+    if size is None:
+        if len(TEXT_SIZE_CACHE) >= 4096:
+            TEXT_SIZE_CACHE.clear()
+        size = TEXT_SIZE_CACHE[key] = cv2.getTextSize(text=text, fontFace=fontFace, fontScale=fontScale, thickness=thickness)
+    return size
+
+def draw_bboxes_array(frame, bboxes, classes=None, colors=[(0,255,0)], labels=None, thickness=3, coord_type="xywh"):
+    """Draw many bounding boxes at once.
+
+    Bounding boxes of the same class are drawn with one ``cv2.polylines`` call (the same pixels as ``cv2.rectangle`` ), except for filled ones ( ``thickness<0`` ),
+    then labels are drawn over them with cached text sizes.
+
+    Args:
+        frame (ndarray)       : Image. shape=(H,W,ch)
+        bboxes (ndarray)      : Bounding boxes. shape=(N,4)
+        classes (ndarray)     : The index of ``colors`` , ``labels`` (and ``thickness`` ) for each bounding box. shape=(N,) (Defaults to ``0`` for all.)
+        colors (list)         : Color of each class.
+        labels (list)         : Label of each class. (Empty labels are not drawn.)
+        thickness (int/list)  : Thickness of rectangles (of each class.) Negative values (e.g. ``cv2.FILLED`` ) fill them.
+        coord_type (str)      : The coordinate type of ``bboxes`` . ( ``"xywh"`` or ``"ltrb"`` )
+
+    Returns:
+        frame (ndarray) : ``frame`` with bounding boxes.
+
+    Examples:
+        >>> import numpy as np
+        >>> from pycharmers.opencv import draw_bboxes_array, cv2RED, cv2BLUE
+        >>> img = np.zeros(shape=(480, 640, 3), dtype=np.uint8)
+        >>> bboxes = np.random.randint(0, 400, size=(300, 4))
+        >>> draw_bboxes_array(img, bboxes=bboxes, classes=np.arange(300)%2, colors=[cv2RED, cv2BLUE], labels=["person", "car"])
+    """
+    handleKeyError(lst=SUPPORTED_COORD_TYPES, coord_type=coord_type)
+    ltrb = convert_coords(np.asarray(bboxes).reshape(-1, 4).astype(np.int32), to_type="ltrb", from_type=coord_type)
+    if len(ltrb)==0:
+        return frame
+    classes = np.zeros(shape=len(ltrb), dtype=np.int32) if classes is None else np.asarray(classes).reshape(-1)
+    colors = [tuple(np.asarray(color).tolist()) for color in colors]
+    thicknesses = thickness if isinstance(thickness, (list, tuple, np.ndarray)) else [thickness]*len(colors)
+    # (l,t), (r,t), (r,b), (l,b)
+    corners = ltrb[:, [0,1, 2,1, 2,3, 0,3]].reshape(-1, 4, 2)
+    for k in np.unique(classes):
+        if thicknesses[k] < 0:
+            # Filled boxes. (``cv2.fillPoly`` with several polygons leaves holes where they overlap.)
+            for l,t,r,b in ltrb[classes==k].tolist():
+                cv2.rectangle(img=frame, pt1=(l,t), pt2=(r,b), color=colors[k], thickness=thicknesses[k])
+        else:
+            cv2.polylines(img=frame, pts=list(corners[classes==k]), isClosed=True, color=colors[k], thickness=thicknesses[k])
+    if labels is not None:
+        labeled = np.isin(classes, [k for k,label in enumerate(labels) if len(label)>0])
+        for (l,t,_,_),k in zip(ltrb[labeled].tolist(), classes[labeled].tolist()):
+            draw_text_with_bg(img=frame, text=labels[k], org=(l,t-10), offset=(10, 10), fontFace=cv2.FONT_HERSHEY_SIMPLEX, fontScale=0.5, thickness=2)
+    return frame
+
 def draw_bboxes_create(coord_type="xywh"):
     handleKeyError(lst=SUPPORTED_COORD_TYPES, coord_type=coord_type)
     def draw_bboxes(frame, bboxes, infos=None):
-        if not hasattr(bboxes[0], "__iter__"):
+        if isinstance(bboxes, np.ndarray) and bboxes.ndim==1:
+            bboxes = bboxes[None]
+        elif not isinstance(bboxes, np.ndarray) and not hasattr(bboxes[0], "__iter__"):
             bboxes = [bboxes]
         if infos is None:
             infos = [{} for _ in range(len(bboxes))]
-        for bbox,info in zip(bboxes, infos):
-            color = info.pop("color", (0,255,0))
-            text  = info.pop("text", "")
-            rectangle_thickness = info.pop("rectangle_thickness", 3)
-            l,t,r,b = convert_coords(bbox, to_type="ltrb", from_type=coord_type)
-            cv2.rectangle(img=frame, pt1=(l, t), pt2=(r, b), color=color, thickness=rectangle_thickness)
-            if len(text)>0:
-                draw_text_with_bg(img=frame, text=text, org=(l,t-10), offset=(10, 10), fontFace=cv2.FONT_HERSHEY_SIMPLEX, fontScale=0.5, thickness=2)
-        return frame
+        num = min(len(bboxes), len(infos))
+        # Bounding boxes with the same style are drawn at once.
+        styles = {}
+        classes = [styles.setdefault((tuple(info.get("color", (0,255,0))), info.get("text", ""), info.get("rectangle_thickness", 3)), len(styles)) for info in infos[:num]]
+        colors, labels, thickness = zip(*styles) if len(styles)>0 else ([], [], [])
+        return draw_bboxes_array(frame, bboxes=np.asarray(bboxes)[:num], classes=classes, colors=colors, labels=labels, thickness=thickness, coord_type=coord_type)
     dict_infos = '{"color":(255,0,0),"text": "person1"},{"color":(0,255,0),"text": "person2"}'
     draw_bboxes.__doc__ = f"""Drawing Inference results on frame.
 
     Args:
         frame (ndarray) : Image. shape=(H,W,ch)
         bboxes (list)   : Each element is the coordinate (x,y,w,h)
-        infos (list)    : Each element is dictionary. (``key`` is ``color``, or ``text``)
+        infos (list)    : Each element is dictionary. (``key`` is ``color``, ``text`` or ``rectangle_thickness``)
+
+    Note:
+        Use :func:`draw_bboxes_array <pycharmers.opencv.drawing.draw_bboxes_array>` for ``np.ndarray`` with shape=(N,4).
 
     Examples:
         >>> import cv2
@@ -156,7 +232,7 @@ def draw_text_with_bg(img, text, org=(10,10), offset=(10, 10),
     if isinstance(bgcolor, str):
         bgcolor = FAMOUS_COLOR_PALETTES.get(color_type).get(bgcolor, cv2WHITE)
 
-    text_W, text_H = cv2.getTextSize(text=text, fontFace=fontFace, fontScale=fontScale, thickness=thickness)[0]
+    text_W, text_H = cached_text_size(text=text, fontFace=fontFace, fontScale=fontScale, thickness=thickness)[0]
     text_off_x, text_off_y = offset
     org_x, org_y = org
 
@@ -5,17 +5,87 @@ import warnings
 import numpy as np
 
 from .drawing import cv2WHITE
-from ..utils.generic_utils import filenaming
-from ..utils._colorings import toBLUE
+from ..utils.generic_utils import filenaming, calc_rectangle_size
+from ..utils._colorings import toBLUE, toGREEN
+
+class Sprite():
+    """Foreground image to be pasted by :func:`cv2paste <pycharmers.opencv.editing.cv2paste>` or :class:`SpriteCompositor <pycharmers.opencv.editing.SpriteCompositor>` .
+
+    The colors are premultiplied by alpha only once, so pasting the same sprite many times costs one multiply-add per pixel of the (clipped) region.
+
+    Args:
+        img (ndarray)           : Foreground Image. shape=(h,w,ch)
+        alpha (ndarray/float)   : Alpha mask ( ``uint8`` in [0,255] or ``float`` in [0,1] ) with shape=(h,w), or the opacity of the whole image.
+        has_alpha (bool)        : Whether the last channel of ``img`` is alpha. (Defaults to ``ch==4`` when ``alpha`` is ``None`` .)
+
+    Attributes:
+        color (ndarray)     : The (premultiplied) colors.
+        inv_alpha (ndarray) : ``1-alpha`` . ``None`` if the sprite is opaque.
+
+    Examples:
+        >>> import cv2
+        >>> from pycharmers.opencv import Sprite, SAMPLE_LENA_IMG
+        >>> sprite = Sprite(cv2.imread(SAMPLE_LENA_IMG), alpha=0.5)
+        >>> sprite.opaque
+        False
+    """
+    def __init__(self, img, alpha=None, has_alpha=None):
+        if has_alpha is None:
+            has_alpha = alpha is None and img.ndim==3 and img.shape[2]==4
+        if has_alpha:
+            img, alpha = img[..., :-1], img[..., -1]
+        self.shape = img.shape
+        if alpha is not None:
+            alpha = np.asarray(alpha)
+            alpha = alpha.astype(np.float32)/255 if alpha.dtype==np.uint8 else alpha.astype(np.float32)
+            alpha = np.broadcast_to(alpha, img.shape[:2])
+            if np.all(alpha>=1):
+                alpha = None
+        if alpha is None:
+            self.color, self.inv_alpha = img, None
+        else:
+            alpha = alpha[..., None] if img.ndim==3 else alpha
+            self.color = img.astype(np.float32)*alpha
+            self.inv_alpha = 1-alpha
+
+    @property
+    def opaque(self):
+        return self.inv_alpha is None
+
+    def paste(self, bg_img, x, y):
+        """Paste (blend) into ``bg_img`` in place. Only the region where they overlap is touched.
+
+        Args:
+            bg_img (ndarray) : Background Image. shape=(H,W,ch)
+            x,y (int)        : Coordinates to paste.
+
+        Returns:
+            rect (tuple) : The pasted region ( ``left`` , ``top`` , ``right`` , ``bottom`` ), or ``None`` if they do not overlap.
+        """
+        h,w = self.shape[:2]
+        H,W = bg_img.shape[:2]
+        l,t,r,b = max(x,0), max(y,0), min(x+w,W), min(y+h,H)
+        if l>=r or t>=b:
+            return None
+        roi = bg_img[t:b, l:r]
+        fg = (slice(t-y, b-y), slice(l-x, r-x))
+        if self.inv_alpha is None:
+            roi[:] = self.color[fg]
+        else:
+            blended = roi*self.inv_alpha[fg]
+            blended += self.color[fg]
+            blended += 0.5
+            roi[:] = blended
+        return (l,t,r,b)
 
 def cv2paste(bg_img, fg_img, points=(0,0), inplace=False):
     """Pastes ``fg_image`` into ``bg_image``
     
     Args:
-        bg_img (ndarray) : Background Image. shape=(H,W,ch)
-        fg_img (ndarray) : Background Image. shape=(H,W,ch)
-        points (tuple)   : Coordinates to paste. (x,y)
-        inplace (bool)   : Whether to transform input ( ``bg_img`` ) using no auxiliary data structure.
+        bg_img (ndarray)        : Background Image. shape=(H,W,ch)
+        fg_img (ndarray/Sprite) : Foreground Image. shape=(h,w,ch) or (h,w,ch+1) (The last channel is alpha.)
+        points (tuple)          : Coordinates to paste. (x,y)
+        inplace (bool)          : Whether to transform input ( ``bg_img`` ) using no auxiliary data structure.
         
     Returns:
         bg_img (ndarray) : pasted image.
@@ -29,17 +99,78 @@ def cv2paste(bg_img, fg_img, points=(0,0), inplace=False):
     """
     if not inplace:
         bg_img = bg_img.copy()
-        
-    x,y = points
-    bg_h, bg_w, _ = bg_img.shape
-    fg_h, fg_w, _ = fg_img.shape
-    
-    if ((-fg_w < x < bg_w) and (-fg_h < y < bg_h)):
-        if not inplace:
-            bg_img = bg_img.copy()            
-            bg_img[max(0,y):min(y+fg_h, bg_h), max(0,x):min(x+fg_w, bg_w), :] = fg_img[max(0,0-y):bg_h-y, max(0,0-x):bg_w-x, :]
+    if not isinstance(fg_img, Sprite):
+        fg_img = Sprite(fg_img, has_alpha=fg_img.ndim==3 and fg_img.shape[2]==(bg_img.shape[2] if bg_img.ndim==3 else 1)+1)
+    fg_img.paste(bg_img, *points)
     return bg_img
 
+class SpriteCompositor():
+    """Paste many foreground images onto one background in a single call.
+
+    The canvas is allocated once and reused. At each call, only the regions pasted by the previous call are restored
+    from the background (except those covered by opaque sprites again), and each sprite is blended only inside its clipped region.
+
+    Args:
+        size (tuple)            : The size of the canvas. ( ``W`` , ``H`` ) (Ignored if ``bg`` is an image.)
+        bg (ndarray/int/tuple)  : The background image, or color.
+        channels (int)          : The number of channels of the canvas when ``bg`` is a color.
+
+    Attributes:
+        canvas (np.ndarray) : The canvas which is returned by :meth:`compose <pycharmers.opencv.editing.SpriteCompositor.compose>` (and is reused.)
+        dirty (list)        : The regions pasted by the last call. ( ``left`` , ``top`` , ``right`` , ``bottom`` )
+
+    Note:
+        The canvas must not be modified outside of :meth:`compose <pycharmers.opencv.editing.SpriteCompositor.compose>` . Otherwise, call :meth:`reset <pycharmers.opencv.editing.SpriteCompositor.reset>` .
+
+    Examples:
+        >>> import numpy as np
+        >>> from pycharmers.opencv import Sprite, SpriteCompositor
+        >>> compositor = SpriteCompositor(size=(1920, 1080), bg=(255, 255, 255))
+        >>> logo = Sprite(np.zeros(shape=(64, 64, 4), dtype=np.uint8)) # BGRA
+        >>> for i in range(30):
+        ...     frame = np.full(shape=(720, 1280, 3), fill_value=i, dtype=np.uint8)
+        ...     canvas = compositor.compose([(frame, (320, 180)), (logo, (10*i, 10)), (logo, (10*i, 80))])
+    """
+    def __init__(self, size=None, bg=0, channels=3):
+        if isinstance(bg, np.ndarray) and bg.ndim>=2:
+            self.canvas = bg.copy()
+        else:
+            W,H = size
+            self.canvas = np.empty(shape=(H, W, channels), dtype=np.uint8)
+        self.bg = bg
+        self.reset()
+
+    def reset(self):
+        """Restore the whole canvas from the background."""
+        self.canvas[:] = self.bg
+        self.dirty = []
+
+    def _restore(self, l, t, r, b):
+        if isinstance(self.bg, np.ndarray) and self.bg.ndim>=2:
+            self.canvas[t:b, l:r] = self.bg[t:b, l:r]
+        else:
+            self.canvas[t:b, l:r] = self.bg
+
+    def compose(self, sprites):
+        """Paste the sprites (in order) onto the background.
+
+        Args:
+            sprites (list) : Each element is ( ``img`` , ``(x, y)`` ) where ``img`` is ``np.ndarray`` (The 4th channel is alpha) or :class:`Sprite <pycharmers.opencv.editing.Sprite>` .
+
+        Returns:
+            canvas (np.ndarray) : Composited image. Note that the same array is overwritten by the next call.
+        """
+        H,W = self.canvas.shape[:2]
+        sprites = [(sprite if isinstance(sprite, Sprite) else Sprite(sprite), tuple(points)) for sprite,points in sprites]
+        covered = [
+            (max(x,0), max(y,0), min(x+sprite.shape[1],W), min(y+sprite.shape[0],H)) for sprite,(x,y) in sprites if sprite.opaque
+        ]
+        for l,t,r,b in self.dirty:
+            if not any(cl<=l and ct<=t and r<=cr and b<=cb for cl,ct,cr,cb in covered):
+                self._restore(l,t,r,b)
+        self.dirty = [rect for rect in (sprite.paste(self.canvas, x, y) for sprite,(x,y) in sprites) if rect is not None]
+        return self.canvas
+
 def vconcat_resize_min(*images, interpolation=cv2.INTER_CUBIC):
     """Concat vertically while resizing to the smallest width.
 
@@ -84,6 +215,228 @@ def hconcat_resize_min(*images, interpolation=cv2.INTER_CUBIC):
         ) for img in images
     ])
 
+class GridCompositor():
+    """Composite multiple frames into one preallocated canvas.
+
+    The tile geometry is computed only once (same layout as ``vconcat_resize_min`` of ``hconcat_resize_min`` of each row),
+    and each frame is resized directly into its slot of the canvas ( ``cv2.resize(..., dst=view)`` ), so no image is allocated per frame.
+
+    Args:
+        shapes (list)         : Shapes of the frames to be composited. ( ``[frame.shape, ...]`` )
+        grid (tuple)          : How to arrange the frames. ( ``nrows`` , ``ncols`` ) If ``None`` , arrange like a square.
+        interpolation (int)   : Interpolation method for all tiles, or a list of methods for each tile. If ``None`` , ``cv2.INTER_AREA`` is used for shrinking and ``cv2.INTER_LINEAR`` for enlarging.
+        bgcolor (int/tuple)   : The color of empty cells. Defaults to ``0`` (black).
+
+    Attributes:
+        canvas (np.ndarray) : The canvas which is returned by :meth:`compose <pycharmers.opencv.editing.GridCompositor.compose>` (and is reused.)
+        tiles (list)        : Each element is the slot of the frame. ( ``x`` , ``y`` , ``w`` , ``h`` )
+
+    Examples:
+        >>> import numpy as np
+        >>> from pycharmers.opencv import GridCompositor
+        >>> frames = [np.full(shape=(360, 480, 3), fill_value=i*30, dtype=np.uint8) for i in range(5)]
+        >>> compositor = GridCompositor(shapes=[frame.shape for frame in frames])
+        >>> compositor.grid
+        (3, 2)
+        >>> compositor.compose(*frames).shape
+        (1080, 960, 3)
+    """
+    def __init__(self, shapes, grid=None, interpolation=None, bgcolor=0):
+        num_frames = len(shapes)
+        nrow, ncol = calc_rectangle_size(area=num_frames, w=None) if grid is None else grid
+        if nrow*ncol < num_frames:
+            raise ValueError(f"{toGREEN('grid')}={grid} can not contain {num_frames} frames.")
+        self.grid = (nrow, ncol)
+        # NOTE: Empty cells have the same shape as the first frame.
+        shapes = [tuple(shape) for shape in shapes] + [tuple(shapes[0])]*(nrow*ncol-num_frames)
+        rows = []
+        for r in range(nrow):
+            row = shapes[r*ncol:(r+1)*ncol]
+            h_min = min(h for h,w,*_ in row)
+            widths = [int(w*h_min/h) for h,w,*_ in row]
+            rows.append((h_min, widths))
+        W = min(sum(widths) for _,widths in rows)
+        self.tiles = []
+        y = 0
+        for h_min, widths in rows:
+            row_W = sum(widths)
+            row_H = int(h_min*W/row_W)
+            boundaries = [int(round(x*W/row_W)) for x in np.cumsum([0]+widths)]
+            for x_start, x_end in zip(boundaries[:-1], boundaries[1:]):
+                self.tiles.append((x_start, y, x_end-x_start, row_H))
+            y += row_H
+        self.canvas = np.empty(shape=(y, W)+shapes[0][2:], dtype=np.uint8)
+        self.canvas[:] = bgcolor
+        self.shapes = shapes[:num_frames]
+        if interpolation is None or isinstance(interpolation, int):
+            interpolation = [interpolation]*num_frames
+        self.interpolations = [
+            (cv2.INTER_AREA if tw*th < w*h else cv2.INTER_LINEAR) if inter is None else inter
+            for (h,w,*_),(_,_,tw,th),inter in zip(self.shapes, self.tiles, interpolation)
+        ]
+
+    def compose(self, *frames):
+        """Composite the frames.
+
+        Args:
+            frames (np.ndarray) : Frames. (The same number as ``shapes`` )
+
+        Returns:
+            canvas (np.ndarray) : Composited image. Note that the same array is overwritten by the next call.
+        """
+        for frame,(x,y,w,h),interpolation in zip(frames, self.tiles, self.interpolations):
+            if w*h==0: continue
+            slot = self.canvas[y:y+h, x:x+w]
+            if frame.shape[:2] == (h,w):
+                slot[:] = frame
+            else:
+                cv2.resize(src=frame, dsize=(w,h), dst=slot, interpolation=interpolation)
+        return self.canvas
+
+class ViewportRenderer():
+    """Render the visible region of interest (ROI) of a frame into a preallocated display buffer.
+
+    Only the ROI is resized on zoom and pan. When zoomed out, the ROI is taken from a level of the image pyramid
+    ( ``cv2.pyrDown`` ) close to the display scale, and the levels are cached while the same frame (array) is shown.
+    If you modify the frame in place, call :meth:`set_frame <pycharmers.opencv.editing.ViewportRenderer.set_frame>` with ``force=True`` .
+
+    Args:
+        dsize (tuple)    : Display size. ( ``width`` , ``height`` )
+        min_zoom (float) : The minimum zoom rate. ( ``1.0`` fits the frame to the display.)
+        max_zoom (float) : The maximum zoom rate.
+
+    Attributes:
+        buffer (np.ndarray) : The display buffer. (reused.)
+        zoom (float)        : The zoom rate. ( ``1.0`` fits the frame to the display.)
+        center (tuple)      : The center of the view in the frame coordinates. ( ``x`` , ``y`` )
+        pyramid (list)      : Cached levels of the image pyramid. ( ``pyramid[0]`` is the frame itself.)
+
+    Examples:
+        >>> import numpy as np
+        >>> from pycharmers.opencv import ViewportRenderer
+        >>> frame = np.random.randint(low=0, high=255, size=(2160, 3840, 3), dtype=np.uint8)
+        >>> viewport = ViewportRenderer(dsize=(960, 540))
+        >>> viewport.set_frame(frame)
+        >>> viewport.render().shape
+        (540, 960, 3)
+        >>> viewport.zoom_by(4)
+        >>> viewport.pan(dx=100, dy=0)
+        >>> viewport.center
+        (2020.0, 1080.0)
+    """
+    def __init__(self, dsize, min_zoom=0.125, max_zoom=32.):
+        self.dsize = tuple(dsize)
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.buffer = np.zeros(shape=(self.dsize[1], self.dsize[0], 3), dtype=np.uint8)
+        self.zoom = 1.
+        self.center = None
+        self.frame = None
+        self.pyramid = []
+
+    def set_frame(self, frame, force=False):
+        """Set the frame to be rendered. (The pyramid is cleared only if the frame is changed.)
+
+        Args:
+            frame (np.ndarray) : The frame.
+            force (bool)       : Whether to clear the pyramid even if ``frame`` is the same array.
+        """
+        if (frame is self.frame) and (not force):
+            return
+        if (self.frame is None) or (self.frame.shape[:2] != frame.shape[:2]):
+            self.center = (frame.shape[1]/2, frame.shape[0]/2)
+        if self.buffer.shape[2:] != frame.shape[2:]:
+            self.buffer = np.zeros(shape=self.buffer.shape[:2]+frame.shape[2:], dtype=frame.dtype)
+        self.frame = frame
+        self.pyramid = [frame]
+
+    @property
+    def scale(self):
+        """Display pixels per frame pixel."""
+        H,W = self.frame.shape[:2]
+        Dw,Dh = self.dsize
+        return min(Dw/W, Dh/H) * self.zoom
+
+    def level(self, l):
+        """Get the ``l`` th level of the pyramid. (cached)"""
+        while len(self.pyramid) <= l:
+            self.pyramid.append(cv2.pyrDown(self.pyramid[-1]))
+        return self.pyramid[l]
+
+    def _clamp_center(self):
+        H,W = self.frame.shape[:2]
+        Dw,Dh = self.dsize
+        s = self.scale
+        cx,cy = self.center
+        vw,vh = Dw/s, Dh/s
+        cx = W/2 if vw >= W else min(max(cx, vw/2), W-vw/2)
+        cy = H/2 if vh >= H else min(max(cy, vh/2), H-vh/2)
+        self.center = (cx,cy)
+
+    def zoom_by(self, rate):
+        """Zoom in ( ``rate>1`` ) or out ( ``rate<1`` ) around the center.
+
+        Args:
+            rate (float) : Zoom rate.
+        """
+        self.zoom = min(max(self.zoom*rate, self.min_zoom), self.max_zoom)
+        if self.frame is not None:
+            self._clamp_center()
+
+    def pan(self, dx, dy):
+        """Move the view.
+
+        Args:
+            dx (int) : Horizontal distance in the display. (px)
+            dy (int) : Vertical distance in the display. (px)
+        """
+        if self.frame is None:
+            return
+        s = self.scale
+        cx,cy = self.center
+        self.center = (cx+dx/s, cy+dy/s)
+        self._clamp_center()
+
+    def render(self, frame=None):
+        """Render the visible ROI into the ``buffer`` .
+
+        Args:
+            frame (np.ndarray) : If given, :meth:`set_frame <pycharmers.opencv.editing.ViewportRenderer.set_frame>` is called first.
+
+        Returns:
+            buffer (np.ndarray) : The display buffer. Note that the same array is overwritten by the next call.
+        """
+        if frame is not None:
+            self.set_frame(frame)
+        H,W = self.frame.shape[:2]
+        Dw,Dh = self.dsize
+        s = self.scale
+        cx,cy = self.center
+        x0,y0 = cx-Dw/(2*s), cy-Dh/(2*s)
+        # The visible region in the frame, and where it is drawn in the display.
+        fx0,fy0 = max(0., x0), max(0., y0)
+        fx1,fy1 = min(float(W), x0+Dw/s), min(float(H), y0+Dh/s)
+        dx0,dy0 = int(round((fx0-x0)*s)), int(round((fy0-y0)*s))
+        dx1,dy1 = min(Dw, int(round((fx1-x0)*s))), min(Dh, int(round((fy1-y0)*s)))
+        if (dx0,dy0,dx1,dy1) != (0,0,Dw,Dh):
+            self.buffer[:] = 0
+        if dx1<=dx0 or dy1<=dy0:
+            return self.buffer
+        l = 0
+        while (s*2**(l+1) <= 1) and (min(H,W) >> (l+1) > 0):
+            l += 1
+        k = 2**l
+        img = self.level(l)
+        lx0,ly0 = int(fx0/k), int(fy0/k)
+        lx1,ly1 = max(lx0+1, int(np.ceil(fx1/k))), max(ly0+1, int(np.ceil(fy1/k)))
+        roi = img[ly0:ly1, lx0:lx1]
+        dst = self.buffer[dy0:dy1, dx0:dx1]
+        if roi.shape[:2] == dst.shape[:2]:
+            dst[:] = roi
+        else:
+            cv2.resize(src=roi, dsize=(dx1-dx0, dy1-dy0), dst=dst, interpolation=cv2.INTER_AREA if s*k < 1 else cv2.INTER_LINEAR)
+        return self.buffer
+
 def resize_aspect(src, dsize, interpolation=cv2.INTER_AREA):
     """Resize the image while keeping the aspect ratio.
     
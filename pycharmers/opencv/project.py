@@ -1,18 +1,251 @@
 #coding: utf-8
 import os
 import cv2
+import csv
+import json
+import time
+import warnings
+import collections
 import numpy as np
 
 from . import cvui
 from ._cvpath import PYCHARMERS_OPENCV_VIDEO_DIR
 from .editing import resize_aspect
-from .video_image_handler import VideoCaptureCreate
+from .video_image_handler import AsyncVideoWriter, ThreadedVideoCapture, VideoCaptureCreate
 from .windows import cv2key2chr
-from ..utils.generic_utils import now_str
+from ..utils.generic_utils import handleKeyError, now_str
 from ..utils.subprocess_utils import get_monitor_size
-from ..utils._colorings import toBLUE
+from ..utils._colorings import toBLUE, toGREEN
 from ..__meta__ import __project_name__
 
+class StageProfiler():
+    """Time each stage of a frame loop.
+
+    Call :meth:`begin` at the beginning of each frame, :meth:`lap` at the end of each stage, and :meth:`end` at the end of the frame.
+    Each stage is timed from the previous mark, so the overhead is one ``time.perf_counter()`` per stage.
+
+    Args:
+        stages (list) : The names of stages (in order.) The order of the overlay follows it.
+        maxlen (int)  : The number of recent frames kept for the overlay.
+        record (bool) : Whether to keep all timings for :meth:`save` . (Otherwise, only the recent frames are kept.)
+
+    Attributes:
+        records (list) : All timings (Empty if ``record=False`` .) Each element is ( ``frame_no`` , ``stage`` , ``start`` , ``duration`` ) [s] (``start`` is relative to the creation.)
+        recent (dict)  : ``stage`` -> the durations of the recent frames. ( :class:`SparklineSeries <pycharmers.opencv.cvui.SparklineSeries>` ) [ms]
+
+    Examples:
+        >>> import time
+        >>> from pycharmers.opencv import StageProfiler
+        >>> profiler = StageProfiler(stages=["read", "func"])
+        >>> for _ in range(10):
+        ...     profiler.begin()
+        ...     time.sleep(0.01)
+        ...     profiler.lap("read")
+        ...     time.sleep(0.02)
+        ...     profiler.lap("func")
+        ...     profiler.end()
+        >>> summary = profiler.summary() # About 10[ms] for "read", and 20[ms] for "func".
+        >>> profiler.save("profile.json") # Open with chrome://tracing
+    """
+    SUPPORTED_FORMATS = [".csv", ".json"]
+    def __init__(self, stages=["read", "func", "gui", "resize", "imshow", "write"], maxlen=120, record=True):
+        self.stages = list(stages)
+        self.recent = {stage: cvui.SparklineSeries(maxlen=maxlen) for stage in self.stages}
+        self.frame_ends = collections.deque(maxlen=maxlen)
+        self.records = []
+        self.record = record
+        self.frame_no = 0
+        self.origin = self.mark = time.perf_counter()
+
+    def begin(self):
+        """Begin a frame."""
+        self.frame_no += 1
+        self.mark = time.perf_counter()
+
+    def lap(self, stage):
+        """End the ``stage`` , and begin the next one."""
+        now = time.perf_counter()
+        duration = now - self.mark
+        if stage not in self.recent:
+            self.stages.append(stage)
+            self.recent[stage] = cvui.SparklineSeries(maxlen=self.frame_ends.maxlen)
+        self.recent[stage].append(1e3*duration)
+        if self.record:
+            self.records.append((self.frame_no, stage, self.mark-self.origin, duration))
+        self.mark = now
+
+    def end(self):
+        """End a frame."""
+        self.frame_ends.append(time.perf_counter())
+
+    @property
+    def fps(self):
+        """Frames per second of the recent frames."""
+        if len(self.frame_ends)<2:
+            return 0.
+        return (len(self.frame_ends)-1)/(self.frame_ends[-1]-self.frame_ends[0])
+
+    def summary(self):
+        """Mean duration of each stage of the recent frames. [ms]"""
+        return {stage: round(float(values.values.mean()), 1) for stage,values in self.recent.items() if len(values)>0}
+
+    def draw(self, where, x, y, width=160, height=20):
+        """Draw the fps and the sparkline of each stage with ``cvui``.
+
+        Args:
+            where (np.ndarray) : image/frame where the overlay should be rendered.
+            x (int)            : Position X where the overlay should be placed.
+            y (int)            : Position Y where the overlay should be placed.
+            width (int)        : Width of sparklines.
+            height (int)       : Height of sparklines.
+
+        Returns:
+            height (int) : The height of the overlay.
+        """
+        cvui.text(where=where, x=x, y=y, text=f" FPS: {self.fps:.1f}")
+        y0 = y
+        for stage in self.stages:
+            y += 15
+            values = self.recent[stage]
+            mean = values.values.mean() if len(values)>0 else 0.
+            cvui.text(where=where, x=x, y=y, text=f" {stage}: {mean:.1f}[ms]")
+            if len(values)>=2:
+                cvui.sparkline(where=where, x=x, y=y+5, values=values, width=width, height=height)
+            y += height
+        return y-y0+15
+
+    def save(self, out_path):
+        """Export all timings.
+
+        Args:
+            out_path (str) : ``*.csv`` (``frame_no,stage,start_ms,duration_ms`` ), or ``*.json`` ( `Trace Event Format <https://docs.google.com/document/d/1CvAClvFfyA5R-PhYUmn5OOQtYMH4h6I0nSsKchNAySU>`_ for ``chrome://tracing`` )
+        """
+        ext = os.path.splitext(out_path)[-1].lower()
+        handleKeyError(lst=StageProfiler.SUPPORTED_FORMATS, ext=ext)
+        if ext == ".csv":
+            with open(out_path, mode="w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["frame_no", "stage", "start_ms", "duration_ms"])
+                writer.writerows([(no, stage, f"{1e3*start:.3f}", f"{1e3*duration:.3f}") for no,stage,start,duration in self.records])
+        else:
+            pid = os.getpid()
+            events = [{"name": stage, "ph": "X", "ts": 1e6*start, "dur": 1e6*duration, "pid": pid, "tid": 0, "args": {"frame_no": no}} for no,stage,start,duration in self.records]
+            with open(out_path, mode="w") as f:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        print(f"Profile was saved at {toBLUE(out_path)}")
+        return out_path
+
+class StageCache():
+    """Memoize the stages of a ``func`` pipeline given to :meth:`cv2Project.wrap <pycharmers.opencv.project.cv2Project.wrap>` .
+
+    Each stage keeps its last output, keyed by the identities of its inputs and the values of its parameters,
+    so when a slider changes, only the stages downstream of it are recomputed. Inputs are identified by objects
+    (the frame given to :meth:`source` , and the outputs of stages), not by their contents, so the cache is free
+    for still images (the same frame object is read every time), and is invalidated as soon as a new frame is read
+    from a live video or a movie.
+
+    Args:
+        readonly (bool) : Whether to make the cached outputs ( ``np.ndarray`` ) read-only, so that stages which draw on their inputs in place fail loudly.
+
+    Attributes:
+        stats (dict) : The number of ``hits`` and ``misses`` .
+
+    Note:
+        Stage functions must not modify their inputs. Arguments which are neither outputs of stages nor hashable (e.g. arrays created every frame) make the stage always recompute.
+
+    Examples:
+        >>> import cv2
+        >>> from pycharmers.opencv import StageCache, SAMPLE_LENA_IMG
+        >>> cache = StageCache()
+        >>> img = cv2.imread(SAMPLE_LENA_IMG)
+        >>> for ksize in [3, 3, 5]:
+        ...     src  = cache.source(img)
+        ...     gray = cache("gray", cv2.cvtColor, src, code=cv2.COLOR_BGR2GRAY)
+        ...     blur = cache("blur", cv2.medianBlur, gray, ksize=ksize)
+        >>> cache.stats
+        {'hits': 3, 'misses': 3}
+    """
+    UNCACHEABLE = object()
+    def __init__(self, readonly=True):
+        self.readonly = readonly
+        self.clear()
+
+    def clear(self):
+        """Discard all cached outputs."""
+        self.src = None
+        self.stages = {}  # name -> (key, output)
+        self.tokens = {}  # id(obj) -> (obj, token)
+        self.counter = 0
+        self.stats = {"hits": 0, "misses": 0}
+
+    def _register(self, obj):
+        """Give a new token to ``obj`` (and to the elements of a tuple.)"""
+        self.counter += 1
+        token = self.counter
+        self.tokens[id(obj)] = (obj, token)
+        if isinstance(obj, tuple):
+            for i,e in enumerate(obj):
+                self.tokens.setdefault(id(e), (e, (token, i)))
+        if self.readonly:
+            for e in (obj if isinstance(obj, tuple) else (obj,)):
+                if isinstance(e, np.ndarray):
+                    e.flags.writeable = False
+
+    def _identify(self, obj):
+        """Token of ``obj`` if it is a cached object, itself if it is hashable, otherwise ``StageCache.UNCACHEABLE`` ."""
+        obj_token = self.tokens.get(id(obj))
+        if obj_token is not None and obj_token[0] is obj:
+            return ("@", obj_token[1])
+        if isinstance(obj, np.ndarray):
+            return StageCache.UNCACHEABLE
+        try:
+            hash(obj)
+        except TypeError:
+            return StageCache.UNCACHEABLE
+        return obj
+
+    def source(self, frame):
+        """Set the input frame. All stages are invalidated when it is not the same object as the previous one.
+
+        Args:
+            frame (np.ndarray) : The input frame.
+
+        Returns:
+            frame (np.ndarray) : ``frame`` itself.
+        """
+        if frame is not self.src:
+            self.src = frame
+            self.stages.clear()
+            self.counter += 1
+            self.tokens = {id(frame): (frame, self.counter)}
+        return frame
+
+    def __call__(self, name, func, *args, **kwargs):
+        """Run the stage ``name`` , or return its cached output.
+
+        Args:
+            name (str)      : The name of the stage.
+            func (callable) : The stage function, called as ``func(*args, **kwargs)`` .
+
+        Returns:
+            output : The output of ``func`` .
+        """
+        identities = [self._identify(e) for e in args] + [self._identify(v) for v in kwargs.values()]
+        key = None if any(e is StageCache.UNCACHEABLE for e in identities) else (tuple(identities), tuple(kwargs))
+        cached = self.stages.get(name)
+        if key is not None and cached is not None and cached[0] == key:
+            self.stats["hits"] += 1
+            return cached[1]
+        self.stats["misses"] += 1
+        if cached is not None:
+            # Release the previous output.
+            for e in (cached[1],)+(cached[1] if isinstance(cached[1], tuple) else ()):
+                self.tokens.pop(id(e), None)
+        output = func(*args, **kwargs)
+        self._register(output)
+        self.stages[name] = (key, output)
+        return output
+
 class cv2Project():
     """OpenCV project wrapper with useful GUI tools.
 
@@ -36,8 +269,17 @@ class cv2Project():
         frame_halfsize (tuple)  : ( ``frame_width//2`` , ``frame_height//2`` )
         gui_x (int)             : ``frame_width`` + ``gui_margin``
         fps (int)               : Frame per seconds.
-        video (cv2.VideoWriter) : Video Writer.
+        video (AsyncVideoWriter): Video Writer.
         video_fn (str)          : The file name of video.
+        latencies (deque)       : Glass-to-glass latencies (from capture to ``cv2.imshow`` ) of the recent frames. [s]
+        profiler (StageProfiler): Timings of each stage ( ``read`` , ``func`` , ``gui`` , ``resize`` , ``imshow`` , ``write`` ) per frame.
+
+    Note:
+        Frames are recorded on a background thread ( :class:`AsyncVideoWriter <pycharmers.opencv.video_image_handler.AsyncVideoWriter>` ).
+        If ``drop_policy`` is ``"latest"`` or ``"queue"`` , camera frames are also captured on a background thread
+        ( :class:`ThreadedVideoCapture <pycharmers.opencv.video_image_handler.ThreadedVideoCapture>` ), so a slow ``func`` drops stale frames
+        instead of accumulating latency. Files are always read serially, and no frame is dropped while capturing.
+        ``func`` and the display stay on the main thread, because ``func`` can draw ``cvui`` widgets.
 
     OtherAttributes:
         See :py:class:`cv2ArgumentParser <pycharmers.utils.argparse_utils.cv2ArgumentParser>` .
@@ -62,6 +304,9 @@ class cv2Project():
                 * autofit (bool)                    : Whether to fit display size to window size.
                 * twitter (bool)                    : Whether you want to run for tweet. ( ``display_size`` will be () )
                 * capture (bool)                    : Whether you want to save as video.
+                * drop_policy (str)                 : ``"latest"`` , ``"queue"`` , or ``"none"`` . (Optional, defaults to ``"none"`` as :meth:`cv2ArgumentParser <pycharmers.utils.argparse_utils.cv2ArgumentParser>` )
+                * queue_size (int)                  : The size of the queue when ``drop_policy="queue"`` . (Optional)
+                * profile (str)                     : Where to export the timings of each stage. ( ``*.csv`` or ``*.json`` , Optional)
             * After run this method, ``self`` will have these attributes.
                 * cap (VideoCapture)      : VideoCapture (mimic) object. See :meth:`VideoCaptureCreate <pycharmers.opencv.video_image_handler.VideoCaptureCreate>`
                 * monitor (np.ndarray)    : Background image. shape= ( ``monitor_height`` , ``monitor_width``, 3)
@@ -75,11 +320,23 @@ class cv2Project():
                 * frame_halfsize (tuple)  : ( ``frame_width//2`` , ``frame_height//2`` )
                 * gui_x (int)             : ``frame_width`` + ``gui_margin``
                 * fps (int)               : Frame per seconds.
-                * video (cv2.VideoWriter) : Video Writer.
+                * video (AsyncVideoWriter): Video Writer. See :class:`AsyncVideoWriter <pycharmers.opencv.video_image_handler.AsyncVideoWriter>`
                 * video_fn (str)          : The file name of video.
                 * fn_prefix (str)         : The prefix of filename ( ``"" if self.path is None else self.path+"."`` )
+                * latencies (deque)       : Glass-to-glass latencies of the recent frames. [s]
+                * profiler (StageProfiler): Timings of each stage per frame. See :class:`StageProfiler <pycharmers.opencv.project.StageProfiler>`
+                * show_profile (list)     : Whether to show the profile overlay. ( ``show_profile[0]`` is toggled by the checkbox.)
         """
         cap = VideoCaptureCreate(path=self.path, cam=self.cam)
+        drop_policy = getattr(self, "drop_policy", "none")
+        if drop_policy != "none" and self.path is not None:
+            warnings.warn(f"{toGREEN('drop_policy')} is ignored because files are read serially.")
+        elif drop_policy != "none":
+            cap = ThreadedVideoCapture(cap, drop_policy=drop_policy, maxsize=getattr(self, "queue_size", 4), keep_all=self.capture)
+        latencies = collections.deque(maxlen=120)
+        # All timings are kept only when they are exported.
+        profiler = StageProfiler(record=getattr(self, "profile", None) is not None)
+        show_profile = [profiler.record]
         if self.autofit:
             monitor_width, monitor_height = get_monitor_size()
         elif self.twitter:
@@ -96,9 +353,11 @@ class cv2Project():
         gui_x = frame_width + self.gui_margin
         fps = cap.get(cv2.CAP_PROP_FPS)
         video_path = f'{fn_prefix}.{now_str()}.mp4'
-        video = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc('m','p','4','v'), fps, (monitor_width, monitor_height))
+        video = AsyncVideoWriter(cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc('m','p','4','v'), fps, (monitor_width, monitor_height)))
         print(f"Created {toBLUE(video_path)}")
         cvui.init(windowNames=self.winname, numWindows=1, delayWaitKey=1, createNamedWindows=True)
+        # The GUI panel is filled with ``gui_color`` every frame, so the widgets on it are copied from the cache.
+        cvui.cache(enabled=True)
         cv2.moveWindow(winname=self.winname, x=0, y=0)
         # NOTE: Register the variables defined here as attributes.
         defined_args = locals()
@@ -113,16 +372,28 @@ class cv2Project():
         """
         params = self.__dict__
         char = ""
+        profiler = self.profiler
         while (True):
             self.monitor[:] = self.gui_color
+            profiler.begin()
             ret, frame = self.cap.read()
             if not ret: break
+            captured_at = getattr(self.cap, "timestamp", None) or time.perf_counter()
+            profiler.lap("read")
             # Wrap the function.
             frame = func(frame=frame, **params)
+            profiler.lap("func")
             # Recieve the key.
             key = cvui.lastKeyPressed()
             if key != -1:
                 char = cv2key2chr(key)
+            # y = self.frame_height-170
+            if cvui.checkbox(where=self.monitor, x=self.gui_x, y=self.frame_height-170, label="Profile", state=self.show_profile):
+                overlay_height = 15 + 35*len(profiler.stages)
+                profiler.draw(where=self.monitor, x=self.gui_x, y=max(0, self.frame_height-175-overlay_height), width=self.gui_width-2*self.gui_margin)
+            # y = self.frame_height-145
+            if len(self.latencies)>0:
+                cvui.text(where=self.monitor, x=self.gui_x, y=self.frame_height-145, text=f" Latency: {1e3*sum(self.latencies)/len(self.latencies):.0f}[ms]")
             # y = self.frame_height-120
             cvui.text(where=self.monitor, x=self.gui_x, y=self.frame_height-120, text=f" Your input: {char}")     
             # y = self.frame_height-95
@@ -133,6 +404,8 @@ class cv2Project():
                 print(f"Saved {toBLUE(filename)}")
             if cvui.button(where=self.monitor, x=self.gui_x+80, y=self.frame_height-95, width=80, height=30, label="&Stop" if self.capture else "&Capture", color=(110, 93, 211) if self.capture else (177, 163, 121)): 
                 self.capture = not self.capture
+                if isinstance(self.cap, ThreadedVideoCapture):
+                    self.cap.keep_all(self.capture)
             # y = self.frame_height-60
             if key == cvui.ESCAPE or cvui.button(where=self.monitor, x=self.gui_x+105, y=self.frame_height-60, width=55, height=30, label="&Quit", color=(128, 95, 159)): 
                 break
@@ -147,21 +420,35 @@ class cv2Project():
                 )
             # y = self.frame_height-20
             cvui.text(where=self.monitor, x=self.gui_x, y=self.frame_height-20, text=__project_name__)
+            profiler.lap("gui")
 
             cvui.beginRow(where=self.monitor, x=0, y=0)
             cvui.image(image=cv2.resize(src=frame, dsize=self.frame_dsize))
             cvui.endRow()
+            profiler.lap("resize")
 
             cvui.update()
             cv2.imshow(self.winname, self.monitor)
+            self.latencies.append(time.perf_counter()-captured_at)
+            profiler.lap("imshow")
             if self.capture:
                 self.video.write(self.monitor)
+            profiler.lap("write")
+            profiler.end()
         self.release()
 
     def release(self):
         """Do the necessary processing at the end"""
         cv2.destroyAllWindows()
         self.cap.release()
+        self.video.release()
+        if len(self.latencies)>0:
+            print(f"Latency: mean={toGREEN(f'{1e3*sum(self.latencies)/len(self.latencies):.1f}')}[ms], max={toGREEN(f'{1e3*max(self.latencies):.1f}')}[ms] (last {len(self.latencies)} frames)")
+        if isinstance(self.cap, ThreadedVideoCapture):
+            print(f"Frames: {self.cap.stats}")
+        print(f"Mean time of each stage [ms]: {self.profiler.summary()}")
+        if getattr(self, "profile", None) is not None:
+            self.profiler.save(self.profile)
         if os.path.getsize(self.video_path) <= 1000:
             os.remove(self.video_path)
             print(f"Deleted {toBLUE(self.video_path)} (because you didn't capture the window)")
\ No newline at end of file
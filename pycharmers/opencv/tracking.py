@@ -1,13 +1,18 @@
 #coding: utf-8
 import os
 import cv2
+import json
+import time
+import functools
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 
 from ._cvpath import save_dir_create
-from .video_image_handler import basenaming
-from .drawing import SUPPORTED_COORD_TYPES, draw_bboxes_create, draw_text_with_bg
+from .video_image_handler import basenaming, mono_frame_generator
+from .drawing import SUPPORTED_COORD_TYPES, convert_coords, draw_bboxes_create, draw_text_with_bg
 from ..utils.generic_utils import get_create, handleKeyError
-from ..utils.json_utils import save_json
-from ..utils._colorings import toBLUE, toGREEN
+from ..utils.json_utils import PythonCharmersJSONEncoder, save_json
+from ..utils._colorings import toBLUE, toGREEN, toRED
 
 all = OPENCV_TRACKER_CREATORS = {
     # "boosting"   : cv2.TrackerBoosting_create, # cv2.legacy_TrackerBoosting
@@ -35,12 +40,56 @@ tracker_create.__doc__ += """
         TypeError: identifier must be one of ['cv2.Tracker', 'str'], not type
 """
 
+BBOX_STREAM_DTYPE = np.dtype([("no", "<i8"), ("obj", "<i4"), ("bbox", "<f8", (4,))])
+# Special object ids for the records which do not correspond to an object.
+BBOX_STREAM_SINGLE = -1 # ``bboxes`` was one bounding box, not a list.
+BBOX_STREAM_EMPTY  = -2 # ``bboxes`` was an empty list.
+
+def bbox_stream_paths(stream_path):
+    """Returns paths to the records (``.bin``) and the index (``.jsonl``) of the bounding boxes stream.
+
+    Args:
+        stream_path (str) : Path to the stream. (The extension ``.bin`` or ``.jsonl`` is ignored.)
+
+    Examples:
+        >>> from pycharmers.opencv.tracking import bbox_stream_paths
+        >>> bbox_stream_paths("path/to/logs.bin")
+        ('path/to/logs.bin', 'path/to/logs.jsonl')
+    """
+    root, ext = os.path.splitext(stream_path)
+    if ext not in [".bin", ".jsonl"]:
+        root = stream_path
+    return (root + ".bin", root + ".jsonl")
+
+def bbox_stream_dtype(descr):
+    """Convert the ``"dtype"`` in the index of the bounding boxes stream (``dtype.descr`` in json) into ``np.dtype`` .
+
+    Args:
+        descr (list) : Column names, types, (and shapes.)
+
+    Examples:
+        >>> import json
+        >>> from pycharmers.opencv.tracking import BBOX_STREAM_DTYPE, bbox_stream_dtype
+        >>> bbox_stream_dtype(json.loads(json.dumps(BBOX_STREAM_DTYPE.descr))) == BBOX_STREAM_DTYPE
+        True
+    """
+    return np.dtype([tuple(field[:2]) + tuple(tuple(e) for e in field[2:]) for field in descr])
+
 class BBoxLogger():
     """Store Bounding Boxes logs.
 
+    If ``stream_path`` is given, bounding boxes are not kept in memory, but appended to the columnar records
+    (frame number, object id, and bounding box) every ``chunk_size`` boxes. The first line of the index describes
+    the columns and types of the records ( ``BBOX_STREAM_DTYPE`` ). Each flush appends one line to the index,
+    so the results until the last flush survive a crash, and the boxes of a frame range can be read without loading
+    the whole file. (see :class:`BBoxStreamReader` )
+
     Args:
         input_path (str)      : Path to input image directory or video.
         coord_type (str)      : Coordinate types.
+        dirname (str)         : The name of json file.
+        stream_path (str)     : Path to the stream. If ``None``, all logs are saved at once as json.
+        chunk_size (int)      : The number of bounding boxes buffered before flushing to ``stream_path``.
 
     Examples:
         >>> from pycharmers.utils import pycat
@@ -63,9 +112,17 @@ class BBoxLogger():
             ]
         }
         }
+        >>> import os, tempfile
+        >>> stream_logger = BBoxLogger(stream_path=os.path.join(tempfile.mkdtemp(), "logs"), chunk_size=64)
+        >>> for no in range(1, 101):
+        ...     stream_logger.add_bboxes(no=no, bboxes=[(120,120,40,40), None])
+        >>> stream_path = stream_logger.save()
+        tracking info was saved at /tmp/tmpk0nf9s2x/logs.bin
     """
-    def __init__(self, coord_type="xywh", input_path=None, dirname=None, **metadata):
+    def __init__(self, coord_type="xywh", input_path=None, dirname=None, stream_path=None, chunk_size=4096, **metadata):
         handleKeyError(lst=SUPPORTED_COORD_TYPES, coord_type=coord_type)
+        self.stream_path = stream_path
+        self.chunk_size = chunk_size
         self.init(input_path=input_path, coord_type=coord_type, **metadata)
         # Bounding Box Convertor.
         self.dirname = dirname
@@ -78,20 +135,295 @@ class BBoxLogger():
             self.logs["abs_path"] = os.path.abspath(input_path)
             self.logs["is_video"] = os.path.isfile(input_path)
         self.logs.update(metadata)
+        if self.stream_path is not None:
+            self.buffer = []
+            self.num_records = 0
+            bin_path, index_path = bbox_stream_paths(self.stream_path)
+            with open(bin_path, mode="wb"), open(index_path, mode="w") as f:
+                f.write(json.dumps({"dtype": BBOX_STREAM_DTYPE.descr}) + "\n")
+                f.write(json.dumps({"logs": self.logs}, cls=PythonCharmersJSONEncoder) + "\n")
 
     def add_bboxes(self, no, bboxes):
         """Add Bounding Boxes
         
         Args:
             no (int)      : Frame number.
-            bboxes (list) : List of bounding boxes.
+            bboxes (list) : List of bounding boxes. (``None`` means that the object is lost.)
         """
-        self.BBoxes[no] = bboxes
+        if self.stream_path is None:
+            self.BBoxes[no] = bboxes
+            return
+        if bboxes is None:
+            self.buffer.append((no, BBOX_STREAM_SINGLE, (np.nan,)*4))
+        elif len(bboxes)==0:
+            self.buffer.append((no, BBOX_STREAM_EMPTY, (np.nan,)*4))
+        elif bboxes[0] is not None and not hasattr(bboxes[0], "__iter__"):
+            self.buffer.append((no, BBOX_STREAM_SINGLE, tuple(bboxes)))
+        else:
+            self.buffer.extend([(no, i, (np.nan,)*4 if bbox is None else tuple(bbox)) for i,bbox in enumerate(bboxes)])
+        if len(self.buffer)>=self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Append the buffered bounding boxes to the stream, and index them."""
+        if self.stream_path is None or len(self.buffer)==0:
+            return
+        records = np.array(self.buffer, dtype=BBOX_STREAM_DTYPE)
+        bin_path, index_path = bbox_stream_paths(self.stream_path)
+        # Records first, so that the index never points to unwritten records.
+        with open(bin_path, mode="ab") as f:
+            f.write(records.tobytes())
+        with open(index_path, mode="a") as f:
+            f.write(json.dumps({
+                "offset": self.num_records,
+                "count": len(records),
+                "min_no": int(records["no"].min()),
+                "max_no": int(records["no"].max()),
+            }) + "\n")
+        self.num_records += len(records)
+        self.buffer = []
 
     def save(self, out_path=None):
         """Save the results"""
-        out_path = out_path or save_dir_create(dirname=self.dirname, image=False, video=False, json=True)[0]
-        self.logs["BBoxes"] = self.BBoxes
-        save_json(obj=self.logs, file=out_path)
+        if self.stream_path is not None:
+            self.flush()
+            out_path, index_path = bbox_stream_paths(self.stream_path)
+            with open(index_path, mode="a") as f:
+                f.write(json.dumps({"logs": self.logs}, cls=PythonCharmersJSONEncoder) + "\n")
+        else:
+            out_path = out_path or save_dir_create(dirname=self.dirname, image=False, video=False, json=True)[0]
+            self.logs["BBoxes"] = self.BBoxes
+            save_json(obj=self.logs, file=out_path)
         print(f"tracking info was saved at {toBLUE(out_path)}")
-        return out_path
\ No newline at end of file
+        return out_path
+
+class BBoxStreamReader():
+    """Read the bounding boxes stream written by :class:`BBoxLogger`.
+
+    Records are memory-mapped, and only the chunks whose frame numbers overlap with the requested range are read.
+
+    Args:
+        stream_path (str) : Path to the stream.
+
+    Attributes:
+        logs (dict)    : Metadata of the logs. (The latest one wins.)
+        chunks (list)  : Index of the chunks. Each element has ``offset``, ``count``, ``min_no``, and ``max_no``.
+        dtype (np.dtype) : The columns and types of the records. (Given in the index.)
+
+    Examples:
+        >>> import os, tempfile
+        >>> from pycharmers.opencv import BBoxLogger, BBoxStreamReader
+        >>> dirname = tempfile.mkdtemp()
+        >>> stream_logger = BBoxLogger(stream_path=os.path.join(dirname, "logs"), chunk_size=64)
+        >>> for no in range(1, 101):
+        ...     stream_logger.add_bboxes(no=no, bboxes=[(120,120,40,40), None])
+        >>> reader = BBoxStreamReader(stream_logger.save())
+        tracking info was saved at /tmp/tmpk0nf9s2x/logs.bin
+        >>> len(reader)
+        200
+        >>> reader.read(start=10, end=11)
+        {10: [[120, 120, 40, 40], None], 11: [[120, 120, 40, 40], None]}
+        >>> reader.to_json(os.path.join(dirname, "logs.json"))
+        tracking info was saved at /tmp/tmpk0nf9s2x/logs.json
+    """
+    def __init__(self, stream_path):
+        self.bin_path, self.index_path = bbox_stream_paths(stream_path)
+        self.logs = {}
+        self.chunks = []
+        self.dtype = None
+        with open(self.index_path, mode="r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line may be broken if the process was killed while writing.
+                    break
+                if "dtype" in entry:
+                    self.dtype = bbox_stream_dtype(entry["dtype"])
+                elif "logs" in entry:
+                    self.logs.update(entry["logs"])
+                else:
+                    self.chunks.append(entry)
+        if self.dtype is None:
+            raise ValueError(f"The index {toBLUE(self.index_path)} is corrupt. (It has no {toGREEN('dtype')} line.)")
+        num_records = sum(chunk["count"] for chunk in self.chunks)
+        self.records = np.memmap(self.bin_path, dtype=self.dtype, mode="r", shape=(num_records,)) if num_records>0 else np.empty(shape=(0,), dtype=self.dtype)
+
+    def __len__(self):
+        return len(self.records)
+
+    def read_records(self, start=None, end=None):
+        """Read the records whose frame numbers are in ``[start, end]``.
+
+        Args:
+            start (int) : The first frame number. (inclusive)
+            end (int)   : The last frame number. (inclusive)
+
+        Returns:
+            records (ndarray) : Structured array whose dtype is ``self.dtype``
+        """
+        start = -np.inf if start is None else start
+        end = np.inf if end is None else end
+        selected = []
+        for chunk in self.chunks:
+            if chunk["max_no"]<start or end<chunk["min_no"]:
+                continue
+            records = self.records[chunk["offset"]:chunk["offset"]+chunk["count"]]
+            if not (start<=chunk["min_no"] and chunk["max_no"]<=end):
+                records = records[(start<=records["no"]) & (records["no"]<=end)]
+            selected.append(np.asarray(records))
+        return np.concatenate(selected) if len(selected)>0 else np.empty(shape=(0,), dtype=self.dtype)
+
+    def read(self, start=None, end=None):
+        """Read the bounding boxes of frames in ``[start, end]`` in the same layout as ``BBoxes`` of :class:`BBoxLogger`.
+
+        Args:
+            start (int) : The first frame number. (inclusive)
+            end (int)   : The last frame number. (inclusive)
+
+        Returns:
+            BBoxes (dict) : Frame number -> bounding box(es).
+        """
+        BBoxes = {}
+        prev_no = prev_obj = None
+        for no, obj, bbox in self.read_records(start=start, end=end).tolist():
+            bbox = None if np.isnan(bbox[0]) else [int(e) if e.is_integer() else e for e in bbox]
+            if obj==BBOX_STREAM_SINGLE:
+                BBoxes[no] = bbox
+            elif obj==BBOX_STREAM_EMPTY:
+                BBoxes[no] = []
+            elif no==prev_no and prev_obj is not None and prev_obj<obj:
+                BBoxes[no].append(bbox)
+            else:
+                # Object ids restart from 0 for each call of ``add_bboxes`` (the later call wins.)
+                BBoxes[no] = [bbox]
+            prev_no, prev_obj = no, (obj if obj>=0 else None)
+        return BBoxes
+
+    def to_json(self, out_path=None):
+        """Convert the stream into the json layout of :meth:`BBoxLogger.save`.
+
+        Args:
+            out_path (str) : Path to the json file. Defaults to the stream path with ``.json`` extension.
+        """
+        out_path = out_path or os.path.splitext(self.bin_path)[0] + ".json"
+        save_json(obj=dict(self.logs, BBoxes=self.read()), file=out_path)
+        print(f"tracking info was saved at {toBLUE(out_path)}")
+        return out_path
+
+def track_video(path, bboxes, tracker="mil", coord_type="xywh", frame_no=1, out_path=None, dirname=None, stream=False, verbose=True, **metadata):
+    """Track objects in a video (or image directory) without any window.
+
+    Unlike :class:`TrackingWindow <pycharmers.opencv.windows.TrackingWindow>`, the tracker loop runs as fast as decoding allows,
+    and one tracker is created for each initial bounding box. The results are written through :class:`BBoxLogger`, and
+    the failure frames are also saved in the logs (``"failures"``).
+
+    Args:
+        path (str)        : Path to video file, or directory which stores sequential images.
+        bboxes (list)     : Initial bounding box(es) in ``coord_type`` coordinates.
+        tracker (str)     : The name of tracker. (see ``OPENCV_TRACKER_CREATORS``)
+        coord_type (str)  : Coordinate types of ``bboxes`` (and the results).
+        frame_no (int)    : The frame number (1-based) which ``bboxes`` indicate. Tracking starts from this frame.
+        out_path (str)    : Where to save the logs. If not specified, save them at ``save_dir_create(dirname)``.
+        dirname (str)     : The name of json file. Defaults to the basename of ``path``.
+        stream (bool)     : Whether to stream the logs into the columnar records instead of json. (see :class:`BBoxLogger` )
+        verbose (bool)    : Whether to print the summary.
+        metadata (dict)   : Additional metadata for logs.
+
+    Returns:
+        summary (dict) : ``path``, ``out_path``, ``num_frames``, ``sec``, ``fps``, and ``failures`` (frame numbers where each object was lost.)
+
+    Examples:
+        >>> from pycharmers.opencv import track_video, SAMPLE_VTEST_VIDEO
+        >>> summary = track_video(SAMPLE_VTEST_VIDEO, bboxes=[(595,195,50,120), (430,170,50,130)], tracker="mil", verbose=False)
+        >>> num_lost = [len(failures) for failures in summary["failures"]]
+    """
+    handleKeyError(lst=SUPPORTED_COORD_TYPES, coord_type=coord_type)
+    if not hasattr(bboxes[0], "__iter__"):
+        bboxes = [bboxes]
+    dirname = dirname or basenaming(path)
+    if stream:
+        out_path = out_path or save_dir_create(dirname=dirname, image=False, video=False, json=True)[0]
+        metadata["stream_path"] = os.path.splitext(out_path)[0]
+    logger = BBoxLogger(coord_type=coord_type, input_path=path, dirname=dirname, tracking_method=str(tracker), **metadata)
+    frames = mono_frame_generator(path, frame_no=frame_no-1)
+    frame = next(frames, None)
+    if frame is None:
+        raise ValueError(f"There is no frame No.{frame_no} in {toBLUE(path)}")
+    trackers = []
+    for bbox in bboxes:
+        t = tracker_create(tracker)
+        t.init(frame, tuple(int(e) for e in convert_coords(bbox, to_type="xywh", from_type=coord_type)))
+        trackers.append(t)
+    logger.add_bboxes(no=frame_no, bboxes=[list(bbox) for bbox in bboxes])
+
+    failures = [[] for _ in trackers]
+    num_frames = 1
+    s = time.perf_counter()
+    for no, frame in enumerate(frames, start=frame_no+1):
+        results = []
+        for i,t in enumerate(trackers):
+            track, bbox = t.update(frame)
+            if track:
+                results.append(list(convert_coords([int(e) for e in bbox], to_type=coord_type, from_type="xywh")))
+            else:
+                results.append(None)
+                failures[i].append(no)
+        logger.add_bboxes(no=no, bboxes=results)
+        num_frames += 1
+    sec = time.perf_counter() - s
+
+    fps = (num_frames-1)/sec if sec>0 else 0.
+    logger.logs.update({"fps": fps, "failures": failures})
+    out_path = logger.save(out_path=out_path)
+    if verbose:
+        print(f"{toGREEN(basenaming(path))}: {num_frames} frames, {fps:.1f}[fps], failures: {[len(e) for e in failures]}")
+    return {"path": path, "out_path": out_path, "num_frames": num_frames, "sec": sec, "fps": fps, "failures": failures}
+
+def _init_tracking_worker():
+    # Each process tracks one video at a time, so OpenCV's own threads only compete with the other processes.
+    cv2.setNumThreads(1)
+
+def track_videos(jobs, num_workers=None, **kwargs):
+    """Track objects in several videos in parallel with :func:`track_video`.
+
+    Args:
+        jobs (list)       : Each element is the keyword arguments of :func:`track_video` (``path``, ``bboxes``, ...)
+        num_workers (int) : The number of processes. If ``num_workers<=1``, videos are processed in this process.
+        kwargs (dict)     : Default keyword arguments for all jobs.
+
+    Returns:
+        summaries (list) : The summary of each job (in the same order as ``jobs``). If a job fails, its summary has ``"error"`` instead.
+
+    Examples:
+        >>> from pycharmers.opencv import track_videos
+        >>> jobs = [
+        ...     {"path": "path/to/video1.mp4", "bboxes": [(120,120,40,40)]},
+        ...     {"path": "path/to/video2.mp4", "bboxes": [(10,10,40,40), (60,60,40,40)]},
+        ... ]
+        >>> summaries = track_videos(jobs, num_workers=4, tracker="mil")
+    """
+    jobs = [dict(kwargs, **job) for job in jobs]
+    num_workers = num_workers or os.cpu_count() or 1
+    def collect(results):
+        summaries = []
+        for job,result in zip(jobs, results):
+            try:
+                summary = result()
+            except Exception as e:
+                summary = {"path": job.get("path"), "error": f"{e.__class__.__name__}: {e}"}
+                print(f"{toRED(str(job.get('path')))}: {summary['error']}")
+            summaries.append(summary)
+        return summaries
+    if num_workers<=1 or len(jobs)<=1:
+        return collect([functools.partial(track_video, **job) for job in jobs])
+    executor = ProcessPoolExecutor(max_workers=min(num_workers, len(jobs)), initializer=_init_tracking_worker)
+    futures = []
+    try:
+        futures = [executor.submit(track_video, **job) for job in jobs]
+        return collect([future.result for future in futures])
+    finally:
+        # Don't start the remaining videos if interrupted (e.g. KeyboardInterrupt.)
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
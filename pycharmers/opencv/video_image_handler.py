@@ -1,27 +1,1231 @@
 # coding: utf-8
+import bisect
+import collections
+import contextlib
+import hashlib
+import itertools
+import json
+import math
 import os
+import queue
 import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
 import warnings
-from typing import Optional, Tuple, Union
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import cv2
 import numpy as np
 
 from ..utils._colorings import toBLUE, toGREEN, toRED
-from ..utils.generic_utils import calc_rectangle_size, handleKeyError, now_str
+from ..utils.generic_utils import handleKeyError, handleTypeError, now_str
 from ..utils.print_utils import pretty_3quote
-from ._cvpath import save_dir_create
-from .editing import hconcat_resize_min, vconcat_resize_min
+from ._cvpath import PYCHARMERS_OPENCV_FRAME_CACHE_DIR, PYCHARMERS_OPENCV_META_DIR, save_dir_create
+from .editing import GridCompositor
 
-IMAGE_FILE_PATTERN = r".*\.(jpg|png|bmp|jpeg)"
+IMAGE_FILE_PATTERN = r".*\.(jpg|png|bmp|jpeg)$"
+VIDEOCODEC2FFMPEG = {
+    "VP80": "libvpx",
+    "MP4S": "mpeg4",
+    "MP4V": "mpeg4",
+    "mp4v": "mpeg4",
+    "H264": "libx264",
+    "X264": "libx264",
+    "DIV3": "msmpeg4",
+    "DIVX": "mpeg4",
+    "IYUV": "rawvideo",
+    "MJPG": "mjpeg",
+    "XVID": "libxvid",
+    "THEO": "libtheora",
+    "H263": "h263",
+    "avc1": "libx264",
+}
+# Encoders which ignore ``-crf`` , and default to a low bitrate (200 kb/s) without ``-q:v`` .
+FFMPEG_DEFAULT_QSCALES = {
+    "mpeg4": 3,
+    "msmpeg4": 3,
+    "libxvid": 3,
+    "h263": 3,
+    "mjpeg": 3,
+}
+# Encoders which reject ``yuv420p`` .
+FFMPEG_DEFAULT_PIX_FMTS = {
+    "mjpeg": "yuvj420p",
+    "png": "rgb24",
+    "libx264rgb": "bgr24",
+}
+# Pixel formats whose chroma planes are subsampled, so the width/height must be a multiple of them.
+FFMPEG_CHROMA_SUBSAMPLINGS = {
+    "yuv420p": (2, 2),
+    "yuvj420p": (2, 2),
+    "nv12": (2, 2),
+    "nv21": (2, 2),
+    "yuv422p": (2, 1),
+    "yuvj422p": (2, 1),
+}
+FRAME_CACHE_MAX_BYTES = 8 * 1024 ** 3
+IMAGE_READ_REDUCED_FLAGS = {
+    (flags, scale): getattr(cv2, f"IMREAD_REDUCED_{mode}_{scale}")
+    for flags, mode in [(cv2.IMREAD_COLOR, "COLOR"), (cv2.IMREAD_GRAYSCALE, "GRAYSCALE")]
+    for scale in [2, 4, 8]
+}
 
 
-def mono_frame_generator(path, frame_no=0):
+def image_file_pattern(extensions: Optional[Iterable[str]] = None) -> str:
+    """Create a pattern of image filenames like ``IMAGE_FILE_PATTERN`` . (Match it with ``re.IGNORECASE`` .)
+
+    Args:
+        extensions (Optional[Iterable[str]]) : Extensions to be matched. If ``None`` , returns ``IMAGE_FILE_PATTERN`` .
+
+    Returns:
+        str: The pattern.
+
+    Examples:
+        >>> from pycharmers.opencv import image_file_pattern
+        >>> image_file_pattern(["png", ".PNG", "tiff"])
+        '.*\\.(png|tiff)$'
+    """
+    if extensions is None:
+        return IMAGE_FILE_PATTERN
+    extensions = list(dict.fromkeys(ext.lstrip(".").lower() for ext in extensions))
+    return r".*\." + "(" + "|".join(re.escape(ext) for ext in extensions) + ")$"
+
+
+def _demux_packets(path: str) -> Tuple[Optional[np.ndarray], Optional[List[int]]]:
+    """Demux raw packets (no decoding) and get the timestamps and keyframes in presentation order.
+
+    Args:
+        path (str) : ``path/to/video.mp4``
+
+    Returns:
+        Tuple[Optional[np.ndarray], Optional[List[int]]]: Timestamps [ms] and indices of the keyframes. (``None`` if the backend does not support it.)
+    """
+    if not hasattr(cv2, "CAP_PROP_LRF_HAS_KEY_FRAME"):
+        return None, None
+    cap = cv2.VideoCapture(path, cv2.CAP_FFMPEG, [cv2.CAP_PROP_FORMAT, -1])
+    pts, is_key = [], []
+    while cap.isOpened() and cap.grab():
+        pts.append(cap.get(cv2.CAP_PROP_POS_MSEC))
+        is_key.append(bool(cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME)))
+    cap.release()
+    if len(pts) == 0 or not any(is_key):
+        return None, None
+    # Packets are in decoding order, so rank each packet by its timestamp.
+    order = np.argsort(pts, kind="stable")
+    ranks = np.empty_like(order)
+    ranks[order] = np.arange(len(order))
+    timestamps = np.asarray(pts, dtype=float)[order]
+    keyframes = sorted(int(ranks[i]) for i, k in enumerate(is_key) if k)
+    return timestamps, keyframes
+
+
+def _probe_video(path: str) -> Dict[str, Any]:
+    """Get the metadata from the container header. (No pass over the file, but ``num_frames`` may be wrong.)"""
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    num_frames = max(0, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+    meta = {
+        "num_frames": num_frames,
+        "fps": fps,
+        "duration": num_frames / (fps or 1),
+        "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+    }
+    cap.release()
+    return meta
+
+
+def _scan_video(path: str) -> Dict[str, Any]:
+    """Scan a video file in one pass and get the exact metadata."""
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    timestamps, keyframes = _demux_packets(path)
+    if timestamps is None:
+        # NOTE: Fall back to grabbing (decoding) all frames.
+        pts = []
+        while cap.grab():
+            pts.append(cap.get(cv2.CAP_PROP_POS_MSEC))
+        timestamps = np.asarray(pts, dtype=float)
+    cap.release()
+    num_frames = len(timestamps)
+    if num_frames > 1 and timestamps[-1] > timestamps[0]:
+        duration = (timestamps[-1] - timestamps[0]) / 1e3 + 1 / (fps or 1)
+    else:
+        duration = num_frames / (fps or 1)
+    return {
+        "num_frames": num_frames,
+        "fps": fps,
+        "duration": duration,
+        "width": width,
+        "height": height,
+        "timestamps": timestamps,
+        "keyframes": keyframes,
+    }
+
+
+def _scan_image_dir(path: str) -> Dict[str, Any]:
+    """Scan an image directory and get the metadata."""
+    fnames = ImageDirFrameSource.listdir(path)
+    height = width = 0
+    if len(fnames) > 0:
+        img = cv2.imread(os.path.join(path, fnames[0]), cv2.IMREAD_UNCHANGED)
+        if img is not None:
+            height, width = img.shape[:2]
+    return {
+        "num_frames": len(fnames),
+        "fps": None,
+        "duration": None,
+        "width": width,
+        "height": height,
+        "timestamps": None,
+        "keyframes": None,
+    }
+
+
+@contextlib.contextmanager
+def _atomic_open(path: str, mode: str = "w") -> Iterator[Any]:
+    """Write to a temporary file next to ``path`` , and replace ``path`` with it when done.
+
+    Args:
+        path (str) : The destination.
+        mode (str) : ``"w"`` or ``"wb"`` .
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def get_frame_metadata(path: str, timestamps: bool = False, cache: bool = True, exact: bool = True) -> Dict[str, Any]:
+    """Get the exact metadata of a video file or an image directory.
+
+    ``CAP_PROP_FRAME_COUNT`` is often wrong for VFR or badly muxed files, so the frames are counted by demuxing raw packets (no decoding.)
+    The result is cached in ``PYCHARMERS_OPENCV_META_DIR`` ( ``~/.pycharmers/opencv/meta`` ) keyed by the path, size and modification time,
+    so later calls (even in other processes) return instantly. With OpenCV<4.6, which can't demux packets, counting the frames
+    decodes the whole video, so pass ``exact=False`` when the header values are enough (ex. for a progress bar.)
+
+    Args:
+        path (str)        : ``path/to/images/directory`` or ``path/to/video.mp4``
+        timestamps (bool) : Whether to also return the per-frame ``timestamps`` [ms] and ``keyframes`` . Defaults to ``False`` .
+        cache (bool)      : Whether to use (and update) the cache. Defaults to ``True`` .
+        exact (bool)      : Whether to scan the video if it is not cached. If ``False`` , ``CAP_PROP_FRAME_COUNT`` is returned instead. Defaults to ``True`` .
+
+    Returns:
+        Dict[str, Any]: Metadata. ( ``num_frames`` , ``fps`` , ``duration`` [s], ``width`` , ``height`` (, ``timestamps`` , ``keyframes`` ) )
+
+    Examples:
+        >>> from pycharmers.opencv import get_frame_metadata, SAMPLE_VTEST_VIDEO
+        >>> meta = get_frame_metadata(SAMPLE_VTEST_VIDEO)
+        >>> meta["num_frames"], meta["fps"], meta["width"], meta["height"]
+        (795, 10.0, 768, 576)
+    """
+    abspath = os.path.abspath(path)
+    stat = os.stat(abspath)
+    key = {"path": abspath, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    fn = os.path.join(PYCHARMERS_OPENCV_META_DIR, hashlib.sha1(abspath.encode("utf-8")).hexdigest())
+    if cache and os.path.exists(fn + ".json"):
+        try:
+            with open(fn + ".json") as f:
+                meta = json.load(f)
+            if all(meta.get(k) == v for k, v in key.items()):
+                if not timestamps:
+                    return meta
+                if os.path.isfile(abspath) and os.path.exists(fn + ".npz"):
+                    with np.load(fn + ".npz") as index:
+                        # The index may have been written for another version of the file.
+                        if all(index[k].item() == v for k, v in key.items()):
+                            keyframes = index["keyframes"].tolist() if index["has_keyframes"] else None
+                            meta.update({"timestamps": index["timestamps"], "keyframes": keyframes})
+                            return meta
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            pass
+    if os.path.isfile(abspath) and not (exact or timestamps):
+        return dict(_probe_video(abspath), **key)
+    if os.path.isfile(abspath):
+        meta = _scan_video(abspath)
+    else:
+        meta = _scan_image_dir(abspath)
+    index = {"timestamps": meta.pop("timestamps"), "keyframes": meta.pop("keyframes")}
+    meta.update(key)
+    if cache:
+        try:
+            # Readers in other processes must never see half-written files, and the index is written
+            # before the metadata which refers to it.
+            if index["timestamps"] is not None:
+                with _atomic_open(fn + ".npz", mode="wb") as f:
+                    np.savez(
+                        f,
+                        timestamps=index["timestamps"],
+                        keyframes=np.asarray(index["keyframes"] or [], dtype=int),
+                        has_keyframes=index["keyframes"] is not None,
+                        **key,
+                    )
+            with _atomic_open(fn + ".json", mode="w") as f:
+                json.dump(meta, f)
+        except OSError as e:
+            warnings.warn(f"Could not cache the metadata of {toBLUE(path)}: {toRED(e)}")
+    if timestamps:
+        meta.update(index)
+    return meta
+
+
+class FrameSource:
+    """Random-access frames in a video file or an image directory.
+
+    Unlike the generators (:func:`mono_frame_generator <pycharmers.opencv.video_image_handler.mono_frame_generator>` etc.),
+    which can only stream forward, ``FrameSource`` supports ``len()`` , indexing ( ``source[i]`` ) and slicing ( ``source[i:j:k]`` ).
+    Use :func:`FrameSourceCreate <pycharmers.opencv.video_image_handler.FrameSourceCreate>` to create a suitable instance.
+
+    Args:
+        path (str) : ``path/to/images/directory`` or ``path/to/video.mp4``
+
+    Attributes:
+        is_video (bool) : Whether ``path`` is a video file or not.
+    """
+
+    is_video: bool = False
+    fps: float = 30.0
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def read(self, no: int) -> Optional[np.ndarray]:
+        """Read the ``no`` th frame (0-based index.)
+
+        Args:
+            no (int) : Index of the frame.
+
+        Returns:
+            Optional[np.ndarray]: The frame, or ``None`` if it could not be read.
+        """
+        raise NotImplementedError
+
+    def index_at(self, sec: float) -> int:
+        """Get the index of the first frame at or after ``sec`` .
+
+        Args:
+            sec (float) : Time from the beginning. [s]
+
+        Returns:
+            int: Index of the frame.
+        """
+        return max(0, math.ceil(sec * self.fps - 1e-6))
+
+    def iter_frames(self, indices: Iterable[int]) -> Iterator[Optional[np.ndarray]]:
+        """Read the frames at ``indices`` in order.
+
+        Args:
+            indices (Iterable[int]) : Indices of the frames.
+
+        Yields:
+            Optional[np.ndarray]: The frame, or ``None`` if it could not be read.
+        """
+        for no in indices:
+            yield self.read(no)
+
+    def __getitem__(self, key: Union[int, slice]):
+        if isinstance(key, slice):
+            return FrameSourceView(source=self, key=key)
+        handleTypeError(types=[int, np.integer], key=key)
+        num_frames = len(self)
+        no = key + num_frames if key < 0 else key
+        if not (0 <= no < num_frames):
+            raise IndexError(
+                f"{toGREEN('index')} out of range. ({toRED(key)} for {toGREEN(num_frames)} frames)"
+            )
+        frame = self.read(no)
+        if frame is None:
+            raise IndexError(f"Could not read the {toRED(no)}th frame from {toBLUE(self.path)}")
+        return frame
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def release(self):
+        """Do the necessary processing at the end."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+class FrameSourceView:
+    """Lazy slice of :class:`FrameSource <pycharmers.opencv.video_image_handler.FrameSource>` .
+
+    Frames are read in order only when they are iterated over, so that the parent source can decode them sequentially.
+
+    Args:
+        source (FrameSource) : The parent frame source.
+        key (slice)          : The slice.
+    """
+
+    def __init__(self, source: FrameSource, key: slice):
+        self.source = source
+        self.indices = range(*key.indices(len(source)))
+        # NOTE: ``CAP_PROP_FRAME_COUNT`` may be smaller than the actual number of frames.
+        self.open_ended = source.is_video and (key.stop is None) and (self.indices.step > 0)
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, key: Union[int, slice]):
+        if isinstance(key, slice):
+            indices = self.indices[key]
+            return FrameSourceView(
+                source=self.source, key=slice(indices.start, indices.stop, indices.step)
+            )
+        return self.source[self.indices[key]]
+
+    def __iter__(self):
+        indices = self.indices
+        if self.open_ended:
+            indices = itertools.count(start=indices.start, step=indices.step)
+        for frame in self.source.iter_frames(indices):
+            if frame is None:
+                if self.source.is_video:
+                    break
+                continue
+            yield frame
+
+
+class VideoFrameSource(FrameSource):
+    """Random-access frames in a video file.
+
+    A ``cv2.VideoCapture`` is kept open during the lifetime of the instance. When a frame is requested,
+
+    - If it is ahead of the current position and there is no keyframe in between, frames are skipped with ``grab()`` (no seek).
+    - Otherwise, the capture seeks to the nearest preceding keyframe and decodes forward.
+
+    The keyframe/timestamp index is built by demuxing raw packets (no decoding) at the first random access.
+
+    Args:
+        path (str)            : ``path/to/video.mp4``
+        index (bool)          : Whether to build the keyframe/timestamp index at the first random access. Defaults to ``True``.
+        seek_threshold (int)  : If there is no index, skip frames with ``grab()`` instead of seeking when the requested frame is at most this number of frames ahead. Defaults to ``30``.
+
+    Attributes:
+        cap (cv2.VideoCapture)           : Persistent capture.
+        pos (int)                        : Index of the frame to be decoded by the next ``cap.read()``
+        fps (float)                      : Frames Per Second.
+        keyframes (Optional[List[int]])  : Indices of the keyframes.
+        timestamps (Optional[np.ndarray]): Presentation timestamps of all frames. [ms]
+    """
+
+    is_video: bool = True
+
+    def __init__(self, path: str, index: bool = True, seek_threshold: int = 30):
+        super().__init__(path)
+        self.cap = cv2.VideoCapture(path)
+        # NOTE: The video is scanned only when random access needs the index. (Iteration doesn't stop at ``num_frames`` .)
+        meta = get_frame_metadata(path, exact=False)
+        self.fps = meta["fps"]
+        self.num_frames = meta["num_frames"]
+        self.index = index
+        self.seek_threshold = seek_threshold
+        self.pos = 0
+        self.keyframes = None
+        self.timestamps = None
+
+    def __len__(self) -> int:
+        return self.num_frames
+
+    def build_index(self) -> Optional[List[int]]:
+        """Build the keyframe/timestamp index in one pass.
+
+        Packets are demuxed without decoding ( ``CAP_PROP_FORMAT=-1`` ), so this is much faster than reading all frames.
+        Since packets are in decoding order, each packet is ranked by its timestamp to get the index in presentation order.
+        The index is cached by :func:`get_frame_metadata <pycharmers.opencv.video_image_handler.get_frame_metadata>` .
+        If the backend does not support it, ``keyframes`` remains ``None`` and the capture seeks on its own.
+
+        Returns:
+            Optional[List[int]]: Indices of the keyframes.
+        """
+        if not hasattr(cv2, "CAP_PROP_LRF_HAS_KEY_FRAME"):
+            # NOTE: Indexing would decode the whole video.
+            return None
+        meta = get_frame_metadata(self.path, timestamps=True)
+        if meta["keyframes"] is None:
+            return None
+        self.timestamps = meta["timestamps"]
+        self.keyframes = meta["keyframes"]
+        self.num_frames = meta["num_frames"]
+        return self.keyframes
+
+    def nearest_keyframe(self, no: int) -> int:
+        """Get the index of the nearest keyframe at or before the ``no`` th frame.
+
+        Args:
+            no (int) : Index of the frame.
+
+        Returns:
+            int: Index of the keyframe. (If there is no index, ``no`` itself.)
+        """
+        if self.keyframes is None:
+            return no
+        return self.keyframes[max(0, bisect.bisect_right(self.keyframes, no) - 1)]
+
+    def index_at(self, sec: float) -> int:
+        if self.index and (self.timestamps is None):
+            self.index = False  # Build only once.
+            self.build_index()
+        if self.timestamps is None:
+            return super().index_at(sec)
+        return int(np.searchsorted(self.timestamps - self.timestamps[0], sec * 1e3 - 1e-3, side="left"))
+
+    def timestamp(self, no: int) -> float:
+        """Get the presentation timestamp of the ``no`` th frame. [ms]"""
+        if self.timestamps is not None and 0 <= no < len(self.timestamps):
+            return float(self.timestamps[no])
+        return no * 1e3 / (self.fps or 1)
+
+    def read(self, no: int) -> Optional[np.ndarray]:
+        if no < 0:
+            return None
+        if self.index and (self.keyframes is None) and (no != self.pos):
+            self.index = False  # Build only once.
+            self.build_index()
+        keyframe = self.nearest_keyframe(no)
+        if self.keyframes is None:
+            is_forward = 0 <= no - self.pos <= self.seek_threshold
+        else:
+            is_forward = keyframe <= self.pos <= no
+        if not is_forward:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, keyframe)
+            self.pos = keyframe
+        while self.pos < no:
+            if not self.cap.grab():
+                return None
+            self.pos += 1
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        self.pos += 1
+        return frame
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageDirFrameSource(FrameSource):
+    """Random-access frames in an image directory.
+
+    The sorted listing of the image files (matching ``pattern`` ) is cached per directory,
+    and re-listed only when the modification time of the directory changes.
+    If ``num_workers>0`` , frames are decoded by a thread pool ( ``cv2.imread`` releases the GIL) while iterating, but still yielded in order.
+
+    Args:
+        path (str)                 : ``path/to/images/directory``
+        flags (int)                : Flags for ``cv2.imread`` . Defaults to ``cv2.IMREAD_COLOR`` .
+        num_workers (int)          : The number of decoding threads. If ``0`` , decode in the calling thread. Defaults to ``0``.
+        extensions (Optional[list]): Extensions of the images. (See :func:`image_file_pattern <pycharmers.opencv.video_image_handler.image_file_pattern>` )
+        reduce (int)               : Read images at ``1/reduce`` resolution ( ``cv2.IMREAD_REDUCED_*`` ). Choose from ``1`` , ``2`` , ``4`` , ``8`` . Defaults to ``1``.
+
+    Attributes:
+        fnames (List[str]) : Sorted filenames of the images.
+        fps (float)        : Frames Per Second assumed when the images are treated as a video. ( ``30.0`` )
+    """
+
+    _listdir_cache: Dict[Tuple[str, str], Tuple[int, List[str]]] = {}
+
+    def __init__(
+        self,
+        path: str,
+        flags: int = cv2.IMREAD_COLOR,
+        num_workers: int = 0,
+        extensions: Optional[List[str]] = None,
+        reduce: int = 1,
+    ):
+        super().__init__(path)
+        handleKeyError(lst=[1, 2, 4, 8], reduce=reduce)
+        if reduce > 1:
+            handleKeyError(lst=[cv2.IMREAD_COLOR, cv2.IMREAD_GRAYSCALE], flags=flags)
+            flags = IMAGE_READ_REDUCED_FLAGS[(flags, reduce)]
+        self.flags = flags
+        self.num_workers = num_workers
+        self.pattern = image_file_pattern(extensions)
+        self.fnames = self.listdir(path, pattern=self.pattern)
+
+    @classmethod
+    def listdir(cls, path: str, pattern: str = IMAGE_FILE_PATTERN) -> List[str]:
+        """Get the sorted filenames of the images in ``path`` . (cached)
+
+        Args:
+            path (str)    : ``path/to/images/directory``
+            pattern (str) : Pattern of the filenames. Defaults to ``IMAGE_FILE_PATTERN`` .
+
+        Returns:
+            List[str]: Sorted filenames.
+        """
+        abspath = os.path.abspath(path)
+        mtime = os.stat(abspath).st_mtime_ns
+        cached_mtime, fnames = cls._listdir_cache.get((abspath, pattern), (None, None))
+        if cached_mtime != mtime:
+            fnames = sorted(
+                fn for fn in os.listdir(abspath) if re.search(pattern, fn, re.IGNORECASE)
+            )
+            cls._listdir_cache[(abspath, pattern)] = (mtime, fnames)
+        return fnames
+
+    def __len__(self) -> int:
+        return len(self.fnames)
+
+    def read(self, no: int) -> Optional[np.ndarray]:
+        if not (0 <= no < len(self.fnames)):
+            return None
+        return cv2.imread(os.path.join(self.path, self.fnames[no]), self.flags)
+
+    def iter_frames(self, indices: Iterable[int]) -> Iterator[Optional[np.ndarray]]:
+        if self.num_workers <= 0:
+            yield from super().iter_frames(indices)
+            return
+        # Keep a bounded number of frames in flight, and yield them in submission order.
+        executor = ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="imread")
+        futures = collections.deque()
+        try:
+            for no in indices:
+                futures.append(executor.submit(self.read, no))
+                if len(futures) >= 2 * self.num_workers:
+                    yield futures.popleft().result()
+            while futures:
+                yield futures.popleft().result()
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+
+class MemmapFrameSource(FrameSource):
+    """Random-access frames in a video file, decoded only once into an on-disk ``numpy.memmap`` .
+
+    At the first time, all frames are decoded (optionally downscaled or converted to grayscale) into
+    ``<cache_dir>/<key>.dat`` with a small JSON header ( ``<key>.json`` ). After that, frames are read from the cache
+    without decoding or copying (the returned frames are read-only views.) The cache is rebuilt when the size or
+    modification time of the video changes, and the least recently used caches are evicted so that the total size
+    of the caches is at most ``max_bytes`` . (See :func:`evict_frame_cache <pycharmers.opencv.video_image_handler.evict_frame_cache>` )
+
+    Args:
+        path (str)        : ``path/to/video.mp4``
+        scale (float)     : Scale factor of the cached frames. Defaults to ``1.0``.
+        grayscale (bool)  : Whether to cache grayscale frames. ( ``shape=(N,H,W)`` ) Defaults to ``False``.
+        max_bytes (int)   : The maximum total size of the caches. Defaults to ``FRAME_CACHE_MAX_BYTES`` (8GB).
+        cache_dir (str)   : Where to store the caches. Defaults to ``PYCHARMERS_OPENCV_FRAME_CACHE_DIR`` .
+
+    Attributes:
+        frames (np.memmap) : Cached frames. ( ``shape=(N,H,W,3)`` or ``(N,H,W)`` )
+        header (dict)      : The JSON header.
+        fps (float)        : Frames Per Second.
+
+    Examples:
+        >>> from pycharmers.opencv import MemmapFrameSource, SAMPLE_VTEST_VIDEO
+        >>> source = MemmapFrameSource(SAMPLE_VTEST_VIDEO, scale=0.5)
+        >>> source.frames.shape
+        (795, 288, 384, 3)
+        >>> source[100].flags.writeable
+        False
+    """
+
+    is_video: bool = True
+
+    def __init__(
+        self,
+        path: str,
+        scale: float = 1.0,
+        grayscale: bool = False,
+        max_bytes: int = FRAME_CACHE_MAX_BYTES,
+        cache_dir: str = PYCHARMERS_OPENCV_FRAME_CACHE_DIR,
+    ):
+        super().__init__(path)
+        self.scale = scale
+        self.grayscale = grayscale
+        abspath = os.path.abspath(path)
+        key = hashlib.sha1(f"{abspath}:{scale}:{grayscale}".encode("utf-8")).hexdigest()
+        self.cache_path = os.path.join(cache_dir, key)
+        stat = os.stat(abspath)
+        source_key = {"path": abspath, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        header = self._load_header(source_key)
+        if header is None:
+            evict_frame_cache(max_bytes=max_bytes, cache_dir=cache_dir, reserve=self._estimate_bytes(path))
+            header = self._build(source_key)
+        os.utime(self.cache_path + ".json")  # Mark as recently used.
+        self.header = header
+        self.fps = header["fps"]
+        self.frames = np.memmap(
+            self.cache_path + ".dat", dtype=np.uint8, mode="r", shape=tuple(header["shape"])
+        )
+
+    def _load_header(self, source_key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.cache_path + ".json") as f:
+                header = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if any(header.get(k) != v for k, v in source_key.items()):
+            return None
+        if not os.path.exists(self.cache_path + ".dat"):
+            return None
+        return header
+
+    def _frame_shape(self, width: int, height: int) -> Tuple[int, ...]:
+        if self.scale != 1:
+            width, height = max(1, round(width * self.scale)), max(1, round(height * self.scale))
+        return (height, width) if self.grayscale else (height, width, 3)
+
+    def _estimate_bytes(self, path: str) -> int:
+        meta = get_frame_metadata(path, exact=False)
+        return meta["num_frames"] * int(np.prod(self._frame_shape(meta["width"], meta["height"])))
+
+    def _build(self, source_key: Dict[str, Any]) -> Dict[str, Any]:
+        meta = get_frame_metadata(self.path, exact=False)
+        shape = self._frame_shape(meta["width"], meta["height"])
+        num_frames = 0
+        tmp_path = self.cache_path + ".dat.tmp"
+        # Frames are appended in one decoding pass, so the header count (which may be wrong) is not needed.
+        buffer = np.empty(shape=shape, dtype=np.uint8)
+        with open(tmp_path, mode="wb") as f, VideoFrameSource(self.path, index=False) as source:
+            for frame in source:
+                if self.grayscale:
+                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                if frame.shape != shape:
+                    frame = cv2.resize(frame, dsize=shape[1::-1], dst=buffer, interpolation=cv2.INTER_AREA)
+                f.write(np.ascontiguousarray(frame).data)
+                num_frames += 1
+        os.replace(tmp_path, self.cache_path + ".dat")
+        header = dict(
+            source_key,
+            shape=[num_frames, *shape],
+            fps=meta["fps"],
+            scale=self.scale,
+            grayscale=self.grayscale,
+        )
+        with open(self.cache_path + ".json", mode="w") as f:
+            json.dump(header, f)
+        return header
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def read(self, no: int) -> Optional[np.ndarray]:
+        if not (0 <= no < len(self.frames)):
+            return None
+        return self.frames[no]
+
+    def release(self):
+        # NOTE: The file is unmapped when all frames (views) are garbage collected.
+        self.frames = np.empty(shape=(0,) + self.frames.shape[1:], dtype=np.uint8)
+
+
+def evict_frame_cache(
+    max_bytes: int = FRAME_CACHE_MAX_BYTES, cache_dir: str = PYCHARMERS_OPENCV_FRAME_CACHE_DIR, reserve: int = 0
+) -> List[str]:
+    """Evict the least recently used decoded-frame caches. (See :class:`MemmapFrameSource <pycharmers.opencv.video_image_handler.MemmapFrameSource>` )
+
+    Caches whose source video no longer exists are evicted first.
+
+    Args:
+        max_bytes (int) : The maximum total size of the caches. Defaults to ``FRAME_CACHE_MAX_BYTES`` (8GB).
+        cache_dir (str) : Where the caches are stored. Defaults to ``PYCHARMERS_OPENCV_FRAME_CACHE_DIR`` .
+        reserve (int)   : The size to be left free for a new cache. Defaults to ``0``.
+
+    Returns:
+        List[str]: The evicted source paths.
+    """
+    entries = []
+    for fn in os.listdir(cache_dir):
+        root, ext = os.path.splitext(fn)
+        if ext != ".json":
+            continue
+        json_path = os.path.join(cache_dir, fn)
+        dat_path = os.path.join(cache_dir, root + ".dat")
+        try:
+            with open(json_path) as f:
+                source_path = json.load(f).get("path", "")
+            size = os.path.getsize(dat_path) if os.path.exists(dat_path) else 0
+            last_used = os.stat(json_path).st_mtime
+        except (OSError, ValueError):
+            continue
+        entries.append((os.path.exists(source_path), last_used, size, json_path, dat_path, source_path))
+    total = sum(e[2] for e in entries)
+    evicted = []
+    for _, _, size, json_path, dat_path, source_path in sorted(entries):
+        if total + reserve <= max_bytes and os.path.exists(source_path):
+            break
+        for p in [json_path, dat_path]:
+            if os.path.exists(p):
+                os.remove(p)
+        total -= size
+        evicted.append(source_path)
+    return evicted
+
+
+def FrameSourceCreate(path: str, cache: bool = False, **kwargs) -> FrameSource:
+    """Create a random-access frame source.
+
+    Args:
+        path (str)   : ``path/to/images/directory`` or ``path/to/video.mp4``
+        cache (bool) : Whether to read the frames of a video from the decoded-frame cache. (:class:`MemmapFrameSource <pycharmers.opencv.video_image_handler.MemmapFrameSource>` ) Defaults to ``False``.
+        kwargs       : Keyword arguments for :class:`VideoFrameSource <pycharmers.opencv.video_image_handler.VideoFrameSource>` , ``MemmapFrameSource`` or :class:`ImageDirFrameSource <pycharmers.opencv.video_image_handler.ImageDirFrameSource>` .
+
+    Returns:
+        FrameSource: An instance of ``VideoFrameSource`` / ``MemmapFrameSource`` (if ``path`` is a file) or ``ImageDirFrameSource`` .
+
+    Examples:
+        >>> from pycharmers.opencv import FrameSourceCreate, SAMPLE_VTEST_VIDEO
+        >>> source = FrameSourceCreate(SAMPLE_VTEST_VIDEO)
+        >>> len(source)
+        795
+        >>> source[100].shape
+        (576, 768, 3)
+        >>> for frame in source[-3:]:
+        ...     print(frame.shape)
+        (576, 768, 3)
+        (576, 768, 3)
+        (576, 768, 3)
+        >>> source.release()
+    """
+    if os.path.isfile(path):
+        if cache:
+            return MemmapFrameSource(path, **kwargs)
+        return VideoFrameSource(path, **kwargs)
+    return ImageDirFrameSource(path, **kwargs)
+
+
+class FramePrefetcher:
+    """Decode frames on a background thread into a bounded queue.
+
+    Since OpenCV releases the GIL while decoding, decoding the next frames overlaps with processing the current one.
+    The thread stops when all frames are consumed, when :meth:`close <pycharmers.opencv.video_image_handler.FramePrefetcher.close>`
+    is called, or when the iteration exits early (``break`` ).
+
+    Args:
+        frames (iterable) : Frames to be prefetched. (ex. ``generator`` )
+        maxsize (int)     : The maximum number of prefetched frames. Defaults to ``8``.
+
+    Attributes:
+        stats (dict) : Queue counters.
+
+            - ``produced``    : The number of decoded frames.
+            - ``consumed``    : The number of frames passed to the consumer.
+            - ``starved``     : How many times the consumer waited for an empty queue. (Decoding is the bottleneck.)
+            - ``starved_sec`` : The total time the consumer waited. [s]
+            - ``blocked``     : How many times the decoder waited for a full queue. (Processing is the bottleneck.)
+            - ``blocked_sec`` : The total time the decoder waited. [s]
+
+    Examples:
+        >>> from pycharmers.opencv import FramePrefetcher, mono_frame_generator, SAMPLE_VTEST_VIDEO
+        >>> frames = FramePrefetcher(mono_frame_generator(SAMPLE_VTEST_VIDEO), maxsize=16)
+        >>> for frame in frames:
+        ...     pass
+        >>> frames.stats["produced"] == frames.stats["consumed"]
+        True
+        >>> bottleneck = "decoding" if frames.stats["starved_sec"] > frames.stats["blocked_sec"] else "processing"
+    """
+
+    _SENTINEL = object()
+
+    def __init__(self, frames, maxsize: int = 8):
+        self.queue = queue.Queue(maxsize=max(1, maxsize))
+        self.stop_event = threading.Event()
+        self.exception = None
+        self.stats = dict.fromkeys(["produced", "consumed", "starved", "starved_sec", "blocked", "blocked_sec"], 0)
+        self.thread = threading.Thread(target=self._produce, args=(frames,), daemon=True)
+        self.thread.start()
+
+    def _put(self, item) -> bool:
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.stats["blocked"] += 1
+        start = time.perf_counter()
+        while not self.stop_event.is_set():
+            try:
+                self.queue.put(item, timeout=0.05)
+                self.stats["blocked_sec"] += time.perf_counter() - start
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self, frames):
+        try:
+            for frame in frames:
+                if not self._put(frame):
+                    break
+                self.stats["produced"] += 1
+        except Exception as e:
+            self.exception = e
+        finally:
+            if hasattr(frames, "close"):
+                frames.close()
+            self._put(self._SENTINEL)
+
+    def __iter__(self):
+        try:
+            while True:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    self.stats["starved"] += 1
+                    start = time.perf_counter()
+                    item = self.queue.get()
+                    self.stats["starved_sec"] += time.perf_counter() - start
+                if item is self._SENTINEL:
+                    break
+                self.stats["consumed"] += 1
+                yield item
+            if self.exception is not None:
+                raise self.exception
+        finally:
+            self.close()
+
+    def close(self):
+        """Stop the background thread and discard the prefetched frames."""
+        self.stop_event.set()
+        while self.thread.is_alive():
+            try:
+                while True:
+                    self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.thread.join(timeout=0.05)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def describe(self):
+        """Describe the queue counters."""
+        stats = self.stats
+        print(
+            *pretty_3quote(
+                f"""
+        [{toGREEN("FramePrefetcher")}] (maxsize={self.queue.maxsize})
+        * Consumed frames        : {toGREEN(stats['consumed'])}/{toGREEN(stats['produced'])}
+        * Waited for decoding    : {toGREEN(stats['starved'])} times ({toGREEN(f"{stats['starved_sec']:.3f}")}[s])
+        * Waited for processing  : {toGREEN(stats['blocked'])} times ({toGREEN(f"{stats['blocked_sec']:.3f}")}[s])
+        """
+            )
+        )
+
+
+class AsyncVideoWriter:
+    """Encode frames on a background thread through a bounded queue.
+
+    It has the same ``write`` / ``release`` interface as ``cv2.VideoWriter`` , but ``write`` only puts the frame into the queue,
+    so the render loop does not wait for the codec unless the queue is full (backpressure.)
+    :meth:`release <pycharmers.opencv.video_image_handler.AsyncVideoWriter.release>` writes all queued frames before releasing the writer.
+    Other attributes (ex. ``isOpened`` , ``set`` ) are delegated to the ``writer`` .
+
+    Args:
+        writer (cv2.VideoWriter) : The writer which encodes frames.
+        maxsize (int)            : The maximum number of queued frames. Defaults to ``32``.
+        copy (bool)              : Whether to copy frames when they are queued. Set ``False`` only if the written frames are not modified afterwards. Defaults to ``True``.
+
+    Attributes:
+        stats (dict) : Queue counters.
+
+            - ``written``    : The number of encoded frames.
+            - ``encode_sec`` : The total time spent in encoding. [s]
+            - ``max_depth``  : The maximum number of queued frames.
+            - ``stalled``    : How many times ``write`` waited for a full queue. (Encoding is the bottleneck.)
+            - ``stall_sec``  : The total time ``write`` waited. [s]
+
+    Examples:
+        >>> import cv2
+        >>> import numpy as np
+        >>> from pycharmers.opencv import AsyncVideoWriter
+        >>> writer = AsyncVideoWriter(cv2.VideoWriter("sample.mp4", cv2.VideoWriter_fourcc(*"mp4v"), 30.0, (640, 480)), maxsize=16)
+        >>> for i in range(300):
+        ...     writer.write(np.full(shape=(480, 640, 3), fill_value=i%256, dtype=np.uint8))
+        >>> writer.release()
+        >>> writer.stats["written"]
+        300
+    """
+
+    _SENTINEL = object()
+
+    def __init__(self, writer: cv2.VideoWriter, maxsize: int = 32, copy: bool = True):
+        self.writer = writer
+        self.copy = copy
+        self.queue = queue.Queue(maxsize=max(1, maxsize))
+        self.exception = None
+        self.released = False
+        self.stats = dict.fromkeys(["written", "encode_sec", "max_depth", "stalled", "stall_sec"], 0)
+        self.thread = threading.Thread(target=self._consume, daemon=True)
+        self.thread.start()
+
+    def __getattr__(self, name):
+        # NOTE: ``writer`` is not set yet while unpickling/copying, or when ``__init__`` failed.
+        if "writer" not in self.__dict__:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        return getattr(self.__dict__["writer"], name)
+
+    def _consume(self):
+        while True:
+            frame = self.queue.get()
+            if frame is self._SENTINEL:
+                break
+            if self.exception is not None:
+                continue  # Drain the queue so that ``write`` never blocks forever.
+            try:
+                start = time.perf_counter()
+                self.writer.write(frame)
+                self.stats["encode_sec"] += time.perf_counter() - start
+                self.stats["written"] += 1
+            except Exception as e:
+                self.exception = e
+
+    def write(self, image: np.ndarray):
+        """Queue the ``image`` to be encoded.
+
+        Args:
+            image (np.ndarray) : The frame to be written.
+
+        Raises:
+            Exception: If encoding of the previous frames failed.
+        """
+        if self.exception is not None:
+            raise self.exception
+        if self.released:
+            raise ValueError(f"{toGREEN('AsyncVideoWriter')} is already {toRED('released')}.")
+        if self.copy:
+            image = image.copy()
+        try:
+            self.queue.put_nowait(image)
+        except queue.Full:
+            self.stats["stalled"] += 1
+            start = time.perf_counter()
+            self.queue.put(image)
+            self.stats["stall_sec"] += time.perf_counter() - start
+        self.stats["max_depth"] = max(self.stats["max_depth"], self.queue.qsize())
+
+    @property
+    def depth(self) -> int:
+        """The number of frames waiting to be encoded."""
+        return self.queue.qsize()
+
+    @property
+    def encode_fps(self) -> float:
+        """Encoding throughput. [frames/s]"""
+        return self.stats["written"] / self.stats["encode_sec"] if self.stats["encode_sec"] > 0 else 0.0
+
+    def release(self):
+        """Write all queued frames, and release the ``writer`` .
+
+        Raises:
+            Exception: If encoding failed.
+        """
+        if not self.released:
+            self.released = True
+            self.queue.put(self._SENTINEL)
+            self.thread.join()
+            self.writer.release()
+        if self.exception is not None:
+            raise self.exception
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def describe(self):
+        """Describe the queue counters."""
+        stats = self.stats
+        print(
+            *pretty_3quote(
+                f"""
+        [{toGREEN("AsyncVideoWriter")}] (maxsize={self.queue.maxsize})
+        * Written frames      : {toGREEN(stats['written'])} ({toGREEN(f"{self.encode_fps:.1f}")}[frames/s])
+        * Max queue depth     : {toGREEN(stats['max_depth'])}
+        * Waited for encoding : {toGREEN(stats['stalled'])} times ({toGREEN(f"{stats['stall_sec']:.3f}")}[s])
+        """
+            )
+        )
+
+
+class FFmpegVideoWriter:
+    """Encode frames with a local ``ffmpeg`` by streaming raw BGR frames over a pipe.
+
+    Unlike ``cv2.VideoWriter`` , the encoder options can be specified, and an audio input can be muxed in the same pass
+    (no need to re-read the video with :func:`synthesize_audio <pycharmers.utils.audio_utils.synthesize_audio>` .)
+
+    Args:
+        out_path (str)                     : Output path for the created video.
+        fps (float)                        : Frames Per Second.
+        size (Tuple[int, int])             : Frame size. ( ``width`` , ``height`` )
+        codec (str)                        : The name of the ffmpeg encoder. Defaults to ``"libx264"`` .
+        crf (Optional[int])                : Constant Rate Factor. (The lower, the better quality.) Defaults to ``None`` (encoder default.)
+        preset (Optional[str])             : Encoding preset. (ex. ``"ultrafast"`` , ``"medium"`` , ``"veryslow"`` ) Defaults to ``None`` .
+        qscale (Optional[int])             : Fixed quality scale ( ``-q:v`` ) for encoders like ``mpeg4`` . (The lower, the better quality.) Defaults to ``None`` ( ``FFMPEG_DEFAULT_QSCALES[codec]`` if any.)
+        pix_fmt (Optional[str])            : Pixel format of the output video. Defaults to ``None`` ( ``FFMPEG_DEFAULT_PIX_FMTS[codec]`` if any, otherwise ``"yuv420p"`` .)
+        threads (int)                      : The number of encoding threads. ( ``0`` means auto.) Defaults to ``0`` .
+        audio_path (Optional[str])         : The path to the audio (video) file to be muxed. Defaults to ``None`` .
+        audio_codec (str)                  : Audio codec. Defaults to ``"aac"`` .
+        ffmpeg (str)                       : The ``ffmpeg`` executable. Defaults to ``"ffmpeg"`` .
+
+    Attributes:
+        command (List[str]) : The ``ffmpeg`` command.
+        proc (subprocess.Popen) : The ``ffmpeg`` process.
+
+    Note:
+        When the ``pix_fmt`` subsamples the chroma (ex. ``"yuv420p"`` ) and the frame width or height is odd, the frames are
+        padded with a black column/row at the right/bottom, as encoders reject such sizes.
+
+    Examples:
+        >>> import numpy as np
+        >>> from pycharmers.opencv import FFmpegVideoWriter
+        >>> writer = FFmpegVideoWriter("sample.mp4", fps=30.0, size=(640, 480), crf=18, preset="fast", audio_path="sound.mp3")
+        >>> for i in range(300):
+        ...     writer.write(np.full(shape=(480, 640, 3), fill_value=i%256, dtype=np.uint8))
+        >>> writer.release()
+    """
+
+    def __init__(
+        self,
+        out_path: str,
+        fps: float,
+        size: Tuple[int, int],
+        codec: str = "libx264",
+        crf: Optional[int] = None,
+        preset: Optional[str] = None,
+        qscale: Optional[int] = None,
+        pix_fmt: Optional[str] = None,
+        threads: int = 0,
+        audio_path: Optional[str] = None,
+        audio_codec: str = "aac",
+        ffmpeg: str = "ffmpeg",
+    ):
+        W, H = size
+        self.out_path = out_path
+        self.size = (W, H)
+        self.audio_path = audio_path
+        command = [ffmpeg, "-y", "-loglevel", "error"]
+        command += ["-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{W}x{H}", "-r", f"{fps}", "-i", "-"]
+        if audio_path is not None:
+            if not os.path.exists(audio_path):
+                raise FileNotFoundError(f"No such file '{toBLUE(audio_path)}'")
+            command += ["-i", audio_path]
+        if pix_fmt is None:
+            pix_fmt = FFMPEG_DEFAULT_PIX_FMTS.get(codec, "yuv420p")
+        command += ["-map", "0:v:0", "-c:v", codec, "-pix_fmt", pix_fmt, "-threads", str(threads)]
+        sx, sy = FFMPEG_CHROMA_SUBSAMPLINGS.get(pix_fmt, (1, 1))
+        if W % sx or H % sy:
+            command += ["-vf", f"pad=ceil(iw/{sx})*{sx}:ceil(ih/{sy})*{sy}"]
+        if crf is not None:
+            command += ["-crf", str(crf)]
+        if preset is not None:
+            command += ["-preset", preset]
+        if qscale is None:
+            qscale = FFMPEG_DEFAULT_QSCALES.get(codec)
+        if qscale is not None:
+            command += ["-q:v", str(qscale)]
+        if audio_path is not None:
+            command += ["-map", "1:a:0", "-c:a", audio_codec, "-shortest"]
+        command.append(out_path)
+        self.command = command
+        self.stderr = tempfile.TemporaryFile()
+        self.proc = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=self.stderr)
+
+    def isOpened(self) -> bool:
+        """Whether the ``ffmpeg`` process is running."""
+        return self.proc.poll() is None and not self.proc.stdin.closed
+
+    def write(self, image: np.ndarray):
+        """Send the ``image`` to ``ffmpeg`` .
+
+        Args:
+            image (np.ndarray) : The BGR frame. ( ``shape=(height, width, 3)`` )
+
+        Raises:
+            ValueError: When the shape of ``image`` does not match the ``size`` .
+            BrokenPipeError: When ``ffmpeg`` exits unexpectedly.
+        """
+        W, H = self.size
+        if image.shape != (H, W, 3):
+            raise ValueError(f"The shape of {toGREEN('image')} must be {toGREEN((H, W, 3))}, but got {toRED(image.shape)}")
+        try:
+            self.proc.stdin.write(np.ascontiguousarray(image, dtype=np.uint8).data)
+        except BrokenPipeError:
+            self.release()
+            raise
+
+    def release(self):
+        """Close the pipe and wait for ``ffmpeg`` to finish.
+
+        Raises:
+            RuntimeError: When ``ffmpeg`` failed.
+        """
+        if not self.proc.stdin.closed:
+            try:
+                self.proc.stdin.close()
+            except BrokenPipeError:
+                pass
+        returncode = self.proc.wait()
+        if not self.stderr.closed:
+            self.stderr.seek(0)
+            message = self.stderr.read().decode("utf-8", errors="replace").strip()
+            self.stderr.close()
+            if returncode != 0:
+                raise RuntimeError(
+                    f"{toGREEN('ffmpeg')} exited with {toRED(returncode)}.\n$ {' '.join(self.command)}\n{message}"
+                )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+def _mono_frame_generator(path, frame_no=0, num_workers=0, step=1, start_sec=None, end_sec=None, max_frames=None):
+    kwargs = {} if os.path.isfile(path) else {"num_workers": num_workers}
+    with FrameSourceCreate(path, **kwargs) as source:
+        start = frame_no if start_sec is None else max(frame_no, source.index_at(start_sec))
+        stop = None if end_sec is None else source.index_at(end_sec)
+        # NOTE: If there is a keyframe between the kept frames, the source seeks to it, so the frames before it are not decoded.
+        #       Otherwise, skipped frames are grabbed, which decodes them but skips the color conversion. See VideoFrameSource.read
+        frames = source[start:stop:step]
+        if max_frames is not None:
+            frames = itertools.islice(frames, max_frames)
+        for frame in frames:
+            yield frame
+
+
+def mono_frame_generator(
+    path, frame_no=0, prefetch=0, num_workers=0, step=1, start_sec=None, end_sec=None, max_frames=None
+):
     """Mono frame Generator which displays a single frame in a video or single image in a directory.
 
     Args:
         path (str)      : ``path/to/images/directory`` or ``path/to/video.mp4``
         frame_no (int)  : If specified (``>0``), the image can be displayed from a specific positions.
+        prefetch (int)  : If specified (``>0``), frames are decoded on a background thread, and up to ``prefetch`` frames are buffered.
+                          See :class:`FramePrefetcher <pycharmers.opencv.video_image_handler.FramePrefetcher>` .
+        num_workers (int) : If specified (``>0``) and ``path`` is a directory, images are decoded by ``num_workers`` threads.
+                          See :class:`ImageDirFrameSource <pycharmers.opencv.video_image_handler.ImageDirFrameSource>` .
+        step (int)        : Yield every ``step`` th frame. Skipped frames are not decoded if the video seeks over them to the next keyframe (when ``step`` is larger than the GOP), and only grabbed (decoded without the color conversion) otherwise. Defaults to ``1``.
+        start_sec (float) : If specified, start from the first frame at or after ``start_sec`` . [s]
+        end_sec (float)   : If specified, stop before the first frame at or after ``end_sec`` . [s]
+        max_frames (int)  : If specified, yield at most ``max_frames`` frames.
 
     Returns:
         generator
@@ -33,30 +1237,28 @@ def mono_frame_generator(path, frame_no=0):
         ...     print(img.shape)
         (512, 512, 3)
     """
-    if os.path.isfile(path):
-        video = cv2.VideoCapture(path)
-        video.set(cv2.CAP_PROP_POS_FRAMES, frame_no)
-        while True:
-            ret, frame = video.read()
-            if not ret:
-                break
-            yield frame
-        video.release()
-    else:
-        fn_list = sorted(os.listdir(path))[frame_no:]
-        for fn in fn_list:
-            frame = cv2.imread(os.path.join(path, fn))
-            if frame is None:
-                continue
-            yield frame
+    gen = _mono_frame_generator(
+        path,
+        frame_no=frame_no,
+        num_workers=num_workers,
+        step=step,
+        start_sec=start_sec,
+        end_sec=end_sec,
+        max_frames=max_frames,
+    )
+    if prefetch > 0:
+        gen = FramePrefetcher(gen, maxsize=prefetch)
+    return gen
 
 
-def multi_frame_generator_sepa(*path, frame_no=0):
+def multi_frame_generator_sepa(*path, frame_no=0, prefetch=0):
     """Multiple frame generator. (separatory)
 
     Args:
         path (str)     : ``path/to/images/directory`` or ``path/to/video.mp4``
         frame_no (int) : If specified (``>0``), the image can be displayed from a specific positions.
+        prefetch (int) : If specified (``>0``), tuples of frames are decoded on a background thread, and up to ``prefetch`` tuples are buffered.
+                         See :class:`FramePrefetcher <pycharmers.opencv.video_image_handler.FramePrefetcher>` .
 
     Returns:
         generator
@@ -69,16 +1271,24 @@ def multi_frame_generator_sepa(*path, frame_no=0):
         ...     print(len(img), img[0].shape)
         2 (512, 512, 3)
     """
-    return zip(*[mono_frame_generator(p, frame_no=frame_no) for p in path])
+    gen = zip(*[mono_frame_generator(p, frame_no=frame_no) for p in path])
+    if prefetch > 0:
+        gen = FramePrefetcher(gen, maxsize=prefetch)
+    return gen
 
 
-def multi_frame_generator_concat(*paths, frame_no=0, grid=None):
+def multi_frame_generator_concat(*paths, frame_no=0, grid=None, interpolation=None, prefetch=0):
     """Multiple frame generator. (In a connected state)
 
+    Frames are composited by :class:`GridCompositor <pycharmers.opencv.editing.GridCompositor>` ,
+    so the yielded image is the same (overwritten) array. Copy it if you want to keep it.
+
     Args:
-        path (str)      : ``path/to/images/directory`` or ``path/to/video.mp4``
-        frame_no (int)  : If specified (``>0``), the image can be displayed from a specific positions.
-        grid (tuple)    : How to concatenate the multiple frames. (ncols, nrows)
+        path (str)          : ``path/to/images/directory`` or ``path/to/video.mp4``
+        frame_no (int)      : If specified (``>0``), the image can be displayed from a specific positions.
+        grid (tuple)        : How to concatenate the multiple frames. (nrows, ncols)
+        interpolation (int) : Interpolation method for all tiles, or a list of methods for each tile.
+        prefetch (int)      : If specified (``>0``), frames are decoded on a background thread.
 
     Returns:
         generator
@@ -91,29 +1301,17 @@ def multi_frame_generator_concat(*paths, frame_no=0, grid=None):
         ...     print(img.shape)
         (512, 1024, 3)
     """
-    num_frames = len(paths)
-    nrow, ncol = calc_rectangle_size(area=num_frames, w=None) if grid is None else grid
-    expected_frames = nrow * ncol
-    num_black_frame = expected_frames - num_frames
-
-    names = [basenaming(path) for path in paths]
-    max_name_len = 1
-
-    gen = mono_frame_generator(paths[0])
-    frame = gen.__next__()
-    balck_frames = tuple(np.zeros_like(frame)) * num_black_frame
-
-    gens = multi_frame_generator_sepa(*paths, frame_no=frame_no)
-    for frames in gens:
-        frames += balck_frames
-        concated_frame = vconcat_resize_min(
-            *[hconcat_resize_min(*frames[r * ncol : (r + 1) * ncol]) for r in range(nrow)]
-        )
-        yield concated_frame
+    compositor = None
+    for frames in multi_frame_generator_sepa(*paths, frame_no=frame_no, prefetch=prefetch):
+        if compositor is None:
+            compositor = GridCompositor(
+                shapes=[frame.shape for frame in frames], grid=grid, interpolation=interpolation
+            )
+        yield compositor.compose(*frames)
 
 
 def count_frame_num(path):
-    """Count the number of frames.
+    """Count the number of frames. (See :func:`get_frame_metadata <pycharmers.opencv.video_image_handler.get_frame_metadata>` )
 
     Args:
         path (str) : path to video file, or directory which stores sequential images.
@@ -125,18 +1323,7 @@ def count_frame_num(path):
         >>> count_frame_num(PYCHARMERS_OPENCV_IMAGE_DIR)
         1
     """
-    if os.path.isfile(path):
-        video = cv2.VideoCapture(path)
-        frame_num = video.get(cv2.CAP_PROP_FRAME_COUNT)
-    else:
-        frame_num = len(
-            list(
-                filter(
-                    lambda fn: re.search(IMAGE_FILE_PATTERN, fn, re.IGNORECASE), os.listdir(path)
-                )
-            )
-        )
-    return int(frame_num)
+    return get_frame_metadata(path)["num_frames"]
 
 
 def basenaming(path):
@@ -178,8 +1365,13 @@ def VideoWriterCreate(
     fps: Optional[float] = None,
     size: Tuple[int, int] = (None, None),
     verbose: bool = False,
+    async_: bool = False,
+    maxsize: int = 32,
+    backend: str = "cv2",
+    audio_path: Optional[str] = None,
+    ffmpeg_kwargs: Optional[Dict[str, Any]] = None,
     **kwargs,
-) -> Tuple[bool, cv2.VideoWriter, str]:
+) -> Tuple[bool, Union[cv2.VideoWriter, FFmpegVideoWriter, AsyncVideoWriter], str]:
     """Create a ``cv2.VideoWriter`` which creates a video whose option is same as that of input.
 
     Args:
@@ -189,9 +1381,14 @@ def VideoWriterCreate(
         fps (float, optional)                : Frames Per Second. Defaults to ``None``.
         size (Tuple[int, int], optional)     : frame size for the created video. Defaults to ``(None, None)``.
         verbose (bool, optional)             : Whether to print the created ``cv2.VideoWriter`` info. Defaults to ``False``.
+        async_ (bool, optional)              : Whether to encode frames on a background thread. (Returns :class:`AsyncVideoWriter <pycharmers.opencv.video_image_handler.AsyncVideoWriter>` .) Defaults to ``False``.
+        maxsize (int, optional)              : The maximum number of queued frames. (Only used when ``async_=True`` ) Defaults to ``32``.
+        backend (str, optional)              : ``"cv2"`` ( ``cv2.VideoWriter`` ) or ``"ffmpeg"`` (:class:`FFmpegVideoWriter <pycharmers.opencv.video_image_handler.FFmpegVideoWriter>` .) If ``ffmpeg`` is not found, ``"cv2"`` is used. Defaults to ``"cv2"``.
+        audio_path (Optional[str], optional) : The path to the audio file to be muxed. (Only used when ``backend="ffmpeg"`` ) Defaults to ``None``.
+        ffmpeg_kwargs (Optional[dict])       : Keyword arguments for ``FFmpegVideoWriter`` (ex. ``crf`` , ``preset`` , ``pix_fmt`` , ``threads`` .) ``codec`` is converted from the video ``codec`` by default.
 
     Returns:
-        Tuple[bool, cv2.VideoWriter, str]: A tuple of three elements.
+        Tuple[bool, Union[cv2.VideoWriter, FFmpegVideoWriter, AsyncVideoWriter], str]: A tuple of three elements.
                                            - flag if ``VideoWriter`` is created correctly, , A instance of ``cv2.VideoWriter``.
                                            - A instance of created ``VideoWriter``.
                                            - Output path for ``VideoWriter``.
@@ -245,8 +1442,19 @@ def VideoWriterCreate(
                 f"Change the file extension from {toRED(original_ext)} to {toGREEN(ideal_ext)} according to video codec ({toGREEN(codec)})."
             )
             out_path = root + ideal_ext
-    fourcc = cv2.VideoWriter_fourcc(*codec)
-    VideoWriter = cv2.VideoWriter(out_path, fourcc, fps, (W, H))
+    handleKeyError(lst=["cv2", "ffmpeg"], backend=backend)
+    if backend == "ffmpeg" and shutil.which("ffmpeg") is None:
+        warnings.warn(f"{toGREEN('ffmpeg')} is not found, so use {toGREEN('cv2.VideoWriter')} instead.")
+        backend = "cv2"
+    if backend == "ffmpeg":
+        ffmpeg_kwargs = dict(ffmpeg_kwargs or {})
+        ffmpeg_kwargs.setdefault("codec", VIDEOCODEC2FFMPEG.get(codec, codec))
+        VideoWriter = FFmpegVideoWriter(out_path, fps=fps, size=(W, H), audio_path=audio_path, **ffmpeg_kwargs)
+    else:
+        if audio_path is not None:
+            warnings.warn(f"{toGREEN('audio_path')} is ignored because {toGREEN('cv2.VideoWriter')} can not mux audio.")
+        fourcc = cv2.VideoWriter_fourcc(*codec)
+        VideoWriter = cv2.VideoWriter(out_path, fourcc, fps, (W, H))
     is_ok = VideoWriter.isOpened()
     if not is_ok:
         warnings.warn(
@@ -262,13 +1470,15 @@ def VideoWriterCreate(
         flag, status = (toRED("[failure]"), "can NOT")
     else:
         flag, status = (toGREEN("[success]"), "can")
+        if async_:
+            VideoWriter = AsyncVideoWriter(VideoWriter, maxsize=maxsize)
     if verbose:
         print(
             *pretty_3quote(
                 f"""
         {flag} {toGREEN("VideoWriter")} {status} be created.
         * Size (W,H)  : ({toGREEN(W)}, {toGREEN(H)})
-        * Video Codec : {toGREEN(codec)}
+        * Video Codec : {toGREEN(codec)} ({toGREEN(backend)})
         * Output Path : {toBLUE(out_path)}
         """
             )
@@ -276,15 +1486,205 @@ def VideoWriterCreate(
     return (is_ok, VideoWriter, out_path)
 
 
-def VideoCaptureCreate(path=None, cam=0):
+class StridedVideoCapture:
+    """``cv2.VideoCapture`` which reads every ``step`` th frame in a time range.
+
+    Skipped frames are only grabbed ( ``grab()`` ). They are still decoded, but only the kept frames are retrieved and converted to BGR ( ``retrieve()`` .)
+    The capture seeks to ``start_sec`` by timestamp ( ``CAP_PROP_POS_MSEC`` ). Other attributes are delegated to ``cap`` .
+
+    Args:
+        cap (cv2.VideoCapture) : The capture.
+        step (int)             : Read every ``step`` th frame. Defaults to ``1``.
+        start_sec (float)      : If specified, start from ``start_sec`` . [s]
+        end_sec (float)        : If specified, stop before ``end_sec`` . [s]
+        max_frames (int)       : If specified, read at most ``max_frames`` frames.
+
+    Attributes:
+        num_read (int) : The number of frames read.
+    """
+
+    def __init__(self, cap, step=1, start_sec=None, end_sec=None, max_frames=None):
+        if step < 1:
+            raise ValueError(f"{toGREEN('step')} must be a positive integer, but got {toRED(step)}")
+        self.cap = cap
+        self.step = step
+        self.end_sec = end_sec
+        self.max_frames = max_frames
+        self.num_read = 0
+        if start_sec is not None and start_sec > 0:
+            cap.set(cv2.CAP_PROP_POS_MSEC, start_sec * 1e3)
+
+    def __getattr__(self, name):
+        # NOTE: ``cap`` is not set yet while unpickling/copying, or when ``__init__`` failed.
+        if "cap" not in self.__dict__:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        return getattr(self.__dict__["cap"], name)
+
+    def grab(self) -> bool:
+        if self.max_frames is not None and self.num_read >= self.max_frames:
+            return False
+        for _ in range(self.step - 1 if self.num_read > 0 else 0):
+            if not self.cap.grab():
+                return False
+        if not self.cap.grab():
+            return False
+        if self.end_sec is not None and self.cap.get(cv2.CAP_PROP_POS_MSEC) >= self.end_sec * 1e3:
+            return False
+        self.num_read += 1
+        return True
+
+    def read(self, image=None):
+        if not self.grab():
+            return False, None
+        return self.cap.retrieve(image)
+
+
+class ThreadedVideoCapture:
+    """``cv2.VideoCapture`` which captures frames on a background thread, and drops the stale ones.
+
+    When the consumer (processing + display) is slower than the camera, a plain ``cap.read()`` returns the frames
+    buffered by the driver, so the latency grows. This capture keeps reading on its own thread, and keeps only
+
+    - ``"latest"`` : the latest frame. ``read()`` waits for a frame newer than the previous one.
+    - ``"queue"``  : the latest ``maxsize`` frames. When the queue is full, the oldest frame is dropped.
+
+    Other attributes are delegated to ``cap`` . As ``cv2.VideoCapture`` is not thread-safe, ``get`` of the frame size,
+    fps and frame count is served from the values read before the thread starts, and the other calls hold the lock which the thread holds while reading.
+
+    Args:
+        cap (cv2.VideoCapture) : The capture.
+        drop_policy (str)      : ``"latest"`` or ``"queue"`` . Defaults to ``"latest"``.
+        maxsize (int)          : The size of the queue. (Only used when ``drop_policy="queue"`` )
+        realtime (bool)        : Whether to read at ``CAP_PROP_FPS`` (for video files, which are read as fast as possible otherwise.)
+        keep_all (bool)        : Whether to keep all frames from the first one. (See :meth:`keep_all <pycharmers.opencv.video_image_handler.ThreadedVideoCapture.keep_all>` )
+
+    Attributes:
+        timestamp (float) : ``time.perf_counter()`` when the last read frame was captured. (To measure glass-to-glass latency.)
+        stats (dict)      : ``captured`` , ``delivered`` and ``dropped`` frames.
+
+    Note:
+        Use it for cameras. For files (and images) a plain ``read()`` loses no frames and doesn't spin on the thread.
+
+    Examples:
+        >>> import time
+        >>> from pycharmers.opencv import ThreadedVideoCapture, VideoCaptureCreate
+        >>> cap = ThreadedVideoCapture(VideoCaptureCreate(cam=0), drop_policy="latest")
+        >>> for _ in range(30):
+        ...     ret, frame = cap.read()
+        ...     time.sleep(0.1) # Slow processing.
+        ...     latency = time.perf_counter() - cap.timestamp
+        >>> cap.release()
+        >>> cap.stats["delivered"]
+        30
+    """
+
+    SUPPORTED_DROP_POLICIES = ["latest", "queue"]
+
+    def __init__(self, cap, drop_policy="latest", maxsize=4, realtime=False, keep_all=False):
+        handleKeyError(lst=ThreadedVideoCapture.SUPPORTED_DROP_POLICIES, drop_policy=drop_policy)
+        self.cap = cap
+        self.drop_policy = drop_policy
+        self.maxlen = 1 if drop_policy == "latest" else max(1, maxsize)
+        # NOTE: Set before the capture thread starts, so that no frame is dropped in between.
+        self.buffer = collections.deque(maxlen=None if keep_all else self.maxlen)
+        self.condition = threading.Condition()
+        self.stopped = False
+        self.timestamp = None
+        self.stats = dict.fromkeys(["captured", "delivered", "dropped"], 0)
+        # NOTE: Read before the capture thread starts.
+        self.properties = {
+            prop: cap.get(prop)
+            for prop in [cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT, cv2.CAP_PROP_FPS, cv2.CAP_PROP_FRAME_COUNT]
+        }
+        fps = self.properties[cv2.CAP_PROP_FPS] if realtime else None
+        self.interval = 1 / fps if fps else 0
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._capture, daemon=True)
+        self.thread.start()
+
+    def __getattr__(self, name):
+        # NOTE: ``cap`` and ``lock`` are not set yet while unpickling/copying, or when ``__init__`` failed.
+        if "cap" not in self.__dict__ or "lock" not in self.__dict__:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        attr = getattr(self.__dict__["cap"], name)
+        if not callable(attr):
+            return attr
+        lock = self.__dict__["lock"]
+
+        def locked(*args, **kwargs):
+            with lock:
+                return attr(*args, **kwargs)
+
+        return locked
+
+    def get(self, propId):
+        if propId in self.properties:
+            return self.properties[propId]
+        with self.lock:
+            return self.cap.get(propId)
+
+    def keep_all(self, flag=True):
+        """Whether to keep all frames (ex. while recording), instead of dropping stale ones.
+
+        Args:
+            flag (bool) : If ``True`` , the queue is unbounded until ``keep_all(False)`` .
+        """
+        with self.condition:
+            self.buffer = collections.deque(self.buffer, maxlen=None if flag else self.maxlen)
+
+    def _capture(self):
+        next_time = time.perf_counter()
+        while not self.stopped:
+            with self.lock:
+                ret, frame = self.cap.read()
+            timestamp = time.perf_counter()
+            with self.condition:
+                if not ret:
+                    self.stopped = True
+                else:
+                    if len(self.buffer) == self.buffer.maxlen:
+                        self.stats["dropped"] += 1
+                    self.buffer.append((frame, timestamp))
+                    self.stats["captured"] += 1
+                self.condition.notify_all()
+            if self.interval > 0:
+                next_time = max(next_time + self.interval, timestamp)
+                time.sleep(max(0, next_time - time.perf_counter()))
+
+    def read(self, image=None):
+        with self.condition:
+            while len(self.buffer) == 0 and not self.stopped:
+                self.condition.wait()
+            if len(self.buffer) == 0:
+                return False, None
+            frame, self.timestamp = self.buffer.popleft()
+        self.stats["delivered"] += 1
+        return True, frame
+
+    def isOpened(self) -> bool:
+        return not self.stopped or len(self.buffer) > 0
+
+    def release(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        self.thread.join()
+        return self.cap.release()
+
+
+def VideoCaptureCreate(path=None, cam=0, step=1, start_sec=None, end_sec=None, max_frames=None):
     """Create a VideoCapture (mimic) object.
 
     Args:
-        path (str) : path to video or image.
-        cam (int)  : The ID of the web camera
+        path (str)        : path to video or image.
+        cam (int)         : The ID of the web camera
+        step (int)        : Read every ``step`` th frame. Skipped frames are only grabbed (decoded, but not retrieved.)
+        start_sec (float) : If specified, start from ``start_sec`` . [s]
+        end_sec (float)   : If specified, stop before ``end_sec`` . [s]
+        max_frames (int)  : If specified, read at most ``max_frames`` frames.
 
     Returns:
-        cap (cv2.VideoCapture) : VideoCapture (mimic) object.
+        cap (cv2.VideoCapture) : VideoCapture (mimic) object. (:class:`StridedVideoCapture <pycharmers.opencv.video_image_handler.StridedVideoCapture>` if any of ``step`` , ``start_sec`` , ``end_sec`` or ``max_frames`` is specified.)
 
     Examples:
         >>> from pycharmers.opencv import VideoCaptureCreate, cv2plot
@@ -324,6 +1724,10 @@ def VideoCaptureCreate(path=None, cam=0):
         cap = VideoMimic(path)
     else:
         cap = cv2.VideoCapture(path)
+    if isinstance(cap, cv2.VideoCapture) and (
+        step != 1 or start_sec is not None or end_sec is not None or max_frames is not None
+    ):
+        cap = StridedVideoCapture(cap, step=step, start_sec=start_sec, end_sec=end_sec, max_frames=max_frames)
     return cap
 
 
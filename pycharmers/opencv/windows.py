@@ -73,10 +73,13 @@ This KEY table is created by the following programs.
 import os
 import re
 import sys
+import collections
 import cv2
+from concurrent.futures import ThreadPoolExecutor
 
 from ._cvpath import save_dir_create
-from .video_image_handler import basenaming, mono_frame_generator, multi_frame_generator_concat, count_frame_num, VideoWriterCreate
+from .editing import GridCompositor, ViewportRenderer
+from .video_image_handler import basenaming, FrameSourceCreate, VideoFrameSource, VideoWriterCreate
 from .drawing import draw_text_with_bg, draw_bboxes_create
 from .tracking import tracker_create, BBoxLogger
 from ..utils.generic_utils import now_str, flatten_dual, int2ordinal, handleKeyError
@@ -378,6 +381,7 @@ class cvWindow():
         img_save_dir (str)     : ``Path/to/created_image/directory``
         reduction_rate (float) :  ``1./expansion_rate``
         cvKey (cvKeys)         : Keys that can be used with OpenCV.
+        viewport (ViewportRenderer) : Renders the zoomed/panned region of the shown image. See :class:`ViewportRenderer <pycharmers.opencv.editing.ViewportRenderer>`
 
     Examples:
         >>> import cv2
@@ -392,16 +396,19 @@ class cvWindow():
     """
     no = 0
 
-    def __init__(self, winname=None, dirname=None, move_distance=10, expansion_rate=1.1, cvKey=cvKeys(**DEFAULT_CV_KEYS)):
+    def __init__(self, winname=None, dirname=None, move_distance=10, expansion_rate=1.1, cvKey=cvKeys(**DEFAULT_CV_KEYS), max_display_size=(1920, 1080)):
         """initialization of the OpenCV Windows.
 
         Args:
-            winname (str)          : The window name.
-            dirname (str)          : dirname for saved image or directory.
-            move_distance (int)    : Moving distance. (px)
-            expansion_rate (float) : Expansion Rate.
-            cvKey (dict)           : Instance of :class:`cvKeys <pycharmers.opencv.windows.cvKeys>`.
+            winname (str)           : The window name.
+            dirname (str)           : dirname for saved image or directory.
+            move_distance (int)     : Moving distance. (px)
+            expansion_rate (float)  : Expansion Rate.
+            cvKey (dict)            : Instance of :class:`cvKeys <pycharmers.opencv.windows.cvKeys>`.
+            max_display_size (tuple): Larger images are shown at this size. ( ``width`` , ``height`` )
         """
+        self.viewport = None
+        self.max_display_size = max_display_size
         self.setup(winname=winname, dirname=dirname)
         self.move_distance = move_distance
         self.expansion_rate = expansion_rate
@@ -495,14 +502,28 @@ class cvWindow():
 
     def show(self, mat):
         """Displays an image in the specified window. (``self.winname``)
-        
+
+        Only the visible region of ``mat`` is rendered by ``viewport`` , and the zoom rate and view are kept while the image size is unchanged.
+
         Args:
             mat (np.ndarray): Image to be shown.
         """
-        if (self.Ih, self.Iw) != mat.shape[:2]:
-            self.Ih, self.Iw,  _ = mat.shape
+        H,W = mat.shape[:2]
+        mW,mH = self.max_display_size
+        rate = min(1., mW/W, mH/H)
+        dsize = (max(1, int(W*rate)), max(1, int(H*rate)))
+        if (self.viewport is None) or (self.viewport.dsize != dsize) or (self.viewport.frame.shape[:2] != (H,W)):
+            self.viewport = ViewportRenderer(dsize=dsize)
+            self.Iw, self.Ih = dsize
             self.resizeWindow(height=self.Ih, width=self.Iw)
-        cv2.imshow(winname=self.winname, mat=mat)
+        # NOTE: ``mat`` may be the same array modified in place, so the pyramid is always rebuilt here. (Zooming and panning use ``refresh`` .)
+        self.viewport.set_frame(mat, force=True)
+        self.refresh()
+
+    def refresh(self):
+        """Render the current view of the shown image again. (ex. after zooming or panning.)"""
+        if self.viewport is not None:
+            cv2.imshow(winname=self.winname, mat=self.viewport.render())
 
     def describe(self):
         """Describe Key info."""
@@ -537,7 +558,20 @@ class cvWindow():
             elif key == cvKey.BASE_INFO_KEY_ORD:
                 self.describe()
 
-        # MOVING
+        # MOVING (Pan the view if zoomed in, otherwise move the window.)
+        elif key in cvKey.MOVING_KEYS_ORD and (self.viewport is not None) and (self.viewport.zoom > 1):
+            dx = dy = 0
+            if key == cvKey.MOVING_LEFT_KEY_ORD:
+                dx = -self.move_distance
+            elif key == cvKey.MOVING_RIGHT_KEY_ORD:
+                dx = self.move_distance
+            elif key == cvKey.MOVING_DOWN_KEY_ORD:
+                dy = self.move_distance
+            else: # key == cvKey.MOVING_UP_KEY_ORD
+                dy = -self.move_distance
+            self.viewport.pan(dx=dx, dy=dy)
+            self.refresh()
+
         elif key in cvKey.MOVING_KEYS_ORD:
             Wx,Wy,_,_ = self.get_anchors()
 
@@ -559,9 +593,9 @@ class cvWindow():
             else:
                 rate = self.reduction_rate
 
-            self.Ih = int(rate*self.Ih)
-            self.Iw = int(rate*self.Iw)
-            self.resizeWindow(width=self.Iw, height=self.Ih)
+            if self.viewport is not None:
+                self.viewport.zoom_by(rate)
+                self.refresh()
 
         elif key in cvKey.POSITION_KEYS_ORD:
             if key == cvKey.POSITION_FULLSCREEN_KEY_ORD:
@@ -684,21 +718,24 @@ class FrameWindow(cvWindow):
     """OpenCV window for Frames (images or video).
 
     Args:
-        path (str) : path to video file, or directory which stores sequential images.
-        ext (str)  : File extension. (default= ``".jpg"`` )
+        path (str)   : path to video file, or directory which stores sequential images.
+        ext (str)    : File extension. (default= ``".jpg"`` )
+        cache (bool) : Whether to read frames of videos from the decoded-frame cache. See :class:`MemmapFrameSource <pycharmers.opencv.video_image_handler.MemmapFrameSource>` (default= ``False`` )
+        cache_mb (float) : The size of the in-memory LRU cache of decoded frames around the cursor. [MB] ( ``0`` means no cache.) (default= ``256`` )
+        backfill (int)   : When a frame is not cached, also decode up to ``backfill`` preceding frames in the same pass, so that stepping back is instant. (default= ``8`` )
+        num_workers (int): The number of threads to encode images in range extraction. (default= ``os.cpu_count()`` )
 
     Attributes:
         basenames (str)            : Concatenate of the final components of ``path``
         input_path (tuple)         : ``path``
-        frame_generator (function) : function which generates sequential frames.
-                                        - If ``len(path)==1`` -> :py:func:`mono_frame_generator <pycharmers.opencv.video_image_handler.mono_frame_generator>`
-                                        - Otherwise -> :py:func:`multi_frame_generator_concat <pycharmers.opencv.windows.cvKeys.multi_frame_generator_concat>`
-        gen (gen)                  : Generator created by ``frame_generator``
-        total_num (int)            : The total number of frames.
+        sources (list)             : Random-access frame sources. See :func:`FrameSourceCreate <pycharmers.opencv.video_image_handler.FrameSourceCreate>`
+        compositor (GridCompositor): Compositor for multiple frames. See :class:`GridCompositor <pycharmers.opencv.editing.GridCompositor>`
+        total_num (int)            : The total number of frames. (The number of frames in the shortest source.)
         crt_frame_no (int)         : The current number of frames. (1-based index.)
         crt_frame (ndarray)        : The current image.
         range_start (int)          : Start number in the selected range.
         range_end (int)            : End number in the selected range.
+        frame_cache (OrderedDict)  : LRU cache of decoded frames. ( ``no`` -> ``frame`` )
 
     Examples:
         >>> import cv2
@@ -711,7 +748,8 @@ class FrameWindow(cvWindow):
         ...         break
         >>> cv2.destroyAllWindows()
     """
-    def __init__(self, *path, winname=None, dirname=None, ext=".jpg", move_distance=10, expansion_rate=1.1, cvKey=cvKeys(**DEFAULT_FRAME_KEYS)):
+    def __init__(self, *path, winname=None, dirname=None, ext=".jpg", move_distance=10, expansion_rate=1.1, cvKey=cvKeys(**DEFAULT_FRAME_KEYS),
+                 cache=False, cache_mb=256, backfill=8, num_workers=None):
         self.basenames = ".".join([basenaming(p) for p in path])
         self.ext = ext
         super().__init__(
@@ -723,17 +761,92 @@ class FrameWindow(cvWindow):
         )
         self.cvKey.update(cvKey)
         self.input_path = path
-        self.frame_generator = {
-            True  : mono_frame_generator,
-            False : multi_frame_generator_concat,
-        }[len(path)==1]
-        self.gen = self.frame_generator(*path)
-        self.total_num = count_frame_num(path[0])
+        self.sources = [FrameSourceCreate(p, cache=cache) for p in path]
+        for source in self.sources:
+            # Frames are accessed randomly, so the exact number of frames is needed.
+            if isinstance(source, VideoFrameSource):
+                source.build_index()
+        self.compositor = None
+        self.frame_cache = collections.OrderedDict()
+        self.frame_cache_bytes = 0
+        self.max_cache_bytes = int(cache_mb * 1024**2)
+        self.backfill = backfill
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.total_num = min(len(source) for source in self.sources)
         self.range_start = self.range_end = None
-        self.crt_frame = self.gen.__next__()
         self.crt_frame_no = 1 # 1-based index.
+        self.crt_frame = self.read(self.crt_frame_no)
         self.show()
 
+    def read(self, no):
+        """Read the frame. (If there are multiple sources, they are concatenated.)
+
+        Frames are cached in ``frame_cache`` , and the returned frame is a copy of it (texts are drawn on it.)
+
+        Args:
+            no (int) : The number of the frame. (1-based index.)
+
+        Returns:
+            frame (ndarray) : The ``no`` th frame.
+        """
+        frame = self.frame_cache.get(no)
+        if frame is None:
+            start = no
+            if self.max_cache_bytes > 0:
+                while (start > max(1, no-self.backfill)) and (start-1 not in self.frame_cache):
+                    start -= 1
+            for i,frame in enumerate(self.iter_frames(start, no), start=start):
+                self.cache_frame(i, frame)
+            frame = self.frame_cache.get(no)
+            if frame is None:
+                raise IndexError(f"Could not read the {toRED(int2ordinal(no))} frame.")
+        else:
+            self.frame_cache.move_to_end(no)
+        return frame.copy()
+
+    def iter_frames(self, start, end):
+        """Decode the frames from ``start`` to ``end`` in one sequential pass.
+
+        Args:
+            start (int) : The first number of frames. (1-based index.)
+            end (int)   : The last number of frames. (1-based index, inclusive.)
+
+        Yields:
+            frame (ndarray) : The frame. (If there are multiple sources, they are concatenated into the reused array.)
+        """
+        for frames in zip(*[source[start-1:end] for source in self.sources]):
+            if len(frames)==1:
+                yield frames[0]
+                continue
+            if self.compositor is None:
+                self.compositor = GridCompositor(shapes=[frame.shape for frame in frames])
+            yield self.compositor.compose(*frames)
+
+    def cache_frame(self, no, frame):
+        """Add the frame to ``frame_cache`` , and evict the least recently used frames if it is over ``cache_mb`` .
+
+        Args:
+            no (int)        : The number of the frame. (1-based index.)
+            frame (ndarray) : The frame.
+        """
+        if len(self.sources)>1:
+            frame = frame.copy() # The compositor reuses its canvas.
+        if self.max_cache_bytes <= 0:
+            self.frame_cache = collections.OrderedDict([(no, frame)])
+            return
+        if no in self.frame_cache:
+            self.frame_cache_bytes -= self.frame_cache.pop(no).nbytes
+        self.frame_cache[no] = frame
+        self.frame_cache_bytes += frame.nbytes
+        while self.frame_cache_bytes > self.max_cache_bytes and len(self.frame_cache) > 1:
+            _, evicted = self.frame_cache.popitem(last=False)
+            self.frame_cache_bytes -= evicted.nbytes
+
+    def destroy(self):
+        for source in self.sources:
+            source.release()
+        super().destroy()
+
     def fnaming(self, *no, ext=None):
         """Naming the file based on the number of frame.
 
@@ -746,7 +859,7 @@ class FrameWindow(cvWindow):
             name = f"{int2ordinal(no[0])}"
         elif len(no)==2:
             start, end = no
-            name = f"{int2ordinal(start)}-{int2ordinal(start)}"
+            name = f"{int2ordinal(start)}-{int2ordinal(end)}"
         return f"{self.basenames}_{name}_outof_{self.total_num}{ext}"
 
     def show(self, mat=None):
@@ -784,8 +897,7 @@ class FrameWindow(cvWindow):
             elif key == cvKey.FRAME_JUMP_KEY_ORD:
                 frame_no = int(wait_for_input(fmt="Jump to {val} / " + f"{self.total_num} frame."))
                 self.crt_frame_no = max(1, min(int(frame_no), self.total_num))
-            self.gen = self.frame_generator(*self.input_path, frame_no=self.crt_frame_no-1)
-            self.crt_frame = self.gen.__next__()
+            self.crt_frame = self.read(self.crt_frame_no)
             self.show()
         # Do range processing
         elif key in cvKey.RANGE_KEYS_ORD:
@@ -815,28 +927,40 @@ class FrameWindow(cvWindow):
             * press '{toBLUE(cvKey.TAKE_VIDEO_KEY)}' to extract a video.
             * press '{toBLUE(cvKey.TAKE_PICTURE_KEY)}' to shot all frames in the range.
             """))
-            gen = self.frame_generator(*self.input_path, frame_no=start-1)
-            total_num = self.total_num
             while True:
                 key = cv2.waitKey(0)
                 handleKeyError(lst=cvKey.TAKE_KEYS, key=chr(key))
                 if key == cvKey.TAKE_PICTURE_KEY_ORD:
-                    for i,frame in enumerate(gen):
-                        current = start+i
-                        fn = f"{self.basenames}.{current}.out.of.{total_num}.jpg"
-                        cv2.imwrite(filename=os.path.join(self.img_save_dir, self.fnaming(current)), img=frame)
-                        if current >= end: break
+                    # NOTE: Decode in one pass, and encode images on a thread pool (cv2.imwrite releases the GIL.)
+                    with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+                        futures = collections.deque()
+                        for no,frame in enumerate(self.iter_frames(start, end), start=start):
+                            filename = os.path.join(self.img_save_dir, self.fnaming(no))
+                            if len(self.sources)>1:
+                                frame = frame.copy() # The compositor reuses its canvas.
+                            futures.append(executor.submit(cv2.imwrite, filename, frame))
+                            while len(futures) > 2*self.num_workers:
+                                futures.popleft().result()
+                        for future in futures:
+                            future.result()
                     print(f"Take a screenshots from {int2ordinal(start)} frame to {int2ordinal(end)} frame.")
                     break
                 elif key == cvKey.TAKE_VIDEO_KEY_ORD:
-                    out_video = VideoWriterCreate(
-                        in_path=self.input_path[0],
-                        out_path=os.path.join(self.video_save_dir, self.fnaming(start, end, ext=".mp4"))
-                    )
-                    for i,frame in enumerate(gen):
+                    out_video = None
+                    for frame in self.iter_frames(start, end):
+                        if out_video is None:
+                            # NOTE: Encode on a background thread while decoding the next frames.
+                            _, out_video, out_path = VideoWriterCreate(
+                                input_path=self.input_path[0],
+                                out_path=os.path.join(self.video_save_dir, self.fnaming(start, end, ext=".mp4")),
+                                codec="mp4v",
+                                fps=getattr(self.sources[0], "fps", None) or 30.0,
+                                size=(frame.shape[1], frame.shape[0]),
+                                async_=True,
+                            )
                         out_video.write(frame)
-                        if start+i >= end: break
-                    out_video.release()
+                    if out_video is not None:
+                        out_video.release()
                     print(f"Extract a video from {int2ordinal(start)} frame to {int2ordinal(end)} frame.")
                     break
             self.range_start = self.range_end = None
@@ -858,7 +982,7 @@ class TrackingWindow(FrameWindow, RealTimeWindow):
         >>> cv2.destroyAllWindows()
     """
     def __init__(self, path, tracker="boosting", coord_type="xywh", bbox=(0,0,0,0),
-                 winname=None, dirname=None, move_distance=10, expansion_rate=1.1, cvKey=cvKeys(**DEFAULT_TRACKING_KEYS), **metadata):
+                 winname=None, dirname=None, move_distance=10, expansion_rate=1.1, cvKey=cvKeys(**DEFAULT_TRACKING_KEYS), cache=False, **metadata):
         super().__init__(
             path,
             winname=winname,
@@ -866,6 +990,7 @@ class TrackingWindow(FrameWindow, RealTimeWindow):
             move_distance=move_distance,
             expansion_rate=expansion_rate,
             cvKey=cvKey,
+            cache=cache,
         )
         self.moveWindow(0, 0)
         # Preparation for Tracking
@@ -884,12 +1009,11 @@ class TrackingWindow(FrameWindow, RealTimeWindow):
         self.logger = BBoxLogger(coord_type=coord_type, input_path=input_path, dirname=dirname, **metadata)
 
         # Get curt (initial) frame.
-        frame = self.gen.__next__()
-        self.gen = self.frame_generator(*self.input_path, frame_no=self.crt_frame_no)
+        frame = self.read(self.crt_frame_no)
         if min((bbox[-2:])) == 0:
             bbox = cv2.selectROI(windowName=self.init_bbox_winname, img=frame, showCrosshair=True, fromCenter=False)
         else:
-            frame = self.draw_bboxes(frame=frame, bboxes=bbox, info={"text": "initial"})  
+            frame = self.draw_bboxes(frame=frame, bboxes=bbox, infos=[{"text": "initial"}])  
             cv2.imshow(self.init_bbox_winname, frame)
         self.tracker.init(frame, bbox) 
         self.logger.add_bboxes(no=self.crt_frame_no, bboxes=bbox)
@@ -909,13 +1033,13 @@ class TrackingWindow(FrameWindow, RealTimeWindow):
         
         if key in cvKey.TRACKING_KEYS_ORD:
             if key==cvKey.TRACKING_INIT_KEY_ORD:
-                self.gen = self.frame_generator(*self.input_path, frame_no=self.crt_frame_no-1)
-                frame = self.gen.__next__()
+                frame = self.read(self.crt_frame_no)
                 self.bbox = cv2.selectROI(windowName=self.winname + "_initial_bbox", img=frame, showCrosshair=True, fromCenter=False)
                 self.tracker.init(frame, self.bbox) 
             else:
-                for frame in self.gen:
-                    self.crt_frame_no += 1
+                for no in range(self.crt_frame_no+1, self.total_num+1):
+                    frame = self.read(no)
+                    self.crt_frame_no = no
                     track, bbox = self.tracker.update(frame)
                     self.logger.add_bboxes(no=self.crt_frame_no, bboxes=bbox)
                     if track:
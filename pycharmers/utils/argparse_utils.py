@@ -121,6 +121,9 @@ def cv2ArgumentParser(parser=None, prog="", description=None, add_help=True, **k
         --autofit (bool)      : Whether to fit display size to window size.
         --twitter (bool)      : Whether you want to run for tweet. ( ``display_size`` will be () )
         --capture (bool)      : Whether you want to save as video.
+        --drop-policy (str)   : How to drop stale camera frames captured while processing. ( ``"latest"`` , ``"queue"`` , or ``"none"`` (default) )
+        --queue-size (int)    : The number of frames kept when ``--drop-policy queue`` .
+        --profile (str)       : Where to export the timings of each stage. ( ``*.csv`` or ``*.json`` for ``chrome://tracing`` )
     """
     if parser is None:
         parser = argparse.ArgumentParser(prog=prog, description=description, add_help=add_help, **kwargs)
@@ -135,6 +138,9 @@ def cv2ArgumentParser(parser=None, prog="", description=None, add_help=True, **k
     parser.add_argument("--autofit",      action="store_true", help="Whether to fit display size to window size.")
     parser.add_argument("--twitter",      action="store_true", help="Whether you want to run for tweet. ( ``display_size`` will be ( ``1300`` , ``730`` ) ).")
     parser.add_argument("--capture",      action="store_true", help="Whether you want to save as video.")
+    parser.add_argument("--drop-policy",  type=str, default="none", choices=["latest", "queue", "none"], help="How to drop stale camera frames captured while processing. ('none' reads frames serially. Files are always read serially.)")
+    parser.add_argument("--queue-size",   type=int, default=4,   help="The number of frames kept when '--drop-policy queue'.")
+    parser.add_argument("--profile",      type=str, default=None, help="Where to export the timings of each stage. (*.csv or *.json for chrome://tracing)")
     return parser
 
 def define_neg_sides(args:argparse.Namespace, prefix:str="un_"):
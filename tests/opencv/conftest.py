@@ -0,0 +1,67 @@
+# coding: utf-8
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+
+def _write_sample_video(path, num_frames=60, size=(64, 48), fps=30.0):
+    video = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    for i in range(num_frames):
+        video.write(np.full(shape=(size[1], size[0], 3), fill_value=i * 4 % 256, dtype=np.uint8))
+    video.release()
+    return path
+
+
+def _write_sample_images(dirname, num_frames=5, size=(64, 48)):
+    os.makedirs(dirname, exist_ok=True)
+    for i in range(num_frames):
+        cv2.imwrite(
+            os.path.join(dirname, f"{i:>03}.png"),
+            np.full(shape=(size[1], size[0], 3), fill_value=i * 10, dtype=np.uint8),
+        )
+    with open(os.path.join(dirname, "memo.txt"), mode="w") as f:
+        f.write("not an image.")
+    return dirname
+
+
+def _write_moving_square(path, num_frames=30, size=(96, 64)):
+    video = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 30.0, size)
+    for i in range(num_frames):
+        frame = np.zeros(shape=(size[1], size[0], 3), dtype=np.uint8)
+        frame[20:36, 10 + i : 26 + i] = 255
+        video.write(frame)
+    video.release()
+    return path
+
+
+@pytest.fixture(autouse=True)
+def meta_dir(tmp_path, monkeypatch):
+    """Keep the frame metadata indexes out of the user's ``~/.pycharmers`` ."""
+    from pycharmers.opencv import video_image_handler
+
+    dirname = str(tmp_path / "meta")
+    os.makedirs(dirname, exist_ok=True)
+    monkeypatch.setattr(video_image_handler, "PYCHARMERS_OPENCV_META_DIR", dirname)
+    return dirname
+
+
+@pytest.fixture
+def write_sample_video():
+    return _write_sample_video
+
+
+@pytest.fixture
+def write_moving_square():
+    return _write_moving_square
+
+
+@pytest.fixture
+def sample_video(tmp_path):
+    return _write_sample_video(str(tmp_path / "sample.mp4"))
+
+
+@pytest.fixture
+def sample_images(tmp_path):
+    return _write_sample_images(str(tmp_path / "images"))
@@ -0,0 +1,123 @@
+# coding: utf-8
+import pytest
+
+def test_CascadeDetector():
+    import cv2
+    import numpy as np
+    from matplotlib import cbook
+    from pycharmers.opencv import CascadeDetector, cascade_detect_multi_scale
+    face, eye = "haarcascades:haarcascade_frontalface_alt2", "haarcascades:haarcascade_eye"
+    img = cv2.resize(cv2.imread(cbook.get_sample_data("grace_hopper.jpg", asfileobj=False)), dsize=(360, 420))
+    def frame_create(x):
+        frame = np.full(shape=(600, 800, 3), fill_value=128, dtype=np.uint8)
+        frame[100:520, x:x+360] = img
+        return frame
+    frames = [frame_create(x) for x in range(100, 200, 10)]
+    detector = CascadeDetector(cascades=[face, eye], scale=[0.5, 1.], parents={eye: face}, interval=3)
+    assert detector.parents == {1: 0}
+    results = [detector(frame) for frame in frames]
+    detector.close()
+    assert all(bboxes.shape[1] == 5 and bboxes.dtype == np.int32 for bboxes in results)
+    # Eyes are inside faces.
+    faces, eyes = results[0][results[0][:, 4] == 0], results[0][results[0][:, 4] == 1]
+    assert len(faces) == 1 and len(eyes) >= 1
+    assert np.all(eyes[:, 0] >= faces[0, 0]) and np.all(eyes[:, 0] + eyes[:, 2] <= faces[0, 0] + faces[0, 2])
+    # Boxes are mapped back to the full resolution, and moved linearly between detections.
+    full = cascade_detect_multi_scale(detector.cascades[0], cv2.cvtColor(frames[0], cv2.COLOR_BGR2GRAY))
+    assert np.abs(faces[0, :4] - full[0]).max() <= 4
+    for no in [4, 5]:
+        moved = results[no][results[no][:, 4] == 0][0, 0] - results[3][results[3][:, 4] == 0][0, 0]
+        assert abs(moved - 10 * (no - 3)) <= 4
+
+def test_CascadeRegistry(tmp_path):
+    import os
+    import shutil
+    import cv2
+    from concurrent.futures import ThreadPoolExecutor
+    from pycharmers.opencv import OPENCV_CASCADES, CascadeRegistry, cascade_creator, preload_cascades
+    eye = "haarcascades:haarcascade_eye"
+    os.makedirs(tmp_path / "haarcascades")
+    shutil.copy(OPENCV_CASCADES[eye], tmp_path / "haarcascades")
+    registry = CascadeRegistry(root=str(tmp_path))
+    assert registry._paths is None
+    assert list(registry) == [eye] and len(registry.classifiers) == 0
+    assert registry.preload() == [eye] and registry.load(eye) is registry.load(eye)
+    # Files added later are found after refresh.
+    shutil.copy(OPENCV_CASCADES["haarcascades:haarcascade_smile"], tmp_path / "haarcascades")
+    assert len(registry) == 1
+    registry.refresh()
+    assert len(registry) == 2 and len(registry.classifiers) == 0
+    with pytest.raises(KeyError):
+        registry.load("haarcascades:unknown")
+    # The default cache.
+    preload_cascades([eye])
+    assert cascade_creator(eye, cached=True) is OPENCV_CASCADES.load(eye)
+    # Without cached, every call creates a new instance.
+    assert isinstance(cascade_creator(eye), cv2.CascadeClassifier) and cascade_creator(eye) is not cascade_creator(eye)
+    assert cascade_creator(eye) is not OPENCV_CASCADES.load(eye)
+    # Each thread loads its own classifiers, and refresh invalidates them in all threads.
+    registry.load(eye)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        other = executor.submit(registry.load, eye).result()
+        assert other is not registry.load(eye) and executor.submit(registry.load, eye).result() is other
+        registry.refresh()
+        assert executor.submit(registry.load, eye).result() is not other
+
+def test_CascadeDetector_duplicates():
+    import cv2
+    import numpy as np
+    from matplotlib import cbook
+    from pycharmers.opencv import OPENCV_CASCADES, CascadeDetector
+    face = "haarcascades:haarcascade_frontalface_alt2"
+    img = cv2.imread(cbook.get_sample_data("grace_hopper.jpg", asfileobj=False))
+    # The same cascade at two scales doesn't share the classifier between threads, nor with the caller's cache.
+    detector = CascadeDetector(cascades=[face, face], scale=[0.25, 0.5], num_workers=2)
+    assert detector.cascades[0] is not OPENCV_CASCADES.load(face) and detector.cascades[1] is not detector.cascades[0]
+    assert detector.locks[0] is not detector.locks[1]
+    bboxes = detector(img)
+    detector.close()
+    assert sorted(set(bboxes[:, 4])) == [0, 1]
+    # The same instance given twice is run under one lock.
+    cascade = cv2.CascadeClassifier(OPENCV_CASCADES[face])
+    detector = CascadeDetector(cascades=[cascade, cascade], scale=[0.25, 0.5], num_workers=2)
+    assert detector.cascades[0] is detector.cascades[1] and detector.locks[0] is detector.locks[1]
+    assert np.array_equal(detector(img), bboxes)
+    detector.close()
+
+def test_detect_batch(tmp_path):
+    import cv2
+    import numpy as np
+    from matplotlib import cbook
+    from pycharmers.opencv import cascade_detect_multi_scale, cascade_creator, detect_batch, expand_bboxes, load_detections, save_detections
+    face = "haarcascades:haarcascade_frontalface_alt2"
+    img = cv2.resize(cv2.imread(cbook.get_sample_data("grace_hopper.jpg", asfileobj=False)), dsize=(160, 180))
+    frames = []
+    for i in range(10):
+        frame = np.full(shape=(240, 320, 3), fill_value=128, dtype=np.uint8)
+        frame[30:210, 10*i:10*i+160] = img
+        frames.append(frame)
+    paths = []
+    for i in [0, 5]:
+        paths.append(str(tmp_path / f"{i}.png"))
+        cv2.imwrite(paths[-1], frames[i])
+    paths.append(str(tmp_path / "missing.png"))
+
+    expected = [expand_bboxes(cascade_detect_multi_scale(cascade_creator(face), cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)), shape=frame.shape, expand_ratio=0.1) for frame in frames]
+    for workers in [1, 2]:
+        results = list(detect_batch(frames, cascade=face, workers=workers, chunk=3, expand_ratio=0.1))
+        assert [index for index,_ in results] == list(range(10))
+        assert all(np.array_equal(locations, e) for (_,locations),e in zip(results, expected))
+    results = list(detect_batch(paths, cascade=face, workers=1))
+    assert [len(locations) for _,locations in results[:2]] == [1, 1] and results[2] == (2, None)
+    # Compact files.
+    for ext in [".jsonl", ".npz"]:
+        loaded = load_detections(save_detections(results, out_path=str(tmp_path / f"faces{ext}")))
+        assert [index for index,_ in loaded] == [0, 1, 2] and loaded[2][1] is None
+        assert all(np.array_equal(a[1], b[1]) for a,b in zip(loaded[:2], results[:2]))
+    # Videos are decoded by each worker.
+    video = cv2.VideoWriter(str(tmp_path / "sample.mp4"), cv2.VideoWriter_fourcc(*"mp4v"), 30.0, (320, 240))
+    for frame in frames:
+        video.write(frame)
+    video.release()
+    results = list(detect_batch(str(tmp_path / "sample.mp4"), cascade=face, workers=2, chunk=4))
+    assert [index for index,_ in results] == list(range(10)) and all(len(locations) == 1 for _,locations in results)
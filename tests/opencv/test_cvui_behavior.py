@@ -0,0 +1,82 @@
+# coding: utf-8
+import numpy as np
+
+
+def _draw_widgets(cvui, frame, value, states, checked):
+    frame[:] = (49, 52, 49)
+    cvui.text(where=frame, x=10, y=5, text="Hey there!")
+    cvui.button(where=frame, x=10, y=25, label="&Quit")
+    cvui.button(where=frame, x=80, y=25, width=90, height=30, label="Capture", color=(110, 93, 211))
+    cvui.checkbox(where=frame, x=10, y=65, label="Checkbox", state=checked)
+    cvui.radiobox(where=frame, x=10, y=85, labels=["foo", "bar", "baz"], states=states)
+    cvui.trackbar(where=frame, x=0, y=150, width=200, value=value, min=0, max=1000, segments=4, labelfmt="%.1f")
+    return frame
+
+
+def test_cache(monkeypatch):
+    from pycharmers.opencv import cvui
+
+    internal = getattr(cvui, "__internal")
+    context = cvui.Context()
+    context.windowName = "test_cache"
+    monkeypatch.setitem(internal.contexts, "test_cache", context)
+    internal.init("test_cache", -1)
+
+    assert not cvui.cache()["enabled"]
+    expected = _draw_widgets(cvui, np.zeros(shape=(210, 220, 3), dtype=np.uint8), [500.0], [False, True, False], [True])
+    assert cvui.cache()["size"] == 0
+
+    cvui.cache(enabled=True, maxsize=64)
+    frame = np.zeros(shape=(210, 220, 3), dtype=np.uint8)
+    for _ in range(3):
+        assert np.array_equal(_draw_widgets(cvui, frame, [500.0], [False, True, False], [True]), expected)
+    stats = cvui.cache()
+    assert stats["size"] == 6 and stats["hits"] >= 12
+
+    # Mouse interactions are handled as before, and the changed widgets are rendered again.
+    context.mouse.position = cvui.Point(15, 130)
+    context.mouse.anyButton.justReleased = True
+    states = [False, True, False]
+    _draw_widgets(cvui, frame, [500.0], states, [True])
+    assert states == [False, False, True] and cvui.cache()["size"] > 6
+    context.mouse.anyButton.justReleased = False
+    cvui.cache(enabled=False)
+    assert np.array_equal(frame, _draw_widgets(cvui, np.zeros_like(frame), [500.0], states, [True]))
+    cvui.cache(maxsize=256)
+
+
+def test_rect_blend():
+    from pycharmers.opencv import cvui
+
+    frame = np.full(shape=(100, 120, 3), fill_value=100, dtype=np.uint8)
+    cvui.rect(where=frame, x=10, y=20, width=30, height=40, borderColor=0x000000, fillingColor=0x80FF0000)
+    inside = frame[25:55, 15:35]
+    assert np.all(inside[..., 2] == 177) and np.all(inside[..., :2] == 50)
+    assert np.all(frame[:, 45:] == 100) and np.all(frame[65:] == 100)
+    # Opaque and transparent fillings are the same as before.
+    cvui.rect(where=frame, x=50, y=20, width=10, height=10, borderColor=0x000000, fillingColor=0x0000FF00)
+    assert np.all(frame[22:28, 52:58] == (0, 255, 0))
+    cvui.rect(where=frame, x=70, y=20, width=10, height=10, borderColor=0x000000, fillingColor=0xFF000000)
+    assert np.all(frame[22:28, 72:78] == 100)
+    cvui.rect(where=frame, x=110, y=90, width=30, height=30, borderColor=0x000000, fillingColor=0x80FF0000)
+
+
+def test_SparklineSeries():
+    from pycharmers.opencv import cvui
+
+    series = cvui.SparklineSeries(maxlen=5)
+    series.extend([1, 2, 3])
+    assert list(series) == [1, 2, 3]
+    for v in range(4, 9):
+        series.append(v)
+    assert len(series) == 5 and list(series.values) == [4, 5, 6, 7, 8]
+    series.extend(range(10, 22))
+    assert list(np.asarray(series)) == [17, 18, 19, 20, 21]
+
+    # The same pixels as the list of values, and a flat series does not raise.
+    expected = np.zeros(shape=(60, 120, 3), dtype=np.uint8)
+    cvui.sparkline(where=expected, x=5, y=5, values=[17, 18, 19, 20, 21], width=100, height=50)
+    frame = np.zeros_like(expected)
+    cvui.sparkline(where=frame, x=5, y=5, values=series, width=100, height=50)
+    assert np.array_equal(frame, expected) and frame.any()
+    cvui.sparkline(where=frame, x=5, y=5, values=[3, 3, 3], width=100, height=50)
@@ -0,0 +1,38 @@
+# coding: utf-8
+def test_convert_coords_array():
+    import numpy as np
+    from pycharmers.opencv import convert_coords
+    xywh = np.array([[120,250,60,80],[10,20,30,40]])
+    ltrb = convert_coords(bbox=xywh, to_type="ltrb", from_type="xywh")
+    assert ltrb.tolist() == [list(convert_coords(bbox=tuple(e), to_type="ltrb", from_type="xywh")) for e in xywh.tolist()]
+    assert np.array_equal(convert_coords(bbox=ltrb, to_type="xywh", from_type="ltrb"), xywh)
+    assert xywh.tolist() == [[120,250,60,80],[10,20,30,40]]
+
+def test_draw_bboxes_array():
+    import cv2
+    import numpy as np
+    from pycharmers.opencv import draw_bboxes_array, draw_bboxes_xywh, draw_text_with_bg, cv2RED, cv2BLUE
+    bboxes = np.array([[20,40,50,30],[100,40,50,30],[180,40,50,30]])
+    expected = np.zeros(shape=(120, 240, 3), dtype=np.uint8)
+    for (x,y,w,h),color,label in zip(bboxes.tolist(), [cv2RED, cv2BLUE, cv2RED], ["person", "car", "person"]):
+        cv2.rectangle(expected, pt1=(x,y), pt2=(x+w,y+h), color=color, thickness=3)
+        draw_text_with_bg(img=expected, text=label, org=(x,y-10), offset=(10, 10), fontFace=cv2.FONT_HERSHEY_SIMPLEX, fontScale=0.5, thickness=2)
+    img = draw_bboxes_array(np.zeros_like(expected), bboxes=bboxes, classes=[0,1,0], colors=[cv2RED, cv2BLUE], labels=["person", "car"])
+    assert np.array_equal(img, expected)
+    # Dictionaries given by the caller are not modified.
+    infos = [{"color": cv2RED, "text": "person"}, {"color": cv2BLUE, "text": "car"}, {"color": cv2RED, "text": "person"}]
+    img = draw_bboxes_xywh(frame=np.zeros_like(expected), bboxes=[tuple(e) for e in bboxes.tolist()], infos=infos)
+    assert np.array_equal(img, expected) and infos[0] == {"color": cv2RED, "text": "person"}
+
+def test_draw_bboxes_filled():
+    import cv2
+    import numpy as np
+    from pycharmers.opencv import draw_bboxes_array, draw_bboxes_xywh, cv2RED, cv2BLUE
+    bboxes = [(20,20,60,40),(50,30,60,40),(150,60,30,30)]
+    expected = np.zeros(shape=(120, 240, 3), dtype=np.uint8)
+    for (x,y,w,h),color,thickness in zip(bboxes, [cv2RED, cv2RED, cv2BLUE], [cv2.FILLED, cv2.FILLED, 2]):
+        cv2.rectangle(expected, pt1=(x,y), pt2=(x+w,y+h), color=color, thickness=thickness)
+    infos = [{"color": cv2RED, "rectangle_thickness": cv2.FILLED}, {"color": cv2RED, "rectangle_thickness": -1}, {"color": cv2BLUE, "rectangle_thickness": 2}]
+    assert np.array_equal(draw_bboxes_xywh(frame=np.zeros_like(expected), bboxes=bboxes, infos=infos), expected)
+    img = draw_bboxes_array(np.zeros_like(expected), bboxes=np.array(bboxes), classes=[0,0,1], colors=[cv2RED, cv2BLUE], thickness=[-1, 2])
+    assert np.array_equal(img, expected)
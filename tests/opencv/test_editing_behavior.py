@@ -0,0 +1,79 @@
+# coding: utf-8
+import numpy as np
+
+
+def test_GridCompositor():
+    from pycharmers.opencv import GridCompositor, hconcat_resize_min, vconcat_resize_min
+
+    shapes = [(360, 480, 3), (200, 333, 3), (512, 512, 3), (100, 700, 3), (250, 250, 3)]
+    frames = [np.full(shape=shape, fill_value=i * 40 + 10, dtype=np.uint8) for i, shape in enumerate(shapes)]
+    compositor = GridCompositor(shapes=shapes)
+    nrow, ncol = compositor.grid
+    padded = frames + [np.zeros_like(frames[0])] * (nrow * ncol - len(frames))
+    expected = vconcat_resize_min(*[hconcat_resize_min(*padded[r * ncol : (r + 1) * ncol]) for r in range(nrow)])
+    canvas = compositor.compose(*frames)
+    assert canvas.shape == expected.shape
+    x, y, w, h = compositor.tiles[-1]
+    assert not canvas[y : y + h, x : x + w].any()
+    assert compositor.compose(*frames) is canvas
+
+
+def test_ViewportRenderer():
+    import cv2
+    from pycharmers.opencv import ViewportRenderer
+
+    frame = np.random.RandomState(0).randint(0, 255, size=(400, 800, 3), dtype=np.uint8)
+    viewport = ViewportRenderer(dsize=(200, 200))
+    buffer = viewport.render(frame)
+    assert buffer.shape == (200, 200, 3)
+    # Letterboxed. (The frame is 200x100 in the display.)
+    assert not buffer[:50].any() and not buffer[150:].any() and buffer[50:150].any()
+    assert len(viewport.pyramid) == 3
+    viewport.zoom_by(4)  # 1 display pixel == 1 frame pixel.
+    viewport.pan(dx=-1000, dy=-1000)
+    assert viewport.center == (100, 100)
+    assert np.array_equal(viewport.render(), frame[:200, :200])
+    assert viewport.render() is buffer
+
+
+def test_cv2paste():
+    from pycharmers.opencv import Sprite, cv2paste
+
+    bg = np.zeros(shape=(100, 120, 3), dtype=np.uint8)
+    fg = np.random.RandomState(0).randint(1, 255, size=(40, 50, 3), dtype=np.uint8)
+    pasted = cv2paste(bg, fg, points=(-10, 80))
+    assert not bg.any() and np.array_equal(pasted[80:, :40], fg[:20, 10:])
+    assert pasted[:80].sum() == 0 and pasted[:, 40:].sum() == 0
+    assert cv2paste(bg, fg, points=(200, 0)) is not bg
+    assert cv2paste(bg, fg, points=(10, 10), inplace=True) is bg and np.array_equal(bg[10:50, 10:60], fg)
+    # The 4th channel is alpha, and colors are blended.
+    bgra = np.dstack([np.full(shape=(40, 50, 3), fill_value=200, dtype=np.uint8), np.full(shape=(40, 50), fill_value=64, dtype=np.uint8)])
+    bg = np.full(shape=(100, 120, 3), fill_value=100, dtype=np.uint8)
+    pasted = cv2paste(bg, bgra, points=(0, 0))
+    assert pasted[0, 0, 0] == round(200 * 64 / 255 + 100 * (1 - 64 / 255)) and pasted[50, 60, 0] == 100
+    assert np.array_equal(cv2paste(bg, Sprite(bgra[..., :3], alpha=64 / 255), points=(0, 0)), pasted)
+    assert Sprite(np.dstack([fg, np.full(shape=(40, 50), fill_value=255, dtype=np.uint8)])).opaque
+
+
+def test_SpriteCompositor():
+    from pycharmers.opencv import Sprite, SpriteCompositor, cv2paste
+
+    rnd = np.random.RandomState(0)
+    frame = rnd.randint(0, 255, size=(60, 80, 3), dtype=np.uint8)
+    logo = Sprite(rnd.randint(0, 255, size=(20, 20, 4), dtype=np.uint8))
+    for bg in [(10, 20, 30), rnd.randint(0, 255, size=(100, 120, 3), dtype=np.uint8)]:
+        compositor = SpriteCompositor(size=(120, 100), bg=bg)
+        canvas = None
+        for i in range(8):
+            sprites = [(frame, (20, 20 + i)), (logo, (15 * i - 10, 5 * i)), (logo, (100 - 10 * i, 90))]
+            expected = np.empty(shape=(100, 120, 3), dtype=np.uint8)
+            expected[:] = bg
+            for sprite, points in sprites:
+                cv2paste(expected, sprite, points=points, inplace=True)
+            composed = compositor.compose(sprites)
+            assert (canvas is None or composed is canvas) and np.array_equal(composed, expected)
+            canvas = composed
+        assert len(compositor.dirty) == 3
+        # Sprites outside of the canvas are ignored, and the previous ones are erased.
+        expected[:] = bg
+        assert np.array_equal(compositor.compose([(logo, (500, 500))]), expected) and compositor.dirty == []
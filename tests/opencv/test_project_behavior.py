@@ -0,0 +1,72 @@
+# coding: utf-8
+import csv
+import json
+
+import cv2
+import numpy as np
+import pytest
+
+
+def test_StageProfiler(tmp_path):
+    from pycharmers.opencv import StageProfiler
+
+    profiler = StageProfiler(stages=["read", "func"], maxlen=5)
+    for _ in range(10):
+        profiler.begin()
+        profiler.lap("read")
+        sum(range(10000))
+        profiler.lap("func")
+        profiler.lap("extra")
+        profiler.end()
+    assert profiler.stages == ["read", "func", "extra"]
+    assert len(profiler.records) == 30 and len(profiler.recent["func"]) == 5
+    assert profiler.fps > 0 and set(profiler.summary()) == {"read", "func", "extra"}
+
+    monitor = np.zeros(shape=(200, 200, 3), dtype=np.uint8)
+    assert profiler.draw(where=monitor, x=0, y=0) > 0 and monitor.any()
+
+    with open(profiler.save(str(tmp_path / "profile.csv")), newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 30 and rows[1]["stage"] == "func" and rows[1]["frame_no"] == "1"
+    with open(profiler.save(str(tmp_path / "profile.json"))) as f:
+        events = json.load(f)["traceEvents"]
+    assert len(events) == 30 and events[0]["ph"] == "X" and events[0]["ts"] <= events[1]["ts"]
+
+    # Without record, only the recent frames are kept.
+    profiler = StageProfiler(stages=["read"], maxlen=5, record=False)
+    for _ in range(10):
+        profiler.begin()
+        profiler.lap("read")
+        profiler.end()
+    assert profiler.records == [] and len(profiler.recent["read"]) == 5
+
+
+def test_StageCache():
+    from pycharmers.opencv import StageCache
+
+    calls = []
+
+    def blur(src, ksize):
+        calls.append(ksize)
+        return cv2.blur(src, ksize=(ksize, ksize))
+
+    cache = StageCache()
+    img = np.random.default_rng(0).integers(0, 256, size=(32, 32, 3), dtype=np.uint8)
+    outputs = []
+    for ksize in [3, 3, 5, 5]:
+        src = cache.source(img)
+        gray = cache("gray", cv2.cvtColor, src, code=cv2.COLOR_BGR2GRAY)
+        outputs.append(cache("blur", blur, gray, ksize=ksize))
+    # Only the stage downstream of the changed parameter is recomputed.
+    assert calls == [3, 5] and cache.stats == {"hits": 5, "misses": 3}
+    assert outputs[0] is outputs[1] and np.array_equal(outputs[2], blur(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), 5))
+    with pytest.raises(ValueError):
+        outputs[0][0, 0] = 0
+    # New frames (live videos) invalidate all stages.
+    for _ in range(2):
+        src = cache.source(img.copy())
+        cache("blur", blur, cache("gray", cv2.cvtColor, src, code=cv2.COLOR_BGR2GRAY), ksize=5)
+    assert calls == [3, 5, 5, 5, 5]
+    # Unhashable arguments are never cached.
+    kernel = np.ones(shape=(3, 3), dtype=np.uint8)
+    assert cache("dilate", cv2.dilate, src, kernel=kernel) is not cache("dilate", cv2.dilate, src, kernel=kernel)
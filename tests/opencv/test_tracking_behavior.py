@@ -0,0 +1,74 @@
+# coding: utf-8
+import json
+
+import pytest
+
+
+def test_track_videos(write_moving_square, tmp_path):
+    from pycharmers.opencv import track_video, track_videos
+
+    path = write_moving_square(str(tmp_path / "square.mp4"))
+    summary = track_video(path, bboxes=[(10, 20, 16, 16), (60, 40, 16, 16)], out_path=str(tmp_path / "square.json"))
+    assert summary["num_frames"] == 30 and summary["fps"] > 0
+    assert len(summary["failures"]) == 2
+    with open(summary["out_path"]) as f:
+        logs = json.load(f)
+    assert len(logs["BBoxes"]) == 30 and logs["BBoxes"]["1"] == [[10, 20, 16, 16], [60, 40, 16, 16]]
+    l, t, r, b = logs["BBoxes"]["30"][0]
+    assert abs(l - 39) <= 4 and abs(t - 20) <= 4
+
+    summaries = track_videos(
+        jobs=[
+            {"path": path, "bboxes": [(10, 20, 26, 36)], "out_path": str(tmp_path / "ltrb.json")},
+            {"path": str(tmp_path / "missing.mp4"), "bboxes": [(0, 0, 8, 8)]},
+        ],
+        num_workers=2,
+        coord_type="ltrb",
+    )
+    assert summaries[0]["num_frames"] == 30 and "error" in summaries[1]
+    with open(summaries[0]["out_path"]) as f:
+        l, t, r, b = json.load(f)["BBoxes"]["30"][0]
+    assert (r - l, b - t) == (16, 16)
+
+
+def test_BBoxLogger_stream(tmp_path):
+    from pycharmers.opencv import BBoxLogger, BBoxStreamReader
+    from pycharmers.opencv.tracking import BBOX_STREAM_DTYPE
+
+    stream_path = str(tmp_path / "logs")
+    logger = BBoxLogger(stream_path=stream_path, chunk_size=10, tracking_method="mil")
+    for no in range(1, 101):
+        logger.add_bboxes(no=no, bboxes=[(no, 2, 3, 4), None] if no % 7 else [])
+    logger.add_bboxes(no=101, bboxes=(1.5, 2, 3, 4))
+    logger.add_bboxes(no=1, bboxes=[(9, 9, 9, 9)])
+    logger.logs["fps"] = 30.0
+    assert logger.save().endswith("logs.bin")
+
+    reader = BBoxStreamReader(stream_path + ".bin")
+    assert reader.logs["fps"] == 30.0 and reader.logs["tracking_method"] == "mil"
+    assert len(reader.chunks) > 1 and len(reader) == 2 * 86 + 14 + 2
+    assert reader.read(start=13, end=14) == {13: [[13, 2, 3, 4], None], 14: []}
+    BBoxes = reader.read()
+    assert len(BBoxes) == 101 and BBoxes[1] == [[9, 9, 9, 9]] and BBoxes[101] == [1.5, 2, 3, 4]
+
+    # A broken index line (e.g. killed while writing) is ignored.
+    with open(stream_path + ".jsonl", mode="a") as f:
+        f.write('{"offset": 1')
+    out_path = BBoxStreamReader(stream_path).to_json()
+    with open(out_path) as f:
+        logs = json.load(f)
+    assert logs["coord_type"] == "xywh" and logs["BBoxes"]["50"] == [[50, 2, 3, 4], None]
+
+    # The index describes the records, and boxes keep double precision.
+    logger = BBoxLogger(stream_path=stream_path, chunk_size=10)
+    logger.add_bboxes(no=1, bboxes=[(16777217.5, 0.1, 3, 4)])
+    logger.save()
+    reader = BBoxStreamReader(stream_path)
+    assert reader.dtype == BBOX_STREAM_DTYPE and reader.read() == {1: [[16777217.5, 0.1, 3, 4]]}
+    # An index without the dtype line is corrupt.
+    with open(stream_path + ".jsonl") as f:
+        lines = f.readlines()[1:]
+    with open(stream_path + ".jsonl", mode="w") as f:
+        f.writelines(lines)
+    with pytest.raises(ValueError):
+        BBoxStreamReader(stream_path)
@@ -0,0 +1,313 @@
+# coding: utf-8
+import os
+import shutil
+
+import cv2
+import numpy as np
+import pytest
+
+
+def test_FrameSourceCreate(sample_video, sample_images):
+    from pycharmers.opencv import FrameSourceCreate, ImageDirFrameSource, VideoFrameSource
+
+    with FrameSourceCreate(sample_video) as source:
+        assert isinstance(source, VideoFrameSource)
+        assert len(source) == 60
+        assert source[0].shape == (48, 64, 3)
+        assert len(list(source[-3:])) == 3
+    with FrameSourceCreate(sample_images) as source:
+        assert isinstance(source, ImageDirFrameSource)
+        assert len(source) == 5
+        assert source[-1].mean() == 40
+        assert [int(frame.mean()) for frame in source[::2]] == [0, 20, 40]
+        with pytest.raises(IndexError):
+            source[5]
+
+
+def test_VideoFrameSource(sample_video):
+    from pycharmers.opencv import VideoFrameSource
+
+    sequential = [frame for frame in VideoFrameSource(sample_video)]
+    assert len(sequential) == 60
+    source = VideoFrameSource(sample_video)
+    for no in [30, 31, 10, 59, 0, 45, 44]:
+        assert np.array_equal(source[no], sequential[no])
+    assert source.keyframes is None or source.keyframes[0] == 0
+    source.release()
+
+
+def test_VideoFrameSource_lazy_scan(sample_video, tmp_path, monkeypatch):
+    from pycharmers.opencv import MemmapFrameSource, VideoFrameSource, video_image_handler
+
+    scans = []
+    scan_video = video_image_handler._scan_video
+    monkeypatch.setattr(video_image_handler, "_scan_video", lambda path: scans.append(path) or scan_video(path))
+    # Sequential reads don't scan the video.
+    with VideoFrameSource(sample_video) as source:
+        assert len(source) == 60 and len(list(source)) == 60
+    with MemmapFrameSource(sample_video, cache_dir=str(tmp_path)) as source:
+        assert len(source) == 60
+    assert scans == []
+    # Random access does (only once.)
+    with VideoFrameSource(sample_video) as source:
+        source[30], source[10]
+    assert len(scans) == (1 if hasattr(cv2, "CAP_PROP_LRF_HAS_KEY_FRAME") else 0)
+
+
+def test_mono_frame_generator(sample_video, sample_images):
+    from pycharmers.opencv import mono_frame_generator
+
+    assert len(list(mono_frame_generator(sample_video, frame_no=50))) == 10
+    assert len(list(mono_frame_generator(sample_images, frame_no=1))) == 4
+
+
+def test_FramePrefetcher(sample_video):
+    from pycharmers.opencv import FramePrefetcher, mono_frame_generator
+
+    frames = mono_frame_generator(sample_video, prefetch=4)
+    assert isinstance(frames, FramePrefetcher)
+    assert len(list(frames)) == 60
+    assert frames.stats["consumed"] == frames.stats["produced"] == 60
+    frames = mono_frame_generator(sample_video, prefetch=4)
+    for i, _ in enumerate(frames):
+        if i == 5:
+            break
+    frames.close()
+    assert not frames.thread.is_alive()
+
+
+def test_multi_frame_generator_sepa(sample_video, sample_images):
+    from pycharmers.opencv import multi_frame_generator_sepa
+
+    for prefetch in [0, 2]:
+        gen = multi_frame_generator_sepa(sample_video, sample_images, prefetch=prefetch)
+        assert [len(frames) for frames in gen] == [2] * 5
+
+
+def test_multi_frame_generator_concat(sample_images):
+    from pycharmers.opencv import multi_frame_generator_concat
+
+    gen = multi_frame_generator_concat(sample_images, sample_images, sample_images, grid=(2, 2))
+    shapes = [img.shape for img in gen]
+    assert shapes == [(96, 128, 3)] * 5
+
+
+def test_get_frame_metadata(sample_video, sample_images, write_sample_video, meta_dir, tmp_path, monkeypatch):
+    import glob
+
+    from pycharmers.opencv import count_frame_num, get_frame_metadata, video_image_handler
+
+    scans = []
+    scan_video = video_image_handler._scan_video
+    monkeypatch.setattr(video_image_handler, "_scan_video", lambda path: scans.append(path) or scan_video(path))
+
+    meta = get_frame_metadata(sample_video, timestamps=True)
+    assert (meta["num_frames"], meta["width"], meta["height"], meta["fps"]) == (60, 64, 48, 30.0)
+    assert abs(meta["duration"] - 2.0) < 1e-3
+    assert len(meta["timestamps"]) == 60 and meta["keyframes"][0] == 0
+    # Cached results (keyed by path, size and mtime) are the same, and don't scan the video again.
+    cached = get_frame_metadata(sample_video, timestamps=True)
+    assert np.array_equal(cached["timestamps"], meta["timestamps"])
+    assert cached["keyframes"] == meta["keyframes"] and len(scans) == 1
+    assert count_frame_num(sample_video) == 60 and len(scans) == 1
+    # Files are replaced atomically, and a broken or stale index is rebuilt.
+    assert not glob.glob(os.path.join(meta_dir, "*.tmp"))
+    (index_path,) = glob.glob(os.path.join(meta_dir, "*.npz"))
+    with open(index_path, mode="wb") as f:
+        f.write(b"PK\x03\x04broken")
+    assert len(get_frame_metadata(sample_video, timestamps=True)["timestamps"]) == 60 and len(scans) == 2
+    other_video = write_sample_video(str(tmp_path / "other.mp4"), num_frames=30)
+    assert len(get_frame_metadata(other_video, timestamps=True)["timestamps"]) == 30
+    (other_index_path,) = set(glob.glob(os.path.join(meta_dir, "*.npz"))) - {index_path}
+    shutil.copy(other_index_path, index_path)
+    assert len(get_frame_metadata(sample_video, timestamps=True)["timestamps"]) == 60 and len(scans) == 4
+    write_sample_video(sample_video, num_frames=30)
+    assert count_frame_num(sample_video) == 30
+    meta = get_frame_metadata(sample_images)
+    assert (meta["num_frames"], meta["width"], meta["height"]) == (5, 64, 48)
+
+
+def test_ImageDirFrameSource(sample_images):
+    from pycharmers.opencv import ImageDirFrameSource, mono_frame_generator
+
+    means = [int(frame.mean()) for frame in ImageDirFrameSource(sample_images, num_workers=3)]
+    assert means == [0, 10, 20, 30, 40]
+    assert len(list(mono_frame_generator(sample_images, frame_no=2, num_workers=2))) == 3
+    source = ImageDirFrameSource(sample_images, reduce=2)
+    assert source[0].shape == (24, 32, 3)
+    assert len(ImageDirFrameSource(sample_images, extensions=["jpg"])) == 0
+    # Only the extensions are matched, in any case.
+    shutil.copy(os.path.join(sample_images, "004.png"), os.path.join(sample_images, "005.PNG"))
+    shutil.copy(os.path.join(sample_images, "004.png"), os.path.join(sample_images, "006.png.txt"))
+    assert ImageDirFrameSource(sample_images).fnames[-2:] == ["004.png", "005.PNG"]
+
+
+def test_AsyncVideoWriter(tmp_path):
+    import copy
+
+    from pycharmers.opencv import AsyncVideoWriter, VideoWriterCreate, count_frame_num
+
+    is_ok, writer, out_path = VideoWriterCreate(
+        out_path=str(tmp_path / "out.mp4"), codec="mp4v", fps=30.0, size=(64, 48), async_=True, maxsize=4
+    )
+    assert is_ok and isinstance(writer, AsyncVideoWriter) and writer.isOpened()
+    frame = np.zeros(shape=(48, 64, 3), dtype=np.uint8)
+    for i in range(40):
+        frame[:] = i * 5
+        writer.write(frame)
+    writer.release()
+    assert writer.stats["written"] == 40 and writer.stats["max_depth"] <= 4
+    assert count_frame_num(out_path) == 40
+    # Attributes are looked up safely before the writer is set.
+    assert copy.copy(writer).stats == writer.stats
+    empty = AsyncVideoWriter.__new__(AsyncVideoWriter)
+    assert not hasattr(empty, "isOpened") and getattr(empty, "writer", None) is None
+
+
+def test_FFmpegVideoWriter(tmp_path, monkeypatch):
+    import stat
+    import sys
+
+    from pycharmers.opencv import FFmpegVideoWriter, VideoWriterCreate
+
+    # Fake ffmpeg which dumps stdin into the output path.
+    ffmpeg = tmp_path / "ffmpeg"
+    ffmpeg.write_text(
+        f"#!{sys.executable}\nimport shutil, sys\n"
+        "with open(sys.argv[-1], 'wb') as f:\n    shutil.copyfileobj(sys.stdin.buffer, f)\n"
+    )
+    ffmpeg.chmod(ffmpeg.stat().st_mode | stat.S_IEXEC)
+    out_path = str(tmp_path / "out.mp4")
+    writer = FFmpegVideoWriter(out_path, fps=30.0, size=(64, 48), crf=18, preset="fast", threads=2, ffmpeg=str(ffmpeg))
+    assert writer.isOpened()
+    assert writer.command[writer.command.index("-crf") + 1] == "18" and "-q:v" not in writer.command
+    for i in range(10):
+        writer.write(np.full(shape=(48, 64, 3), fill_value=i, dtype=np.uint8))
+    with pytest.raises(ValueError):
+        writer.write(np.zeros(shape=(64, 48, 3), dtype=np.uint8))
+    writer.release()
+    assert os.path.getsize(out_path) == 10 * 48 * 64 * 3
+
+    monkeypatch.setenv("PATH", str(tmp_path) + os.pathsep + os.environ["PATH"])
+    _, writer, _ = VideoWriterCreate(out_path=out_path, codec="mp4v", fps=30.0, size=(64, 48), backend="ffmpeg")
+    assert isinstance(writer, FFmpegVideoWriter) and "mpeg4" in writer.command
+    assert writer.command[writer.command.index("-q:v") + 1] == "3"
+    writer.release()
+    _, writer, _ = VideoWriterCreate(out_path=out_path, codec="mp4v", fps=30.0, size=(64, 48), backend="ffmpeg", ffmpeg_kwargs={"qscale": 1})
+    assert writer.command[writer.command.index("-q:v") + 1] == "1"
+    writer.release()
+    # The pixel format depends on the encoder, and odd sizes are padded for subsampled formats.
+    for codec, pix_fmt, size, vf in [
+        ("libx264", None, (64, 48), None),
+        ("libx264", None, (63, 47), "pad=ceil(iw/2)*2:ceil(ih/2)*2"),
+        ("mjpeg", None, (63, 48), "pad=ceil(iw/2)*2:ceil(ih/2)*2"),
+        ("libx264", "yuv422p", (64, 47), None),
+        ("libx264", "yuv444p", (63, 47), None),
+    ]:
+        writer = FFmpegVideoWriter(out_path, fps=30.0, size=size, codec=codec, pix_fmt=pix_fmt, ffmpeg=str(ffmpeg))
+        expected = pix_fmt or {"libx264": "yuv420p", "mjpeg": "yuvj420p"}[codec]
+        assert writer.command[writer.command.index("-pix_fmt", writer.command.index("-c:v")) + 1] == expected
+        assert (writer.command[writer.command.index("-vf") + 1] if "-vf" in writer.command else None) == vf
+        writer.write(np.zeros(shape=(size[1], size[0], 3), dtype=np.uint8))
+        writer.release()
+
+
+def test_mono_frame_generator_stride(sample_video, sample_images):
+    from pycharmers.opencv import StridedVideoCapture, VideoCaptureCreate, VideoFrameSource, mono_frame_generator
+
+    sequential = list(VideoFrameSource(sample_video))
+    frames = list(mono_frame_generator(sample_video, step=10))
+    assert len(frames) == 6 and all(np.array_equal(a, b) for a, b in zip(frames, sequential[::10]))
+    frames = list(mono_frame_generator(sample_video, start_sec=1.0, end_sec=1.5))
+    assert len(frames) == 15 and np.array_equal(frames[0], sequential[30])
+    assert len(list(mono_frame_generator(sample_video, step=3, max_frames=4))) == 4
+    assert len(list(mono_frame_generator(sample_images, step=2))) == 3
+    # A step larger than the GOP seeks over the skipped frames instead of decoding them.
+    source = VideoFrameSource(sample_video)
+    if source.build_index() is not None and len(source.keyframes) > 2:
+        step = max(np.diff(source.keyframes)) + 1
+        grabs = []
+        cap = source.cap
+        source.cap = type("Counter", (), {"grab": lambda self: grabs.append(1) or cap.grab(), "__getattr__": lambda self, name: getattr(cap, name)})()
+        frames = list(source[::step])
+        assert all(np.array_equal(a, b) for a, b in zip(frames, sequential[::step])) and len(grabs) < 60 - len(frames)
+    source.release()
+
+    cap = VideoCaptureCreate(path=sample_video, step=10, max_frames=5)
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    assert len(frames) == 5 and all(np.array_equal(a, b) for a, b in zip(frames, sequential[::10]))
+    cap = VideoCaptureCreate(path=sample_video, start_sec=1.0, end_sec=1.1)
+    ret, frame = cap.read()
+    assert ret and np.array_equal(frame, sequential[30])
+    assert cap.read()[0] and cap.read()[0] and not cap.read()[0]
+    empty = StridedVideoCapture.__new__(StridedVideoCapture)
+    assert not hasattr(empty, "isOpened") and getattr(empty, "cap", None) is None
+
+
+def test_MemmapFrameSource(sample_video, write_sample_video, tmp_path):
+    from pycharmers.opencv import FrameSourceCreate, MemmapFrameSource, VideoFrameSource, evict_frame_cache
+
+    cache_dir = str(tmp_path / "cache")
+    os.makedirs(cache_dir)
+    sequential = list(VideoFrameSource(sample_video))
+    with FrameSourceCreate(sample_video, cache=True, cache_dir=cache_dir) as source:
+        assert isinstance(source, MemmapFrameSource)
+        assert source.frames.shape == (60, 48, 64, 3)
+        assert np.array_equal(source[45], sequential[45]) and not source[45].flags.writeable
+    source = MemmapFrameSource(sample_video, scale=0.5, grayscale=True, cache_dir=cache_dir)
+    assert source[0].shape == (24, 32) and len(list(source[50:])) == 10
+    assert len([fn for fn in os.listdir(cache_dir) if fn.endswith(".json")]) == 2
+    # The cache is rebuilt when the video changes.
+    write_sample_video(sample_video, num_frames=30)
+    assert len(MemmapFrameSource(sample_video, cache_dir=cache_dir)) == 30
+    # Only the most recently used cache is kept.
+    evicted = evict_frame_cache(max_bytes=30 * 48 * 64 * 3, cache_dir=cache_dir)
+    assert len(evicted) == 1
+    assert len(MemmapFrameSource(sample_video, cache_dir=cache_dir)) == 30
+
+
+def test_ThreadedVideoCapture(sample_video):
+    import time
+
+    from pycharmers.opencv import ThreadedVideoCapture, VideoCaptureCreate
+
+    for drop_policy, maxsize in [("latest", 1), ("queue", 4)]:
+        cap = ThreadedVideoCapture(VideoCaptureCreate(path=sample_video), drop_policy=drop_policy, maxsize=maxsize)
+        means = []
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            assert time.perf_counter() >= cap.timestamp
+            means.append(frame.mean())
+            time.sleep(0.01)
+        cap.release()
+        assert means == sorted(means) and len(set(means)) == len(means)
+        assert cap.stats["captured"] == 60 and cap.stats["delivered"] + cap.stats["dropped"] == 60
+        assert cap.stats["dropped"] > 0 and not cap.isOpened()
+    # Video files can be read at their fps.
+    cap = ThreadedVideoCapture(VideoCaptureCreate(path=sample_video), realtime=True)
+    assert (cap.get(cv2.CAP_PROP_FRAME_WIDTH), cap.get(cv2.CAP_PROP_FRAME_HEIGHT), cap.get(cv2.CAP_PROP_FPS)) == (64, 48, 30)
+    assert cap.get(cv2.CAP_PROP_POS_FRAMES) >= 0
+    start = time.perf_counter()
+    assert cap.read()[0] and cap.read()[0] and cap.read()[0]
+    assert time.perf_counter() - start >= 1 / 30
+    cap.release()
+    # No frame is dropped while keeping all of them. (ex. recording)
+    cap = ThreadedVideoCapture(VideoCaptureCreate(path=sample_video), drop_policy="latest", keep_all=True)
+    num_frames = 0
+    while cap.read()[0]:
+        num_frames += 1
+        time.sleep(0.005)
+    cap.release()
+    assert num_frames == 60 and cap.stats["dropped"] == 0
+    cap.keep_all(False)
+    assert cap.buffer.maxlen == 1
+    empty = ThreadedVideoCapture.__new__(ThreadedVideoCapture)
+    assert not hasattr(empty, "grab") and getattr(empty, "cap", None) is None
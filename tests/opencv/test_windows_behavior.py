@@ -0,0 +1,25 @@
+# coding: utf-8
+def test_FrameWindow_frame_cache(write_sample_video, tmp_path, monkeypatch):
+    import cv2
+    import numpy as np
+    from pycharmers.opencv import FrameWindow, VideoFrameSource
+    for name in ["namedWindow", "imshow", "destroyWindow"]:
+        monkeypatch.setattr(cv2, name, lambda *args, **kwargs: None)
+    path = write_sample_video(str(tmp_path / "sample.mp4"), num_frames=40)
+    sequential = list(VideoFrameSource(path))
+
+    window = FrameWindow(path, cache_mb=48*64*3*10/1024**2, backfill=4)
+    assert np.array_equal(window.read(30), sequential[29])
+    assert sorted(window.frame_cache) == [1, 26, 27, 28, 29, 30]
+    assert np.array_equal(window.read(27), sequential[26])
+    for no in range(1, 41):
+        window.read(no)
+    assert len(window.frame_cache) == 10 and 40 in window.frame_cache
+    frames = list(window.iter_frames(5, 14))
+    assert len(frames) == 10 and np.array_equal(frames[-1], sequential[13])
+    window.destroy()
+    # Sources of different lengths are read up to the shortest one.
+    short = write_sample_video(str(tmp_path / "short.mp4"), num_frames=30)
+    window = FrameWindow(path, short)
+    assert window.total_num == 30 and window.read(30).shape[:2] == (96, 64)
+    window.destroy()